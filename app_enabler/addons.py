@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+#: name of the addon configuration file provided by the applications
+ADDON_FILE = "addon.json"
+
+#: version of the index format, bump it to invalidate the stored indexes
+INDEX_VERSION = 1
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize the distribution name according to PEP 503.
+
+    :param str name: distribution name
+    :return: normalized name
+    """
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _get_modules(distribution: metadata.Distribution) -> List[str]:
+    """
+    Get the top level modules provided by the distribution.
+
+    ``top_level.txt`` is used if available, otherwise modules are detected from the ``RECORD`` files.
+    """
+    top_level = distribution.read_text("top_level.txt")
+    if top_level:
+        return top_level.split()
+    modules = set()
+    for file in distribution.files or []:
+        parts = file.parts
+        if len(parts) > 1 and parts[1] == "__init__.py" and not parts[0].endswith((".dist-info", ".egg-info")):
+            modules.add(parts[0])
+        elif len(parts) == 1 and file.suffix == ".py":
+            modules.add(file.stem)
+    return sorted(modules)
+
+
+def _get_addon_files(distribution: metadata.Distribution, modules: List[str]) -> Dict[str, str]:
+    """
+    Get the addon configuration files provided by the distribution modules.
+
+    Files are looked up in the distribution install location, which is cheaper than parsing ``RECORD``.
+    """
+    addons = {}
+    for module in modules:
+        addon_file = Path(distribution.locate_file(f"{module}/{ADDON_FILE}"))
+        if addon_file.is_file():
+            addons[module] = str(addon_file)
+    return addons
+
+
+def build_addons_index() -> Dict[str, Dict[str, Any]]:
+    """
+    Scan the installed distributions and build the index of the provided modules and addon configuration files.
+
+    Each distribution is indexed by its normalized name and it's described by a dict with the following keys:
+
+    * ``name``: distribution name
+    * ``version``: distribution version
+    * ``modules``: top level modules, in ``top_level.txt`` order
+    * ``addons``: addon configuration file paths, by module name
+
+    If a distribution is installed more than once in ``sys.path``, the first one is indexed, like python import does.
+
+    :return: distributions index
+    """
+    index = {}
+    for distribution in metadata.distributions():
+        name = distribution.metadata["Name"]
+        if not name or normalize_name(name) in index:
+            continue
+        modules = _get_modules(distribution)
+        index[normalize_name(name)] = {
+            "name": name,
+            "version": distribution.version,
+            "modules": modules,
+            "addons": _get_addon_files(distribution, modules),
+        }
+    return index
+
+
+def get_environment_fingerprint() -> List[Any]:
+    """
+    Compute the fingerprint of the python environment.
+
+    Installing or removing a distribution changes the modification time of the ``sys.path`` directory it's installed
+    in, thus the fingerprint is made of the python executable and the modification time of each ``sys.path``
+    directory.
+
+    :return: environment fingerprint
+    """
+    fingerprint = [sys.executable, INDEX_VERSION]
+    for path in sys.path:
+        try:
+            fingerprint.append([path, os.stat(path or ".").st_mtime_ns])
+        except OSError:
+            fingerprint.append([path, None])
+    return fingerprint
+
+
+def get_cache_dir() -> Path:
+    """
+    Get the directory where the addons indexes are stored.
+
+    :return: user cache directory
+    """
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "django-app-enabler"
+
+
+def get_addons_index(cache: bool = True) -> Dict[str, Dict[str, Any]]:
+    """
+    Get the index of the installed distributions (see :py:func:`build_addons_index`).
+
+    The index is stored in the user cache directory and it's rebuilt only when the environment fingerprint
+    (see :py:func:`get_environment_fingerprint`) changes.
+
+    :param bool cache: Load and store the index in the user cache directory
+    :return: distributions index
+    """
+    if not cache:
+        return build_addons_index()
+    fingerprint = get_environment_fingerprint()
+    key = hashlib.sha1(sys.executable.encode("utf-8")).hexdigest()
+    index_file = get_cache_dir() / f"addons-{key}.json"
+    try:
+        stored = json.loads(index_file.read_text())
+        if stored["fingerprint"] == fingerprint:
+            return stored["index"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    index = build_addons_index()
+    try:
+        index_file.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=index_file.parent, suffix=".tmp")
+        with os.fdopen(fd, "w") as fp:
+            json.dump({"fingerprint": fingerprint, "index": index}, fp)
+        os.replace(temp_path, index_file)
+    except OSError:  # pragma: no cover
+        # cache is an optimization, failing to write it must not break the execution
+        pass
+    return index
+
+
+def get_distribution_entry(name: str, cache: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Get the index entry of the distribution.
+
+    :param str name: distribution name
+    :param bool cache: Load and store the index in the user cache directory
+    :return: distribution index entry; if ``None``, distribution is not installed
+    """
+    return get_addons_index(cache).get(normalize_name(name))
+
+
+def list_addons(cache: bool = True) -> List[Dict[str, Any]]:
+    """
+    List the installed distributions providing at least one addon configuration file.
+
+    :param bool cache: Load and store the index in the user cache directory
+    :return: distributions index entries, sorted by name
+    """
+    return sorted(
+        (entry for entry in get_addons_index(cache).values() if entry["addons"]),
+        key=lambda entry: entry["name"].lower(),
+    )
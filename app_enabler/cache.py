@@ -0,0 +1,196 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from importlib.util import MAGIC_NUMBER
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+#: name of the cache directory, created in the project root
+CACHE_DIR = ".app_enabler_cache"
+
+#: file fingerprint: size, modification time (in nanoseconds), content sha256
+Fingerprint = Tuple[int, int, str]
+
+
+def get_cache_dir(root: Union[str, Path] = ".") -> Path:
+    """
+    Create the cache directory in the project root, if missing.
+
+    The directory contains a ``.gitignore`` file ignoring all of its content, thus the files created by
+    ``django-app-enabler`` in the project (cache entries, lock and manifest) are never reported as untracked.
+
+    :param str root: project root directory
+    :return: cache directory path
+    """
+    directory = Path(root) / CACHE_DIR
+    directory.mkdir(exist_ok=True)
+    gitignore = directory / ".gitignore"
+    if not gitignore.exists():
+        gitignore.write_text("*\n")
+    return directory
+
+
+def content_hash(content: bytes) -> str:
+    """Compute the hash of the file content."""
+    return hashlib.sha256(content).hexdigest()
+
+
+def fingerprint(path: Union[str, Path]) -> Fingerprint:
+    """
+    Compute the fingerprint of the file.
+
+    :param str path: file path
+    :return: file fingerprint
+    """
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns, content_hash(Path(path).read_bytes())
+
+
+def _is_fresh(path: str, stored: Fingerprint) -> bool:
+    """
+    Check if the file matches the stored fingerprint.
+
+    Content hash is only checked if the file size or modification time have changed.
+    """
+    try:
+        stat = os.stat(path)
+        if (stat.st_size, stat.st_mtime_ns) == stored[:2]:
+            return True
+        return stat.st_size == stored[0] and content_hash(Path(path).read_bytes()) == stored[2]
+    except OSError:
+        return False
+
+
+class ProjectCache:
+    """
+    Persistent on-disk cache for data computed from the project files.
+
+    Each entry is identified by a namespace and the path of the file it's computed from and it's valid as long as
+    the file (and any declared dependency) matches the fingerprint (size, modification time and content hash)
+    recorded when storing it.
+
+    Entries are invalidated when the python version changes, as they may contain python version specific data
+    (like AST or code objects).
+    """
+
+    def __init__(self, root: Union[str, Path] = "."):
+        self.root = Path(root)
+        self.directory = self.root / CACHE_DIR
+
+    def _entry_path(self, namespace: str, path: Union[str, Path]) -> Path:
+        key = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+        return self.directory / f"{namespace}-{key}.pickle"
+
+    def get(self, namespace: str, path: Union[str, Path]) -> Optional[Any]:
+        """
+        Get the cached value for the file.
+
+        :param str namespace: cache namespace
+        :param str path: file path
+        :return: cached value, ``None`` if not cached or outdated
+        """
+        try:
+            with open(self._entry_path(namespace, path), "rb") as fp:
+                entry = pickle.load(fp)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+        if entry.get("magic") != MAGIC_NUMBER:
+            return None
+        if not all(_is_fresh(file_path, stored) for file_path, stored in entry["files"].items()):
+            return None
+        return entry["value"]
+
+    def set(
+        self,
+        namespace: str,
+        path: Union[str, Path],
+        value: Any,
+        dependencies: Iterable[Union[str, Path]] = (),
+        fingerprints: Optional[Dict[str, Fingerprint]] = None,
+    ):
+        """
+        Store the value computed from the file.
+
+        :param str namespace: cache namespace
+        :param str path: file path
+        :param Any value: value to store, it must be picklable
+        :param list dependencies: additional files the value depends on
+        :param dict fingerprints: already computed fingerprints of the files (by absolute path)
+        """
+        fingerprints = dict(fingerprints or {})
+        try:
+            for file_path in (path, *dependencies):
+                file_path = os.path.abspath(file_path)
+                if file_path not in fingerprints:
+                    fingerprints[file_path] = fingerprint(file_path)
+            get_cache_dir(self.root)
+            entry = {"magic": MAGIC_NUMBER, "files": fingerprints, "value": value}
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as fp:
+                    pickle.dump(entry, fp, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(temp_path, self._entry_path(namespace, path))
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except OSError:  # pragma: no cover
+            # cache is an optimization, failing to write it must not break the execution
+            pass
+
+
+class MemoryCache(ProjectCache):
+    """
+    In-memory cache for long-lived processes.
+
+    Entries are validated against the files fingerprints exactly like :py:class:`ProjectCache` ones, but they are kept
+    in memory and lost when the process exits. Values are stored pickled, thus each lookup returns a fresh copy that
+    can be modified (e.g.: a parsed module to be patched) without altering the cached one.
+    """
+
+    def __init__(self, root: Union[str, Path] = "."):
+        super().__init__(root)
+        self.entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def get(self, namespace: str, path: Union[str, Path]) -> Optional[Any]:
+        """
+        Get the cached value for the file.
+
+        :param str namespace: cache namespace
+        :param str path: file path
+        :return: cached value, ``None`` if not cached or outdated
+        """
+        entry = self.entries.get((namespace, os.path.abspath(path)))
+        if not entry or not all(_is_fresh(file_path, stored) for file_path, stored in entry["files"].items()):
+            return None
+        return pickle.loads(entry["value"])
+
+    def set(
+        self,
+        namespace: str,
+        path: Union[str, Path],
+        value: Any,
+        dependencies: Iterable[Union[str, Path]] = (),
+        fingerprints: Optional[Dict[str, Fingerprint]] = None,
+    ):
+        """
+        Store the value computed from the file.
+
+        :param str namespace: cache namespace
+        :param str path: file path
+        :param Any value: value to store, it must be picklable
+        :param list dependencies: additional files the value depends on
+        :param dict fingerprints: already computed fingerprints of the files (by absolute path)
+        """
+        fingerprints = dict(fingerprints or {})
+        try:
+            for file_path in (path, *dependencies):
+                file_path = os.path.abspath(file_path)
+                if file_path not in fingerprints:
+                    fingerprints[file_path] = fingerprint(file_path)
+        except OSError:  # pragma: no cover
+            return
+        self.entries[(namespace, os.path.abspath(path))] = {
+            "files": fingerprints,
+            "value": pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+        }
@@ -1,20 +1,119 @@
+import contextlib
+import functools
+import json
 import os
 import sys
+import time
 from pathlib import Path
-from subprocess import CalledProcessError
-from typing import List
+from typing import Any, Callable, Dict, List
 
 import click
 
-from .enable import apply_configuration_set, enable_application as enable_fun
-from .errors import messages
-from .install import get_application_from_package, install as install_fun
+from .errors import ConfigurationError, LockTimeoutError, messages
+from .lock import set_lock_timeout
+
+
+def dry_run_options(command: Callable) -> Callable:
+    """Add the dry run options to the command."""
+    command = click.option("--json", "json_output", is_flag=True, help="Print the dry run plan as JSON")(command)
+    return click.option("--dry-run", is_flag=True, help="Print the changes to the project files without writing them")(
+        command
+    )
+
+
+def report_errors(command: Callable) -> Callable:
+    """Report the invalid configurations and the project lock timeouts and exit with an error, instead of raising."""
+
+    @functools.wraps(command)
+    def wrapper(*args, **kwargs):
+        try:
+            return command(*args, **kwargs)
+        except ConfigurationError as e:
+            sys.stderr.write(messages["invalid_configuration"].format(errors="\n".join(e.errors)))
+            sys.exit(1)
+        except LockTimeoutError as e:
+            sys.stderr.write(str(e))
+            sys.exit(1)
+
+    return wrapper
+
+
+def output_errors(errors: List[str], verbose: bool):
+    """
+    Report the error messages to stderr, or raise them in verbose mode.
+
+    :param list errors: error messages
+    :param bool verbose: Verbose output
+    """
+    if errors and verbose:
+        raise RuntimeError("".join(errors))
+    for msg in errors:
+        sys.stderr.write(msg)
+
+
+def output_dry_run(context: click.core.Context, config_set: List[Dict[str, Any]], json_output: bool):
+    """
+    Print the changes the configurations would make to the project.
+
+    :param click.core.Context context: Click context
+    :param list config_set: list of addon configurations
+    :param bool json_output: Print the plan as JSON
+    """
+    # business modules import django, astor and the packages metadata: they are imported where used (here and in
+    # each command) to keep the cli startup fast
+    from .enable import output_plan, plan_configurations
+
+    plan = plan_configurations(config_set, cache=context.obj["cache"], static_resolve=context.obj["static_resolve"])
+    output_plan(plan, json_output=json_output)
 
 
 @click.group()
 @click.option("--verbose", is_flag=True)
+@click.option(
+    "--static-verify",
+    is_flag=True,
+    help="Verify the patched settings and urlconf by inspecting the files instead of importing them",
+)
+@click.option(
+    "--cache",
+    is_flag=True,
+    help="Cache parsed project files and resolved paths in the .app_enabler_cache directory to speed up later runs",
+)
+@click.option(
+    "--static-resolve",
+    is_flag=True,
+    help="Resolve the settings and urlconf files from manage.py and settings without initializing django",
+)
+@click.option(
+    "--manifest",
+    is_flag=True,
+    help="Record the applied configurations in .app_enabler_cache/manifest.json and skip them on later runs if the "
+    "project files are unchanged",
+)
+@click.option(
+    "--lock-timeout",
+    type=click.FloatRange(min=0),
+    default=60.0,
+    show_default=True,
+    help="Seconds waited for the project lock held by another django-enabler process",
+)
+@click.option("--profile", is_flag=True, help="Print the wall and CPU time spent in each phase to stderr")
+@click.option(
+    "--profile-format",
+    type=click.Choice(["table", "json"]),
+    default="table",
+    show_default=True,
+    help="Format of the phases timings",
+)
+@click.option(
+    "--cprofile",
+    type=click.Path(dir_okay=False),
+    help="Run the command under cProfile and dump the stats to the given file",
+)
 @click.pass_context
-def cli(context, verbose):
+def cli(
+    context, verbose, static_verify, cache, static_resolve, manifest, lock_timeout, profile, profile_format, cprofile
+):
     """Click entrypoint."""
     # this is needed when calling as CLI utility to put the current directory
     # in the python path as it's not done automatically
@@ -22,12 +121,35 @@ def cli(context, verbose):
         sys.path.insert(0, os.getcwd())
     context.ensure_object(dict)
     context.obj["verbose"] = verbose
+    context.obj["static_verify"] = static_verify
+    context.obj["cache"] = cache
+    context.obj["static_resolve"] = static_resolve
+    context.obj["manifest"] = manifest
+    set_lock_timeout(lock_timeout)
+    if profile:
+        from .profiling import disable_profiling, enable_profiling, format_timings, phase
+
+        enable_profiling()
+        # callbacks are run in reverse order: the command phase is closed before the timings are printed
+        context.call_on_close(
+            lambda: sys.stderr.write(format_timings(disable_profiling(), json_output=profile_format == "json"))
+        )
+        context.with_resource(phase("command"))
+    if cprofile:
+        import cProfile
+
+        profiler = cProfile.Profile()
+        context.call_on_close(lambda: profiler.dump_stats(cprofile))
+        context.call_on_close(profiler.disable)
+        profiler.enable()
 
 
 @cli.command()
 @click.argument("application")
+@dry_run_options
 @click.pass_context
-def enable(context: click.core.Context, application: str):
+@report_errors
+def enable(context: click.core.Context, application: str, dry_run: bool, json_output: bool):
     """
     Enable the application in the current django project.
 
@@ -36,61 +158,321 @@ def enable(context: click.core.Context, application: str):
 
     :param click.core.Context context: Click context
     :param str application: python module name to enable. It must be the name of a Django application.
+    :param bool dry_run: Print the changes to the project files without writing them
+    :param bool json_output: Print the dry run plan as JSON
     """
-    enable_fun(application, verbose=context.obj["verbose"])
+    if dry_run:
+        from .django import load_addon
+
+        application_config = load_addon(application)
+        output_dry_run(context, [application_config] if application_config else [], json_output)
+        return
+    from .enable import enable_application as enable_fun
+
+    enable_fun(
+        application,
+        verbose=context.obj["verbose"],
+        static_verify=context.obj["static_verify"],
+        cache=context.obj["cache"],
+        static_resolve=context.obj["static_resolve"],
+        manifest=context.obj["manifest"],
+    )
 
 
 @cli.command()
 @click.argument("config_set", nargs=-1)
+@dry_run_options
+@click.option("--watch", is_flag=True, help="Apply the configurations again each time the files change")
+@click.option(
+    "--debounce",
+    type=float,
+    default=0.3,
+    show_default=True,
+    help="Seconds without further changes waited before applying the changed files in watch mode",
+)
 @click.pass_context
-def apply(context: click.core.Context, config_set: List[str]):
+@report_errors
+def apply(
+    context: click.core.Context,
+    config_set: List[str],
+    dry_run: bool,
+    json_output: bool,
+    watch: bool,
+    debounce: float,
+):
     """
     Apply configuration stored in one or more json files.
 
-    CONFIG_SET: Path to configuration files
+    Files with .jsonl extension and the standard input (-) are read as JSON Lines, one configuration per line,
+    and the configurations are applied while being read.
+
+    CONFIG_SET: Path to configuration files, or - to read from the standard input
     \f
 
     :param click.core.Context context: Click context
     :param list config_set: list of paths to addon configuration to load and apply
+    :param bool dry_run: Print the changes to the project files without writing them
+    :param bool json_output: Print the dry run plan as JSON
+    :param bool watch: Apply the configurations again each time the files change
+    :param float debounce: Seconds without further changes waited before applying the changed files
     """
-    apply_configuration_set([Path(config) for config in config_set], verbose=context.obj["verbose"])
+    if watch:
+        from .watch import ConfigurationWatcher
+
+        if dry_run:
+            raise click.UsageError("--watch can't be used with --dry-run")
+        if "-" in config_set:
+            raise click.UsageError("--watch can't be used with the standard input")
+        if context.obj["cache"] or context.obj["manifest"]:
+            # project files are kept parsed in memory and only the changed configurations are applied again
+            raise click.UsageError("--watch can't be used with --cache or --manifest")
+        watcher = ConfigurationWatcher(
+            [Path(config) for config in config_set],
+            verbose=context.obj["verbose"],
+            static_verify=context.obj["static_verify"],
+            static_resolve=context.obj["static_resolve"],
+        )
+        with contextlib.suppress(KeyboardInterrupt):
+            watcher.run(debounce=debounce)
+        return
+    if dry_run:
+        from .enable import load_configuration_set
+
+        output_dry_run(context, load_configuration_set([Path(config) for config in config_set]), json_output)
+        return
+    from .enable import apply_configuration_set
+
+    apply_configuration_set(
+        [Path(config) for config in config_set],
+        verbose=context.obj["verbose"],
+        static_verify=context.obj["static_verify"],
+        cache=context.obj["cache"],
+        static_resolve=context.obj["static_resolve"],
+        manifest=context.obj["manifest"],
+    )
 
 
 @cli.command()
-@click.argument("package")
+@click.argument("packages", nargs=-1)
+@click.option(
+    "-r",
+    "--requirement",
+    "requirements",
+    multiple=True,
+    type=click.Path(exists=True, dir_okay=False),
+    help="Install and enable the packages from the given requirements file",
+)
 @click.option("--pip-options", default="", help="Additional options passed as is to pip")
+@click.option("--log-file", type=click.Path(dir_okay=False), help="Write pip output to the given file")
+@click.option(
+    "--wheelhouse",
+    type=click.Path(file_okay=False),
+    help="Install offline from the wheels in the given directory, storing there the wheels of missing packages",
+)
+@click.option(
+    "--pipeline",
+    is_flag=True,
+    help="Install the packages one by one, enabling each installed package while the next one is installed",
+)
+@dry_run_options
 @click.pass_context
-def install(context: click.core.Context, package: str, pip_options: str):
+@report_errors
+def install(
+    context: click.core.Context,
+    packages: List[str],
+    requirements: List[str],
+    pip_options: str,
+    log_file: str,
+    wheelhouse: str,
+    pipeline: bool,
+    dry_run: bool,
+    json_output: bool,
+):
     """
-    Install the package in the current virtualenv and enable the corresponding application in the current project.
+    Install the packages in the current virtualenv and enable the corresponding applications in the current project.
+
+    All the packages are installed with a single pip invocation and enabled in a single batch; with --pipeline, each
+    package is installed by a separate pip invocation while the already installed ones are loaded.
 
     \b
-    PACKAGE: Package name as available on PyPi, or rather its requirement string.
-             Accepts any PEP-508 compliant requirement.
-             Example: "djangocms-blog~=1.2.0"
+    PACKAGES: Packages names as available on PyPi, or rather their requirement strings.
+              Accepts any PEP-508 compliant requirement.
+              Example: "djangocms-blog~=1.2.0"
     \f
 
     :param click.core.Context context: Click context
-    :param str package: Name of the package to install
+    :param list packages: Names of the packages to install
+    :param list requirements: Paths to requirements files
     :param str pip_options: Additional options passed to pip
+    :param str log_file: Path of the file where pip output is written
+    :param str wheelhouse: Path of the wheels directory
+    :param bool pipeline: Overlap the installation of each package with enabling the previous ones
+    :param bool dry_run: Report the packages pip would install and the changes to the project files of the already
+                         installed ones, without installing or writing anything
+    :param bool json_output: Print the dry run plan as JSON
     """
+    if not packages and not requirements:
+        raise click.UsageError("No package or requirements file given")
     verbose = context.obj["verbose"]
-    try:
-        install_fun(package, verbose=verbose, pip_options=pip_options)
-    except CalledProcessError:
-        msg = messages["install_error"].format(package=package)
-        if verbose:
-            raise RuntimeError(msg)
-        else:
-            sys.stderr.write(msg)
-            return
-    application = get_application_from_package(package)
-    if application:
-        enable_fun(application, verbose=verbose)
+    if dry_run:
+        from .install import plan_install
+
+        # keep the JSON plan the only content of stdout
+        with contextlib.redirect_stdout(sys.stderr if json_output else sys.stdout):
+            config_set = plan_install(
+                packages, verbose=verbose, pip_options=pip_options, requirements=requirements, wheelhouse=wheelhouse
+            )
+        output_dry_run(context, config_set, json_output)
+        return
+    if pipeline:
+        from .install import get_requirement_strings
+        from .pipeline import install_and_enable
+
+        errors = install_and_enable(
+            get_requirement_strings(packages, requirements),
+            verbose=verbose,
+            pip_options=pip_options,
+            log_file=log_file,
+            wheelhouse=wheelhouse,
+            static_verify=context.obj["static_verify"],
+            cache=context.obj["cache"],
+            static_resolve=context.obj["static_resolve"],
+            manifest=context.obj["manifest"],
+        )
+    else:
+        from .install import install_and_enable_packages
+
+        errors = install_and_enable_packages(
+            packages,
+            verbose=verbose,
+            pip_options=pip_options,
+            requirements=requirements,
+            log_file=log_file,
+            wheelhouse=wheelhouse,
+            static_verify=context.obj["static_verify"],
+            cache=context.obj["cache"],
+            static_resolve=context.obj["static_resolve"],
+            manifest=context.obj["manifest"],
+        )
+    output_errors(errors, verbose)
+
+
+@cli.command()
+@click.argument("root", type=click.Path(exists=True, file_okay=False))
+@click.argument("config_set", nargs=-1, required=True)
+@click.option("--workers", type=click.IntRange(min=1), help="Number of worker processes (default: number of CPUs)")
+@click.option("--max-depth", type=int, help="Maximum depth of the projects directories under ROOT")
+@click.option("--json", "json_output", is_flag=True, help="Print the projects results as JSON")
+@click.pass_context
+@report_errors
+def fleet(
+    context: click.core.Context,
+    root: str,
+    config_set: List[str],
+    workers: int,
+    max_depth: int,
+    json_output: bool,
+):
+    """
+    Apply configuration stored in one or more json files to all the django projects found under ROOT.
+
+    Projects are the directories containing a manage.py file; they are processed in parallel, using static resolution
+    and verification.
+
+    \b
+    ROOT: Directory where projects are looked up
+    CONFIG_SET: Path to configuration files
+    \f
+
+    :param click.core.Context context: Click context
+    :param str root: directory where projects are looked up
+    :param list config_set: list of paths to addon configuration to load and apply
+    :param int workers: number of worker processes
+    :param int max_depth: maximum depth of the projects directories
+    :param bool json_output: Print the projects results as JSON
+    """
+    from .enable import load_configuration_set
+    from .fleet import apply_fleet, discover_projects
+
+    start = time.perf_counter()
+    projects = discover_projects(root, max_depth=max_depth)
+    configurations = load_configuration_set([Path(config) for config in config_set])
+    results = apply_fleet(projects, configurations, workers=workers, cache=context.obj["cache"])
+    if json_output:
+        sys.stdout.write(json.dumps(results, indent=2) + "\n")
     else:
-        msg = messages["enable_error"].format(package=package)
-        if verbose:
-            raise RuntimeError(msg)
-        else:
-            sys.stderr.write(msg)
-            return
+        for result in results:
+            if result["error"]:
+                sys.stdout.write(messages["fleet_project_error"].format(**result))
+            else:
+                sys.stdout.write(
+                    messages["fleet_project"].format(
+                        passed=sum(result["verified"]), total=len(result["verified"]), **result
+                    )
+                )
+    failed = [result for result in results if result["error"] or not all(result["verified"])]
+    sys.stderr.write(
+        messages["fleet_summary"].format(
+            projects=len(results), failed=len(failed), elapsed=time.perf_counter() - start
+        )
+    )
+    if failed:
+        context.exit(1)
+
+
+@cli.command()
+@click.option(
+    "--socket",
+    "socket_path",
+    default=".app_enabler.sock",
+    show_default=True,
+    type=click.Path(dir_okay=False),
+    help="Path of the Unix socket the server listens on",
+)
+@click.pass_context
+def serve(context: click.core.Context, socket_path: str):
+    """
+    Run a server enabling applications in the current django project on request.
+
+    Requests are JSON documents sent one per line on the Unix socket, for example:
+
+    \b
+    {"command": "enable", "application": "djangocms_blog"}
+    {"command": "apply", "config_set": ["config.json"]}
+    {"command": "plan", "configurations": [{"installed-apps": ["taggit"]}]}
+    \f
+
+    :param click.core.Context context: Click context
+    :param str socket_path: path of the Unix socket
+    """
+    from .server import EnablerServer
+
+    if context.obj["cache"] or context.obj["manifest"]:
+        # the server keeps the project files in memory and it has no manifest
+        raise click.UsageError("serve can't be used with --cache or --manifest")
+    with EnablerServer(
+        socket_path, static_verify=context.obj["static_verify"], static_resolve=context.obj["static_resolve"]
+    ) as server:
+        if context.obj["verbose"]:
+            sys.stdout.write(messages["server_listening"].format(socket=socket_path))
+            sys.stdout.flush()
+        with contextlib.suppress(KeyboardInterrupt):
+            server.serve_forever()
+
+
+@cli.command(name="list-addons")
+@click.pass_context
+def list_addons(context: click.core.Context):
+    """
+    List the installed packages providing an addon configuration.
+
+    \f
+
+    :param click.core.Context context: Click context
+    """
+    from .addons import list_addons as list_addons_fun
+
+    message = messages["addon_entry_verbose" if context.obj["verbose"] else "addon_entry"]
+    for entry in list_addons_fun():
+        for module, path in entry["addons"].items():
+            sys.stdout.write(message.format(name=entry["name"], version=entry["version"], module=module, path=path))
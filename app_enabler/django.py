@@ -1,9 +1,15 @@
 import json
-from importlib import import_module
-from typing import Any, Dict, Optional
+from importlib import import_module, resources
+from importlib.util import find_spec
+from typing import Any, Dict, Optional, Tuple
 
 import django.conf
-from pkg_resources import resource_stream
+
+from .cache import ProjectCache
+from .errors import ConfigurationError
+from .patcher import get_settings_module, get_settings_values, parse_file
+from .profiling import phase
+from .schema import check_configuration
 
 
 def load_addon(module_name: str) -> Optional[Dict[str, Any]]:
@@ -14,13 +20,24 @@ def load_addon(module_name: str) -> Optional[Dict[str, Any]]:
 
     :param str module_name: name of the python module to load as application
     :return: addon configuration
+    :raise ConfigurationError: if the configuration is not valid (see :py:mod:`app_enabler.schema`)
     """
     try:
-        with resource_stream(module_name, "addon.json") as fp:
-            data = json.load(fp)
-        return data
-    except Exception:
-        pass
+        with phase("load_addon"):
+            module = import_module(module_name)
+            if not hasattr(module, "__path__"):
+                # plain modules are not packages, thus they can't contain the addon.json resource
+                return None
+            content = resources.files(module).joinpath("addon.json").read_bytes()
+    except (FileNotFoundError, ModuleNotFoundError, OSError):
+        return None
+    source = f"{module_name}/addon.json"
+    try:
+        data = json.loads(content)
+    except ValueError as e:
+        raise ConfigurationError([f"{source}: {e}"])
+    check_configuration(data, addon=True, source=source)
+    return data
 
 
 def get_settings_path(setting: "django.conf.LazySettings") -> str:
@@ -43,3 +60,48 @@ def get_urlconf_path(setting: "django.conf.LazySettings") -> str:
     """
     urlconf_module = import_module(setting.ROOT_URLCONF)
     return urlconf_module.__file__
+
+
+def get_module_path(module_name: str) -> Optional[str]:
+    """
+    Get the file path of the python module without importing it.
+
+    Parent packages are imported by the lookup.
+
+    :param str module_name: python module dotted path
+    :return: path to the module file; if ``None``, the module is not found
+    """
+    try:
+        spec = find_spec(module_name)
+    except (ImportError, ValueError):
+        return None
+    if spec and spec.has_location:
+        return spec.origin
+    return None
+
+
+def get_project_paths_static(
+    manage_file: str = "manage.py", cache: Optional[ProjectCache] = None
+) -> Optional[Tuple[str, str]]:
+    """
+    Get the paths of the django settings and urlconf files without initializing django.
+
+    ``DJANGO_SETTINGS_MODULE`` is read from ``manage.py`` and ``ROOT_URLCONF`` from the settings file, thus this only
+    works if both are set as literal values.
+
+    :param str manage_file: path to manage.py file
+    :param ProjectCache cache: cache for the parsed modules
+    :return: settings and urlconf file paths; if ``None``, paths can't be resolved statically
+    """
+    try:
+        settings_module = get_settings_module(parse_file(manage_file, cache))
+    except (OSError, SyntaxError):
+        return None
+    settings_path = get_module_path(settings_module) if settings_module else None
+    if not settings_path:
+        return None
+    urlconf_module = get_settings_values(parse_file(settings_path, cache)).get("ROOT_URLCONF")
+    urlconf_path = get_module_path(urlconf_module) if isinstance(urlconf_module, str) else None
+    if not urlconf_path:
+        return None
+    return settings_path, urlconf_path
@@ -1,16 +1,39 @@
+import ast
 import json
+import os
 import sys
 import warnings
 from importlib import import_module
 from pathlib import Path
-from types import ModuleType
-from typing import Any, Dict, List
+from types import ModuleType, SimpleNamespace
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
 
 import django.conf
 
-from .django import get_settings_path, get_urlconf_path, load_addon
-from .errors import messages
-from .patcher import setup_django, update_setting, update_urlconf
+from .cache import ProjectCache
+from .django import get_project_paths_static, get_settings_path, get_urlconf_path, load_addon
+from .errors import ConfigurationError, messages
+from .lock import project_lock
+from .manifest import ApplyManifest
+from .patcher import (
+    get_settings_values,
+    get_urlconf_includes,
+    parse_file,
+    patch_file_set,
+    patch_setting,
+    patch_urlconf,
+    plan_update_set,
+    setup_django,
+    write_file,
+)
+from .profiling import phase
+from .schema import check_configuration, check_configuration_set
+
+#: configuration path reading the configurations from the standard input, as JSON Lines
+STDIN = "-"
+
+#: extension of the configuration files read as JSON Lines
+JSON_LINES_SUFFIX = ".jsonl"
 
 
 def _verify_settings(imported: ModuleType, application_config: Dict[str, Any]) -> bool:
@@ -29,7 +52,8 @@ def _verify_settings(imported: ModuleType, application_config: Dict[str, Any]) -
         precedence information).
         """
         passed = True
-        if isinstance(value, list):
+        if isinstance(value, list) and getattr(imported, key) != value:
+            # settings not existing in the project are added verbatim, otherwise items are merged
             for item in value:
                 if isinstance(item, dict):
                     real_item = item["value"]
@@ -77,12 +101,12 @@ def _verify_urlconf(imported: ModuleType, application_config: Dict[str, Any]) ->
     return test_passed and urlpatterns_checked
 
 
-def verify_installation(settings: django.conf.LazySettings, application_config: Dict[str, Any]) -> bool:
+def _import_project_modules(settings: django.conf.LazySettings) -> Tuple[ModuleType, ModuleType]:
     """
-    Verify that package installation has been successful.
+    Import a fresh copy of the project settings and ``ROOT_URLCONF`` modules.
 
-    :param django.conf.LazySettings settings: Path to settings file
-    :param dict application_config: addon configuration
+    :param django.conf.LazySettings settings: Django settings object
+    :return: settings and urlconf modules
     """
     try:
         del sys.modules[settings.SETTINGS_MODULE]
@@ -94,11 +118,146 @@ def verify_installation(settings: django.conf.LazySettings, application_config:
         pass
     imported_settings = import_module(settings.SETTINGS_MODULE)
     imported_urlconf = import_module(settings.ROOT_URLCONF)
-    test_passed = _verify_settings(imported_settings, application_config)
-    test_passed = test_passed and _verify_urlconf(imported_urlconf, application_config)
+    return imported_settings, imported_urlconf
+
+
+def verify_installation(settings: django.conf.LazySettings, application_config: Dict[str, Any]) -> bool:
+    """
+    Verify that package installation has been successful.
+
+    :param django.conf.LazySettings settings: Path to settings file
+    :param dict application_config: addon configuration
+    """
+    with phase("verify"):
+        imported_settings, imported_urlconf = _import_project_modules(settings)
+        test_passed = _verify_settings(imported_settings, application_config)
+        test_passed = test_passed and _verify_urlconf(imported_urlconf, application_config)
     return test_passed
 
 
+def _verify_settings_static(parsed: ast.Module, application_config: Dict[str, Any]) -> bool:
+    """
+    Check that addon config has been properly set in patched settings without importing them.
+
+    Only settings with literal values can be checked; any other setting is reported as not verified.
+
+    :param ast.Module parsed: parsed patched settings module
+    :param dict application_config: addon configuration
+    """
+    try:
+        return _verify_settings(SimpleNamespace(**get_settings_values(parsed)), application_config)
+    except AttributeError as e:
+        warnings.warn(f"Configuration error: {e}", RuntimeWarning)
+        return False
+
+
+def _verify_urlconf_static(parsed: ast.Module, application_config: Dict[str, Any]) -> bool:
+    """
+    Check that addon urlconf has been properly added in patched urlconf without importing it.
+
+    :param ast.Module parsed: parsed patched ``ROOT_URLCONF`` module
+    :param dict application_config: addon configuration
+    """
+    existing_urlconf = get_urlconf_includes(parsed)
+    # include function is added by our patcher, soo we must ensure it is imported
+    if existing_urlconf is None:
+        return False
+    return all(url[1] in existing_urlconf for url in application_config.get("urls", []))
+
+
+def verify_installation_static(setting_file: str, urlconf_file: str, application_config: Dict[str, Any]) -> bool:
+    """
+    Verify that package installation has been successful by inspecting the patched files.
+
+    Unlike :py:func:`verify_installation`, project modules are not imported, thus the cost of verification only
+    depends on the size of the patched files.
+
+    :param str setting_file: project settings file path
+    :param str urlconf_file: project urlconf file path
+    :param dict application_config: addon configuration
+    """
+    return all(verify_installation_static_set(setting_file, urlconf_file, [application_config]))
+
+
+def verify_installation_static_set(
+    setting_file: str, urlconf_file: str, config_set: List[Dict[str, Any]], cache: Optional[ProjectCache] = None
+) -> List[bool]:
+    """
+    Verify that a set of addon configurations has been successfully applied by inspecting the patched files.
+
+    :param str setting_file: project settings file path
+    :param str urlconf_file: project urlconf file path
+    :param list config_set: list of addon configurations
+    :param ProjectCache cache: cache for the parsed modules
+    :return: verification result for each configuration
+    """
+    return verify_patched_static_set(parse_file(setting_file, cache), parse_file(urlconf_file, cache), config_set)
+
+
+def verify_patched_static_set(
+    parsed_settings: ast.Module, parsed_urlconf: ast.Module, config_set: List[Dict[str, Any]]
+) -> List[bool]:
+    """
+    Verify that a set of addon configurations has been successfully applied by inspecting the patched modules.
+
+    :param ast.Module parsed_settings: patched settings module (see :py:func:`app_enabler.patcher.patch_file_set`)
+    :param ast.Module parsed_urlconf: patched urlconf module
+    :param list config_set: list of addon configurations
+    :return: verification result for each configuration
+    """
+    results = []
+    with phase("verify"):
+        for application_config in _prune_overridden_settings(config_set):
+            test_passed = _verify_settings_static(parsed_settings, application_config)
+            test_passed = test_passed and _verify_urlconf_static(parsed_urlconf, application_config)
+            results.append(test_passed)
+    return results
+
+
+def _prune_overridden_settings(config_set: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Remove from each configuration the settings overridden by a later configuration in the set.
+
+    Only list settings are merged, any other setting value is replaced by the last configuration declaring it, thus
+    the values from the previous configurations are not expected in the patched settings.
+
+    :param list config_set: list of addon configurations
+    :return: list of addon configurations to be verified
+    """
+    overridden = set()
+    pruned_set = []
+    for application_config in reversed(config_set):
+        settings = application_config.get("settings", {})
+        pruned_set.append(
+            {
+                **application_config,
+                "settings": {key: value for key, value in settings.items() if key not in overridden},
+            }
+        )
+        overridden.update(key for key, value in settings.items() if not isinstance(value, (list, tuple)))
+    return list(reversed(pruned_set))
+
+
+def verify_installation_set(settings: django.conf.LazySettings, config_set: List[Dict[str, Any]]) -> List[bool]:
+    """
+    Verify that a set of addon configurations has been successfully applied.
+
+    Project modules are imported only once and each configuration is checked against them.
+
+    :param django.conf.LazySettings settings: Django settings object
+    :param list config_set: list of addon configurations
+    :return: verification result for each configuration
+    """
+    results = []
+    with phase("verify"):
+        imported_settings, imported_urlconf = _import_project_modules(settings)
+        for application_config in _prune_overridden_settings(config_set):
+            test_passed = _verify_settings(imported_settings, application_config)
+            test_passed = test_passed and _verify_urlconf(imported_urlconf, application_config)
+            results.append(test_passed)
+    return results
+
+
 def output_message(message: str):
     """
     Print the given message to stdout.
@@ -109,53 +268,507 @@ def output_message(message: str):
         sys.stdout.write(message)
 
 
-def apply_configuration(application_config: Dict[str, Any]):
+def output_file_status(file_path: str, status: str, verbose: bool = False):
     """
-    Enable django application in the current project
+    Print the status of the patched file to stdout in verbose mode.
 
-    :param dict application_config: addon configuration
+    :param str file_path: patched file path
+    :param str status: file status (see :py:func:`app_enabler.patcher.write_file`)
+    :param bool verbose: Verbose output
+    """
+    if verbose:
+        sys.stdout.write(messages["file_status"].format(path=file_path, status=status))
+
+
+def _get_project_files(cache: Optional[ProjectCache] = None, static_resolve: bool = False) -> Tuple[str, str]:
     """
+    Get the project settings and urlconf file paths.
+
+    Paths are taken from the cache if available, then resolved statically (if ``static_resolve``) and finally from the
+    django settings, initializing django if not already done.
+
+    Cached paths are stored by ``DJANGO_SETTINGS_MODULE`` environment value and depend on ``manage.py`` and on the
+    ``ROOT_URLCONF`` value in the settings file. The settings file is not fingerprinted as a whole, as it's changed by
+    each application.
+
+    :param ProjectCache cache: cache for the resolved paths
+    :param bool static_resolve: Resolve the paths without initializing django
+    :return: settings and urlconf file paths
+    """
+    # read before initializing django, as manage.py may set it
+    namespace = f"project-{os.environ.get('DJANGO_SETTINGS_MODULE', '')}"
+    cached = cache.get(namespace, "manage.py") if cache else None
+    if cached:
+        *project_files, root_urlconf = cached
+        if all(os.path.exists(file_path) for file_path in project_files) and root_urlconf == _get_root_urlconf(
+            project_files[0], cache
+        ):
+            return tuple(project_files)
+    project_files = get_project_paths_static(cache=cache) if static_resolve else None
+    if not project_files:
+        from django.apps import apps
+
+        if not apps.ready:
+            setup_django(cache)
+        project_files = (get_settings_path(django.conf.settings), get_urlconf_path(django.conf.settings))
+    if cache:
+        cache.set(namespace, "manage.py", (*project_files, _get_root_urlconf(project_files[0], cache)))
+    return project_files
+
+
+def _get_root_urlconf(setting_file: str, cache: Optional[ProjectCache] = None) -> Any:
+    """Get the literal ``ROOT_URLCONF`` value in the settings file, ``None`` if it's not a literal."""
+    return get_settings_values(parse_file(setting_file, cache)).get("ROOT_URLCONF")
+
+
+def _get_cache(cache: Union[bool, ProjectCache] = False) -> Optional[ProjectCache]:
+    """
+    Get the project cache to use.
+
+    :param bool cache: Use the project cache, or the cache instance to use
+    :return: project cache, ``None`` if disabled
+    """
+    if isinstance(cache, ProjectCache):
+        return cache
+    return ProjectCache() if cache else None
+
+
+def _get_manifest(manifest: Union[bool, ApplyManifest] = False) -> Optional[ApplyManifest]:
+    """
+    Get the project manifest to use.
+
+    :param bool manifest: Use the project manifest, or the manifest instance to use
+    :return: project manifest, ``None`` if disabled
+    """
+    if isinstance(manifest, ApplyManifest):
+        return manifest
+    return ApplyManifest() if manifest else None
+
+
+def _skip_applied(config_set: List[Dict[str, Any]], manifest: Optional[ApplyManifest], verbose: bool = False) -> bool:
+    """
+    Check if the configurations are recorded in the manifest as already applied to the current project files.
+
+    If they are, the configurations messages are printed as if they had been applied again.
 
-    setting_file = get_settings_path(django.conf.settings)
-    urlconf_file = get_urlconf_path(django.conf.settings)
-    update_setting(setting_file, application_config)
-    update_urlconf(urlconf_file, application_config)
-    if verify_installation(django.conf.settings, application_config):
+    :param list config_set: list of addon configurations
+    :param ApplyManifest manifest: project manifest
+    :param bool verbose: Verbose output
+    :return: ``True`` if the configurations must not be applied
+    """
+    if not config_set or not manifest or not manifest.is_applied(config_set):
+        return False
+    with project_lock():
+        # another process may have changed the files since the manifest has been loaded
+        manifest.reload()
+        if not manifest.is_applied(config_set):
+            return False
+    if verbose:
+        sys.stdout.write(messages["manifest_applied"].format(path=manifest.path))
+    for application_config in config_set:
         output_message(application_config.get("message", ""))
-    else:
-        output_message(messages["verify_error"].format(package=application_config.get("package-name")))
+    return True
+
 
+def _setup_django(static_verify: bool = False, cache: Optional[ProjectCache] = None):
+    """
+    Initialize the django environment if needed.
+
+    Django is needed to verify the installation by importing the project modules; with static verification it's only
+    initialized if the project paths can't be resolved otherwise (see :py:func:`_get_project_files`).
 
-def enable_application(application: str, verbose: bool = False):
+    :param bool static_verify: Verify the patched files without importing them
+    :param ProjectCache cache: project cache
+    """
+    from django.apps import apps
+
+    if not static_verify and not apps.ready:
+        setup_django(cache)
+
+
+def apply_configuration(
+    application_config: Dict[str, Any],
+    verbose: bool = False,
+    static_verify: bool = False,
+    cache: Union[bool, ProjectCache] = False,
+    static_resolve: bool = False,
+    manifest: Union[bool, ApplyManifest] = False,
+):
     """
     Enable django application in the current project
 
-    :param str application: python module name to enable. It must be the name of a Django application.
-    :param bool verbose: Verbose output (currently unused)
+    :param dict application_config: addon configuration
+    :param bool verbose: Verbose output
+    :param bool static_verify: Verify the patched files without importing them
+    :param bool cache: Use the project cache for parsed files and resolved paths, or the cache instance to use
+    :param bool static_resolve: Resolve the project settings and urlconf paths without initializing django
+    :param bool manifest: Record the applied configurations in the project manifest, or the manifest instance to use
     """
-    setup_django()
+    project_cache = _get_cache(cache)
+    setting_file, urlconf_file = _get_project_files(project_cache, static_resolve)
+    with project_lock():
+        parsed_settings, status = patch_file_set(setting_file, patch_setting, [application_config], project_cache)
+        output_file_status(setting_file, status, verbose)
+        parsed_urlconf, status = patch_file_set(urlconf_file, patch_urlconf, [application_config], project_cache)
+        output_file_status(urlconf_file, status, verbose)
+        if static_verify:
+            test_passed = all(verify_patched_static_set(parsed_settings, parsed_urlconf, [application_config]))
+        else:
+            test_passed = verify_installation(django.conf.settings, application_config)
+        project_manifest = _get_manifest(manifest)
+        if project_manifest and test_passed:
+            project_manifest.record(setting_file, urlconf_file, [application_config])
+    output_message(_get_verification_message(application_config, test_passed))
+
+
+def enable_application(
+    application: str,
+    verbose: bool = False,
+    static_verify: bool = False,
+    cache: Union[bool, ProjectCache] = False,
+    static_resolve: bool = False,
+    manifest: Union[bool, ApplyManifest] = False,
+):
+    """
+    Enable django application in the current project
 
+    If the configuration is recorded in the project manifest as already applied to the current project files, django
+    is not initialized and the files are not changed.
+
+    :param str application: python module name to enable. It must be the name of a Django application.
+    :param bool verbose: Verbose output
+    :param bool static_verify: Verify the patched files without importing them
+    :param bool cache: Use the project cache for parsed files and resolved paths, or the cache instance to use
+    :param bool static_resolve: Resolve the project settings and urlconf paths without initializing django
+    :param bool manifest: Record the applied configurations in the project manifest, or the manifest instance to use
+    """
+    # configuration is loaded and validated before initializing django to fail early on invalid configurations
     application_config = load_addon(application)
+    project_manifest = _get_manifest(manifest)
+    if application_config and _skip_applied([application_config], project_manifest, verbose):
+        return
+    _setup_django(static_verify, _get_cache(cache))
     if application_config:
-        apply_configuration(application_config)
+        apply_configuration(
+            application_config,
+            verbose=verbose,
+            static_verify=static_verify,
+            cache=cache,
+            static_resolve=static_resolve,
+            manifest=project_manifest or False,
+        )
+
+
+def enable_applications(
+    applications: List[str],
+    verbose: bool = False,
+    static_verify: bool = False,
+    cache: Union[bool, ProjectCache] = False,
+    static_resolve: bool = False,
+    manifest: Union[bool, ApplyManifest] = False,
+):
+    """
+    Enable a set of django applications in the current project in a single batch.
+
+    See :py:func:`apply_configurations`.
+
+    :param list applications: python modules names to enable. They must be the names of Django applications.
+    :param bool verbose: Verbose output
+    :param bool static_verify: Verify the patched files without importing them
+    :param bool cache: Use the project cache for parsed files and resolved paths, or the cache instance to use
+    :param bool static_resolve: Resolve the project settings and urlconf paths without initializing django
+    :param bool manifest: Record the applied configurations in the project manifest, or the manifest instance to use
+    """
+    config_set = [application_config for application_config in map(load_addon, applications) if application_config]
+    project_manifest = _get_manifest(manifest)
+    if _skip_applied(config_set, project_manifest, verbose):
+        return
+    _setup_django(static_verify, _get_cache(cache))
+    apply_configurations(
+        config_set,
+        verbose=verbose,
+        static_verify=static_verify,
+        cache=cache,
+        static_resolve=static_resolve,
+        manifest=project_manifest or False,
+    )
+
+
+def apply_configurations(
+    config_set: List[Dict[str, Any]],
+    verbose: bool = False,
+    static_verify: bool = False,
+    cache: Union[bool, ProjectCache] = False,
+    static_resolve: bool = False,
+    manifest: Union[bool, ApplyManifest] = False,
+):
+    """
+    Enable a set of django applications in the current project in a single batch.
+
+    Settings and urlconf files are parsed and written once, and the installation is verified once after all the
+    configurations have been applied.
+
+    Configurations are validated before changing any file (see :py:mod:`app_enabler.schema`).
+
+    If all the configurations are successfully verified, they are recorded in the project manifest, if enabled (see
+    :py:class:`app_enabler.manifest.ApplyManifest`).
+
+    Project files are read, written and verified while holding the project lock (see
+    :py:func:`app_enabler.lock.project_lock`), thus concurrent runs on the same project are serialized.
+
+    :param list config_set: list of addon configurations
+    :param bool verbose: Verbose output
+    :param bool static_verify: Verify the patched files without importing them
+    :param bool cache: Use the project cache for parsed files and resolved paths, or the cache instance to use
+    :param bool static_resolve: Resolve the project settings and urlconf paths without initializing django
+    :param bool manifest: Record the applied configurations in the project manifest, or the manifest instance to use
+    """
+    if not config_set:
+        return
+    check_configuration_set(config_set)
+    project_cache = _get_cache(cache)
+    setting_file, urlconf_file = _get_project_files(project_cache, static_resolve)
+    with project_lock():
+        parsed_settings, status = patch_file_set(setting_file, patch_setting, config_set, project_cache)
+        output_file_status(setting_file, status, verbose)
+        parsed_urlconf, status = patch_file_set(urlconf_file, patch_urlconf, config_set, project_cache)
+        output_file_status(urlconf_file, status, verbose)
+        if static_verify:
+            results = verify_patched_static_set(parsed_settings, parsed_urlconf, config_set)
+        else:
+            results = verify_installation_set(django.conf.settings, config_set)
+        project_manifest = _get_manifest(manifest)
+        if project_manifest and all(results):
+            project_manifest.record(setting_file, urlconf_file, config_set)
+    for application_config, test_passed in zip(config_set, results):
+        output_message(_get_verification_message(application_config, test_passed))
+
+
+def _get_verification_message(application_config: Dict[str, Any], test_passed: bool) -> str:
+    """Get the message to print after verifying the configuration."""
+    if test_passed:
+        return application_config.get("message", "")
+    return messages["verify_error"].format(package=application_config.get("package-name"))
+
+
+def apply_configuration_stream(
+    configurations: Iterable[Dict[str, Any]],
+    verbose: bool = False,
+    static_verify: bool = False,
+    cache: Union[bool, ProjectCache] = False,
+    static_resolve: bool = False,
+):
+    """
+    Enable a stream of django applications in the current project, consuming the configurations lazily.
+
+    Settings and urlconf files are parsed once and each configuration is validated and patched in memory as soon as
+    it's read; files are written once, after the last configuration has been read, thus no file is changed if any
+    configuration is invalid.
+
+    With static verification each configuration is verified against the patched modules right after being applied
+    and then discarded, so that memory usage does not depend on the number of configurations; otherwise, they are
+    verified once the files have been written, by importing them.
+
+    :param iterable configurations: addon configurations, e.g. from :py:func:`iter_configuration_set`
+    :param bool verbose: Verbose output
+    :param bool static_verify: Verify the patched files without importing them
+    :param bool cache: Use the project cache for parsed files and resolved paths, or the cache instance to use
+    :param bool static_resolve: Resolve the project settings and urlconf paths without initializing django
+    """
+    project_cache = _get_cache(cache)
+    setting_file, urlconf_file = _get_project_files(project_cache, static_resolve)
+    # files are parsed before reading the first configuration, thus the lock is held until the stream is exhausted
+    with project_lock():
+        parsed_settings = parse_file(setting_file, project_cache)
+        parsed_urlconf = parse_file(urlconf_file, project_cache)
+        verified_messages = []
+        pending = []
+        applied = False
+        for application_config in configurations:
+            check_configuration(application_config)
+            with phase("patch"):
+                patch_setting(parsed_settings, application_config)
+                patch_urlconf(parsed_urlconf, application_config)
+            applied = True
+            if static_verify:
+                with phase("verify"):
+                    test_passed = _verify_settings_static(parsed_settings, application_config)
+                    test_passed = test_passed and _verify_urlconf_static(parsed_urlconf, application_config)
+                verified_messages.append(_get_verification_message(application_config, test_passed))
+            else:
+                pending.append(application_config)
+        if not applied:
+            return
+        output_file_status(setting_file, write_file(setting_file, parsed_settings), verbose)
+        output_file_status(urlconf_file, write_file(urlconf_file, parsed_urlconf), verbose)
+        if pending:
+            results = verify_installation_set(django.conf.settings, pending)
+            verified_messages.extend(map(_get_verification_message, pending, results))
+    for message in verified_messages:
+        output_message(message)
 
 
-def apply_configuration_set(config_set: List[Path], verbose: bool = False):
+def apply_configuration_set(
+    config_set: List[Path],
+    verbose: bool = False,
+    static_verify: bool = False,
+    cache: Union[bool, ProjectCache] = False,
+    static_resolve: bool = False,
+    manifest: Union[bool, ApplyManifest] = False,
+):
     """
     Apply settings from the list of input files.
 
+    All the configurations are applied in a single batch (see :py:func:`apply_configurations`).
+
+    If any input is a JSON Lines file or the standard input (see :py:func:`iter_configuration_set`), configurations
+    are streamed instead (see :py:func:`apply_configuration_stream`), thus they are validated while being applied,
+    after django is initialized; streamed configurations are not recorded in the project manifest.
+
     :param list config_set: list of paths to addon configuration to load and apply
-    :param bool verbose: Verbose output (currently unused)
+    :param bool verbose: Verbose output
+    :param bool static_verify: Verify the patched files without importing them
+    :param bool cache: Use the project cache for parsed files and resolved paths, or the cache instance to use
+    :param bool static_resolve: Resolve the project settings and urlconf paths without initializing django
+    :param bool manifest: Record the applied configurations in the project manifest, or the manifest instance to use
     """
-    setup_django()
+    if any(_is_json_lines(config_path) for config_path in config_set):
+        _setup_django(static_verify, _get_cache(cache))
+        apply_configuration_stream(
+            iter_configuration_set(config_set),
+            verbose=verbose,
+            static_verify=static_verify,
+            cache=cache,
+            static_resolve=static_resolve,
+        )
+        return
+    # configurations are loaded and validated before initializing django to fail early on invalid configurations
+    configurations = load_configuration_set(config_set)
+    project_manifest = _get_manifest(manifest)
+    if _skip_applied(configurations, project_manifest, verbose):
+        return
+    _setup_django(static_verify, _get_cache(cache))
 
-    for config_path in config_set:
+    apply_configurations(
+        configurations,
+        verbose=verbose,
+        static_verify=static_verify,
+        cache=cache,
+        static_resolve=static_resolve,
+        manifest=project_manifest or False,
+    )
+
+
+def load_configuration_set(config_set: List[Path]) -> List[Dict[str, Any]]:
+    """
+    Load the addon configurations from the list of input files.
+
+    Each file can contain either a single configuration or a list of configurations; missing files are skipped.
+
+    JSON Lines files and the standard input are supported as well, see :py:func:`iter_configuration_set`.
+
+    :param list config_set: list of paths to addon configuration to load
+    :return: list of addon configurations
+    :raise ConfigurationError: if any file is not valid JSON or any configuration is invalid
+    """
+    return list(iter_configuration_set(config_set))
+
+
+def _is_json_lines(config_path: Path) -> bool:
+    """Check if the configuration file is read as JSON Lines."""
+    return str(config_path) == STDIN or Path(config_path).suffix == JSON_LINES_SUFFIX
+
+
+def _load_json_document(config_path: Path) -> List[Dict[str, Any]]:
+    """Load and validate the configurations of a JSON file."""
+    try:
+        config_data = json.loads(config_path.read_text())
+    except OSError:
+        return []
+    except ValueError as e:
+        raise ConfigurationError([f"{config_path}: {e}"])
+    if not config_data:
+        return []
+    if not isinstance(config_data, list):
+        config_data = [config_data]
+    check_configuration_set(config_data, source=str(config_path))
+    return config_data
+
+
+def _decode_json_lines(fp: TextIO, source: str) -> Iterator[Dict[str, Any]]:
+    """Decode and validate the configurations of an open JSON Lines stream one line at a time."""
+    for line_number, line in enumerate(fp, start=1):
+        if not line.strip():
+            continue
         try:
-            config_data = json.loads(config_path.read_text())
-        except OSError:
-            config_data = []
-        if config_data:
-            if not isinstance(config_data, list):
-                config_data = [config_data]
-            for item in config_data:
-                apply_configuration(item)
+            application_config = json.loads(line)
+        except ValueError as e:
+            raise ConfigurationError([f"{source}:{line_number}: {e}"])
+        check_configuration(application_config, source=f"{source}:{line_number}")
+        yield application_config
+
+
+def _iter_json_lines(config_path: Path) -> Iterator[Dict[str, Any]]:
+    """Decode and validate the configurations of a JSON Lines file (or the standard input) one line at a time."""
+    if str(config_path) == STDIN:
+        yield from _decode_json_lines(sys.stdin, "<stdin>")
+        return
+    try:
+        with open(config_path, encoding="utf-8") as fp:
+            yield from _decode_json_lines(fp, str(config_path))
+    except OSError:
+        return
+
+
+def iter_configuration_set(config_set: List[Path]) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over the addon configurations from the list of input files, loading them lazily.
+
+    Files with ``.jsonl`` extension and the standard input (``-``) are read as JSON Lines, one configuration per line,
+    decoding each line only when the previous configuration has been consumed. Any other file contains either a
+    single configuration or a list of configurations, and it's loaded as a whole. Missing files are skipped.
+
+    :param list config_set: list of paths to addon configuration to load
+    :return: addon configurations
+    :raise ConfigurationError: if any file is not valid JSON or any configuration is invalid
+    """
+    for config_path in config_set:
+        if _is_json_lines(config_path):
+            yield from _iter_json_lines(config_path)
+        else:
+            yield from _load_json_document(config_path)
+
+
+def plan_configurations(
+    config_set: List[Dict[str, Any]], cache: Union[bool, ProjectCache] = False, static_resolve: bool = False
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Compute the changes applying the configurations would make to the project, without writing any file.
+
+    Project modules are not imported; django is only initialized if needed to resolve the project files paths.
+
+    :param list config_set: list of addon configurations
+    :param bool cache: Use the project cache for parsed files and resolved paths, or the cache instance to use
+    :param bool static_resolve: Resolve the project settings and urlconf paths without initializing django
+    :return: settings and urlconf plans (see :py:func:`app_enabler.patcher.plan_update_set`)
+    """
+    check_configuration_set(config_set)
+    project_cache = _get_cache(cache)
+    setting_file, urlconf_file = _get_project_files(project_cache, static_resolve)
+    return {
+        "settings": plan_update_set(setting_file, patch_setting, config_set, project_cache),
+        "urlconf": plan_update_set(urlconf_file, patch_urlconf, config_set, project_cache),
+    }
+
+
+def output_plan(plan: Dict[str, Dict[str, Any]], json_output: bool = False):
+    """
+    Print the plan to stdout, either as unified diff or as JSON.
+
+    :param dict plan: settings and urlconf plans (see :py:func:`plan_configurations`)
+    :param bool json_output: Print the plan as JSON
+    """
+    if json_output:
+        sys.stdout.write(json.dumps(plan, indent=2) + "\n")
+    else:
+        sys.stdout.write("".join(file_plan["diff"] for file_plan in plan.values()))
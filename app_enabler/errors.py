@@ -1,6 +1,34 @@
+from typing import List
+
 messages = {
     "no_managepy": "app-enabler must be executed in the same directory as the project manage.py file",
     "install_error": "Package {package} not installable in the current virtualenv",
+    "install_error_output": "{message}:\n{output}",
     "enable_error": "Package {package} not installed in the current virtualenv",
     "verify_error": "Error verifying {package} configuration",
+    "file_status": "{path}: {status}\n",
+    "manifest_applied": "Configurations already applied according to {path}, project files unchanged\n",
+    "fleet_project": "{project}: settings {settings}, urlconf {urlconf}, verified {passed}/{total} ({elapsed:.2f}s)\n",
+    "fleet_project_error": "{project}: {error} ({elapsed:.2f}s)\n",
+    "fleet_summary": "{projects} projects, {failed} failed in {elapsed:.2f}s\n",
+    "server_listening": "Listening on {socket}\n",
+    "watch_applied": "{changed} of {total} configurations applied\n",
+    "watch_invalid_config": "Invalid configuration, waiting for the next change: {error}\n",
+    "watch_apply_error": "Configurations not applied, waiting for the next change: {error}\n",
+    "invalid_configuration": "Invalid configuration:\n{errors}\n",
+    "lock_timeout": "Project locked by another process: lock {path} not acquired in {timeout:g} seconds\n",
+    "addon_entry": "{name} {version}: {module}\n",
+    "addon_entry_verbose": "{name} {version}: {module} ({path})\n",
 }
+
+
+class ConfigurationError(ValueError):
+    """Invalid addon configuration."""
+
+    def __init__(self, errors: List[str]):
+        self.errors = errors
+        super().__init__("\n".join(errors))
+
+
+class LockTimeoutError(TimeoutError):
+    """Project lock held by another process not acquired in time."""
@@ -0,0 +1,143 @@
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from .cache import ProjectCache
+from .django import get_project_paths_static
+from .enable import verify_patched_static_set
+from .lock import project_lock
+from .patcher import patch_file_set, patch_setting, patch_urlconf
+
+#: directories never traversed looking for projects
+EXCLUDED_DIRS = frozenset(("node_modules", "__pycache__", "site-packages", "static", "media"))
+
+
+def _is_excluded(entry: os.DirEntry) -> bool:
+    """Check if the directory can't contain projects (hidden directories, virtualenvs, known non-project dirs)."""
+    return (
+        entry.name.startswith(".")
+        or entry.name in EXCLUDED_DIRS
+        or os.path.exists(os.path.join(entry.path, "pyvenv.cfg"))
+    )
+
+
+def discover_projects(root: Union[str, Path], max_depth: Optional[int] = None) -> List[Path]:
+    """
+    Find the django projects (directories containing a ``manage.py`` file) under the root directory.
+
+    Directories are traversed with :py:func:`os.scandir`; traversal is pruned at each project directory (projects are
+    not nested), hidden directories, virtualenvs and :py:data:`EXCLUDED_DIRS`.
+
+    :param str root: root directory
+    :param int max_depth: maximum depth of the project directories, relative to the root
+    :return: projects directories, sorted
+    """
+    projects = []
+    stack = [(str(root), 0)]
+    while stack:
+        directory, depth = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                entries = list(entries)
+        except OSError:
+            continue
+        if any(entry.name == "manage.py" and entry.is_file() for entry in entries):
+            projects.append(Path(directory))
+            continue
+        if max_depth is not None and depth >= max_depth:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False) and not _is_excluded(entry):
+                stack.append((entry.path, depth + 1))
+    return sorted(projects)
+
+
+def _unload_project_modules(project_dir: str):
+    """Remove the project modules imported while resolving its files from the modules cache."""
+    for name, module in list(sys.modules.items()):
+        module_file = getattr(module, "__file__", None) or ""
+        if module_file.startswith(project_dir + os.sep):
+            del sys.modules[name]
+
+
+def apply_project(
+    project_dir: Union[str, Path], config_set: List[Dict[str, Any]], cache: bool = False
+) -> Dict[str, Any]:
+    """
+    Apply the configurations to the project, using static resolution and verification.
+
+    Django is never initialized, thus many projects can be processed by the same process; the project modules
+    imported to resolve the files paths are unloaded afterwards. ``DJANGO_SETTINGS_MODULE`` environment variable is
+    ignored, as it can't be valid for all the projects.
+
+    The result is a dict with the following keys:
+
+    * ``project``: project directory
+    * ``settings`` / ``urlconf``: project files status (see :py:func:`app_enabler.patcher.write_file`)
+    * ``verified``: verification result for each configuration
+    * ``error``: error message if the configurations can't be applied, ``None`` otherwise
+    * ``elapsed``: processing time in seconds
+
+    :param str project_dir: project directory, containing ``manage.py``
+    :param list config_set: list of addon configurations
+    :param bool cache: Use the project cache for parsed files and resolved paths
+    :return: project result
+    """
+    start = time.perf_counter()
+    project_dir = os.path.abspath(project_dir)
+    result = {"project": project_dir, "settings": None, "urlconf": None, "verified": [], "error": None}
+    project_cache = ProjectCache(project_dir) if cache else None
+    environ_settings = os.environ.pop("DJANGO_SETTINGS_MODULE", None)
+    sys.path.insert(0, project_dir)
+    try:
+        project_files = get_project_paths_static(os.path.join(project_dir, "manage.py"), project_cache)
+        if not project_files:
+            result["error"] = "settings and urlconf files can't be resolved statically"
+        else:
+            setting_file, urlconf_file = project_files
+            with project_lock(project_dir):
+                parsed_settings, result["settings"] = patch_file_set(
+                    setting_file, patch_setting, config_set, project_cache
+                )
+                parsed_urlconf, result["urlconf"] = patch_file_set(
+                    urlconf_file, patch_urlconf, config_set, project_cache
+                )
+                result["verified"] = verify_patched_static_set(parsed_settings, parsed_urlconf, config_set)
+    except Exception as e:
+        # errors in a project must not stop the processing of the others
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        if environ_settings is not None:
+            os.environ["DJANGO_SETTINGS_MODULE"] = environ_settings
+        sys.path.remove(project_dir)
+        _unload_project_modules(project_dir)
+    result["elapsed"] = time.perf_counter() - start
+    return result
+
+
+def apply_fleet(
+    projects: Iterable[Union[str, Path]],
+    config_set: List[Dict[str, Any]],
+    workers: Optional[int] = None,
+    cache: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Apply the configurations to many projects in parallel worker processes.
+
+    See :py:func:`apply_project` for the details of each project processing and result.
+
+    :param list projects: projects directories
+    :param list config_set: list of addon configurations
+    :param int workers: number of worker processes, defaults to the number of CPUs
+    :param bool cache: Use the project cache for parsed files and resolved paths
+    :return: projects results, in the same order as the projects
+    """
+    projects = list(projects)
+    if not projects:
+        return []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(partial(apply_project, config_set=config_set, cache=cache), projects))
@@ -1,15 +1,39 @@
+import contextlib
+import hashlib
 import logging
+import re
+import shutil
 import subprocess
 import sys
-from typing import Optional
+import tempfile
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
 
-import pkg_resources
-from pkg_resources import Requirement
+from .errors import messages
+from .profiling import phase
+
+#: PEP-508 distribution name at the start of the requirement string
+REQUIREMENT_NAME = re.compile(r"^\s*([A-Z0-9](?:[A-Z0-9._-]*[A-Z0-9])?)", re.IGNORECASE)
+
+#: name of the file where the hashes of the wheels stored in the wheelhouse are recorded
+WHEELHOUSE_INDEX = "SHA256SUMS"
+
+#: number of pip output lines reported in case of installation errors
+OUTPUT_TAIL = 20
+
+#: nested requirements file line, in any of the ``-r file``, ``-rfile``, ``--requirement file`` and
+#: ``--requirement=file`` forms
+REQUIREMENT_FILE = re.compile(r"^(?:-r\s*|--requirement(?:=|\s+))(?P<path>\S.*)$")
+
+#: pip output reporting that the requirements can't be resolved against the available distributions
+MISSING_DISTRIBUTION = re.compile(r"No matching distribution found|ResolutionImpossible")
 
 logger = logging.getLogger("")
 
 
-def install(package: str, verbose: bool = False, pip_options: str = ""):
+def install(package: str, verbose: bool = False, pip_options: str = "", log_file: Optional[str] = None):
     """
     Install the package.
 
@@ -18,41 +42,364 @@ def install(package: str, verbose: bool = False, pip_options: str = ""):
     :param str package: Package name
     :param bool verbose: Verbose output
     :param str pip_options: Additional options passed to pip
+    :param str log_file: Path of the file where pip output is written
     """
-    args = ["install", "--disable-pip-version-check"]
+    return install_packages([package], verbose=verbose, pip_options=pip_options, log_file=log_file)
+
+
+def _get_pip_command(
+    command: str,
+    packages: Iterable[str],
+    verbose: bool = False,
+    pip_options: str = "",
+    requirements: Iterable[str] = (),
+    extra_options: Iterable[str] = (),
+) -> List[str]:
+    """Build the pip command line."""
+    args = [command, "--disable-pip-version-check"]
     if not verbose:
         args.append("-q")
     if pip_options:
         args.extend([opt for opt in pip_options.split(" ") if opt])
-    args.append(package)
-    cmd = [sys.executable, "-mpip"] + args
+    args.extend(extra_options)
+    for requirements_file in requirements:
+        args.extend(["-r", str(requirements_file)])
+    args.extend(packages)
+    return [sys.executable, "-mpip"] + args
+
+
+def install_packages(
+    packages: Iterable[str],
+    verbose: bool = False,
+    pip_options: str = "",
+    requirements: Iterable[str] = (),
+    log_file: Optional[str] = None,
+    wheelhouse: Optional[str] = None,
+    dry_run: bool = False,
+):
+    """
+    Install the packages with a single pip invocation, thus resolving their dependencies together.
+
+    If ``wheelhouse`` is given, packages are installed offline from the wheels stored in it; missing wheels are built
+    (or downloaded) by pip and stored in the wheelhouse before installing (see :py:func:`build_wheels`).
+
+    :param list packages: Packages names (or rather their requirement strings)
+    :param bool verbose: Verbose output
+    :param str pip_options: Additional options passed to pip
+    :param list requirements: Paths to requirements files
+    :param str log_file: Path of the file where pip output is written
+    :param str wheelhouse: Path of the wheels directory
+    :param bool dry_run: Only report what would be installed; wheels are not built in the wheelhouse
+    """
+    extra_options = ["--dry-run"] if dry_run else []
+    if wheelhouse:
+        Path(wheelhouse).mkdir(parents=True, exist_ok=True)
+        extra_options.extend(["--no-index", "--find-links", str(wheelhouse)])
+        if not dry_run and not _wheelhouse_provides(packages, pip_options, requirements, extra_options):
+            build_wheels(
+                packages,
+                wheelhouse,
+                verbose=verbose,
+                pip_options=pip_options,
+                requirements=requirements,
+                log_file=log_file,
+            )
+    cmd = _get_pip_command("install", packages, verbose, pip_options, requirements, extra_options)
     if verbose:
         sys.stdout.write("python path: {}\n".format(sys.executable))
         sys.stdout.write("packages install command: {}\n".format(" ".join(cmd)))
     try:
-        output = subprocess.check_output(cmd, stderr=subprocess.STDOUT)
-        sys.stdout.write(output.decode("utf-8"))
+        run_pip(cmd, verbose=verbose, log_file=log_file)
         return True
-    except subprocess.CalledProcessError as e:  # pragma: no cover
+    except subprocess.CalledProcessError as e:
         logger.error("cmd : {} :{}".format(e.cmd, e.output))
         raise
 
 
+def _wheelhouse_provides(
+    packages: Iterable[str], pip_options: str, requirements: Iterable[str], extra_options: Iterable[str]
+) -> bool:
+    """
+    Check if the packages can be installed offline by resolving them against the wheelhouse without installing.
+
+    :raise subprocess.CalledProcessError: if pip fails for any other reason than missing distributions, ``output``
+        contains the output tail
+    """
+    cmd = _get_pip_command(
+        "install", packages, False, pip_options, requirements, ["--dry-run", "--ignore-installed", *extra_options]
+    )
+    result = subprocess.run(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+        check=False,
+    )
+    if result.returncode and not MISSING_DISTRIBUTION.search(result.stdout):
+        tail = result.stdout.splitlines(keepends=True)[-OUTPUT_TAIL:]
+        raise subprocess.CalledProcessError(result.returncode, cmd, output="".join(tail))
+    return result.returncode == 0
+
+
+def build_wheels(
+    packages: Iterable[str],
+    wheelhouse: Union[str, Path],
+    verbose: bool = False,
+    pip_options: str = "",
+    requirements: Iterable[str] = (),
+    log_file: Optional[str] = None,
+) -> List[Path]:
+    """
+    Build (or download) the wheels of the packages and their dependencies and store them in the wheelhouse.
+
+    Wheels already in the wheelhouse are reused by pip; new wheels are stored by :py:func:`store_wheels`.
+
+    :param list packages: Packages names (or rather their requirement strings)
+    :param str wheelhouse: Path of the wheels directory
+    :param bool verbose: Verbose output
+    :param str pip_options: Additional options passed to pip
+    :param list requirements: Paths to requirements files
+    :param str log_file: Path of the file where pip output is written
+    :return: paths of the wheels stored in the wheelhouse
+    """
+    wheelhouse = Path(wheelhouse)
+    wheelhouse.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory() as build_dir:
+        extra_options = ["--wheel-dir", build_dir, "--find-links", str(wheelhouse)]
+        cmd = _get_pip_command("wheel", packages, verbose, pip_options, requirements, extra_options)
+        if verbose:
+            sys.stdout.write("wheels build command: {}\n".format(" ".join(cmd)))
+        run_pip(cmd, verbose=verbose, log_file=log_file)
+        return store_wheels(Path(build_dir).glob("*.whl"), wheelhouse)
+
+
+def store_wheels(wheels: Iterable[Path], wheelhouse: Path) -> List[Path]:
+    """
+    Store the wheels in the wheelhouse.
+
+    Wheels are stored flat, as required by pip ``--find-links``, and their sha256 hash is recorded in the
+    :py:data:`WHEELHOUSE_INDEX` file, so that identical wheels are never copied twice and a wheel already stored
+    under the same name is never replaced by a different build.
+
+    :param list wheels: paths of the wheels to store
+    :param Path wheelhouse: Path of the wheels directory
+    :return: paths of the wheels stored in the wheelhouse
+    """
+    index_file = wheelhouse / WHEELHOUSE_INDEX
+    try:
+        index = dict(line.split("  ", 1)[::-1] for line in index_file.read_text().splitlines() if line)
+    except OSError:
+        index = {}
+    stored = []
+    for wheel in wheels:
+        target = wheelhouse / wheel.name
+        digest = hashlib.sha256(wheel.read_bytes()).hexdigest()
+        if target.name not in index or not target.exists():
+            shutil.copyfile(wheel, target)
+            index[target.name] = digest
+        elif index[target.name] != digest:
+            logger.warning("wheel {} already stored with a different hash, keeping the stored one".format(target.name))
+        stored.append(target)
+    index_file.write_text("".join("{}  {}\n".format(digest, name) for name, digest in sorted(index.items())))
+    return stored
+
+
+def run_pip(cmd: List[str], verbose: bool = False, log_file: Optional[str] = None):
+    """
+    Run the pip command streaming its output line by line.
+
+    Output is written to stdout (prefixed by the elapsed time in verbose mode) and appended to the log file if given;
+    the last :py:data:`OUTPUT_TAIL` lines are kept to be reported in case of errors.
+
+    :param list cmd: pip command
+    :param bool verbose: Verbose output
+    :param str log_file: Path of the file where pip output is written
+    :raise subprocess.CalledProcessError: if pip exits with an error, ``output`` contains the output tail
+    """
+    tail = deque(maxlen=OUTPUT_TAIL)
+    start = time.monotonic()
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(phase("pip"))
+        log = stack.enter_context(open(log_file, "a", encoding="utf-8")) if log_file else None
+        process = stack.enter_context(
+            subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                bufsize=1,
+            )
+        )
+        for line in process.stdout:
+            tail.append(line)
+            if log:
+                log.write(line)
+            if verbose:
+                sys.stdout.write("[{:7.1f}s] {}".format(time.monotonic() - start, line))
+            else:
+                sys.stdout.write(line)
+            sys.stdout.flush()
+        returncode = process.wait()
+    if verbose:
+        sys.stdout.write("pip completed in {:.1f}s\n".format(time.monotonic() - start))
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, cmd, output="".join(tail))
+
+
+def read_requirements(path: Union[str, Path]) -> List[str]:
+    """
+    Read the requirement strings from a pip requirements file.
+
+    Nested requirements files are followed, while options, editable and plain URL requirements are skipped as their
+    package name is not known before installing them.
+
+    :param str path: requirements file path
+    :return: requirement strings
+    """
+    path = Path(path)
+    requirements = []
+    for line in path.read_text().splitlines():
+        line = line.split(" #", 1)[0].strip()
+        nested = REQUIREMENT_FILE.match(line)
+        if nested:
+            requirements.extend(read_requirements(path.parent / nested.group("path")))
+        elif line and not line.startswith(("#", "-")) and ("://" not in line or "@" in line.split("://", 1)[0]):
+            requirements.append(line)
+    return requirements
+
+
+def get_requirement_strings(packages: Iterable[str], requirements: Iterable[str] = ()) -> List[str]:
+    """
+    Get the requirement strings of the packages and of the requirements files, in order.
+
+    :param list packages: Packages names (or rather their requirement strings)
+    :param list requirements: Paths to requirements files
+    :return: requirement strings
+    """
+    return [*packages, *(item for path in requirements for item in read_requirements(path))]
+
+
+def plan_install(
+    packages: Iterable[str],
+    verbose: bool = False,
+    pip_options: str = "",
+    requirements: Iterable[str] = (),
+    wheelhouse: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Report the packages pip would install and load the addon configurations of the already installed ones.
+
+    Nothing is installed; pip errors and the packages which can't be enabled are reported to stderr.
+
+    :param list packages: Packages names (or rather their requirement strings)
+    :param bool verbose: Verbose output
+    :param str pip_options: Additional options passed to pip
+    :param list requirements: Paths to requirements files
+    :param str wheelhouse: Path of the wheels directory
+    :return: addon configurations of the installed packages
+    """
+    from .django import load_addon
+
+    try:
+        install_packages(
+            packages,
+            verbose=verbose,
+            pip_options=pip_options,
+            requirements=requirements,
+            wheelhouse=wheelhouse,
+            dry_run=True,
+        )
+    except subprocess.CalledProcessError as e:
+        sys.stderr.write(messages["install_error_output"].format(message="pip", output=e.output or ""))
+    config_set = []
+    for package in get_requirement_strings(packages, requirements):
+        application = get_application_from_package(package)
+        application_config = load_addon(application) if application else None
+        if application_config:
+            config_set.append(application_config)
+        else:
+            sys.stderr.write(messages["enable_error"].format(package=package))
+    return config_set
+
+
+def install_and_enable_packages(
+    packages: Iterable[str],
+    verbose: bool = False,
+    pip_options: str = "",
+    requirements: Iterable[str] = (),
+    log_file: Optional[str] = None,
+    wheelhouse: Optional[str] = None,
+    **enable_options,
+) -> List[str]:
+    """
+    Install the packages with a single pip invocation and enable them in a single batch.
+
+    See :py:func:`install_packages` and :py:func:`app_enabler.enable.enable_applications`.
+
+    :param list packages: Packages names (or rather their requirement strings)
+    :param bool verbose: Verbose output
+    :param str pip_options: Additional options passed to pip
+    :param list requirements: Paths to requirements files
+    :param str log_file: Path of the file where pip output is written
+    :param str wheelhouse: Path of the wheels directory
+    :param enable_options: :py:func:`app_enabler.enable.enable_applications` options
+    :return: error messages of the packages that have not been installed or enabled
+    """
+    from .enable import enable_applications
+
+    requirement_strings = get_requirement_strings(packages, requirements)
+    try:
+        install_packages(
+            packages,
+            verbose=verbose,
+            pip_options=pip_options,
+            requirements=requirements,
+            log_file=log_file,
+            wheelhouse=wheelhouse,
+        )
+    except subprocess.CalledProcessError as e:
+        msg = messages["install_error"].format(package=", ".join(requirement_strings))
+        if e.output:
+            msg = messages["install_error_output"].format(message=msg, output=e.output)
+        return [msg]
+    applications = []
+    errors = []
+    for package in requirement_strings:
+        application = get_application_from_package(package)
+        if application:
+            applications.append(application)
+        else:
+            errors.append(messages["enable_error"].format(package=package))
+    if applications:
+        enable_applications(applications, verbose=verbose, **enable_options)
+    return errors
+
+
 def get_application_from_package(package: str) -> Optional[str]:
     """
-    Detect the first in alphabetical order module provided by a package.
+    Detect the main module provided by a package.
 
-    This approach is a bit simplistic, but as we only need this to get the ``addon.json`` file specified by this
-    package, we can easily enforce this restriction.
+    The main module is the first module providing an ``addon.json`` file or, if none does, the first module listed in
+    the package metadata.
+
+    Package is looked up in the installed addons index (see :py:func:`app_enabler.addons.get_addons_index`).
 
     :param str package: package name (or rather its requirement string). It can be anything complying with PEP508
     :return: main (first) module name; if ``None``, package is not available in the current virtualenv
     """
-    try:
-        distribution = pkg_resources.get_distribution(Requirement.parse(package))
-    except pkg_resources.DistributionNotFound:
+    from .addons import get_distribution_entry
+
+    match = REQUIREMENT_NAME.match(package)
+    if not match:
+        return
+    entry = get_distribution_entry(match.group(1))
+    if not entry:
         return
     try:
-        return distribution.get_metadata("top_level.txt").split()[0]
-    except (FileNotFoundError, IndexError):  # pragma: no cover
+        return next(iter(entry["addons"]), None) or entry["modules"][0]
+    except IndexError:  # pragma: no cover
         return
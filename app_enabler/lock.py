@@ -0,0 +1,77 @@
+import contextlib
+import os
+import time
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+from .cache import CACHE_DIR, get_cache_dir
+from .errors import LockTimeoutError, messages
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # advisory locking is not available (e.g.: on Windows), projects are not locked
+    fcntl = None
+
+#: path of the lock file, created in the (git ignored) cache directory of the project root
+LOCK_FILE = f"{CACHE_DIR}/project.lock"
+
+#: default seconds waited for the project lock held by another process
+LOCK_TIMEOUT = 60.0
+
+#: seconds between attempts to acquire the project lock
+POLL_INTERVAL = 0.05
+
+_timeout = LOCK_TIMEOUT
+
+
+def set_lock_timeout(timeout: float):
+    """
+    Set the seconds waited for the project lock by :py:func:`project_lock` when not given explicitly.
+
+    :param float timeout: seconds to wait, ``0`` to fail immediately if the project is locked
+    """
+    global _timeout
+    _timeout = timeout
+
+
+@contextlib.contextmanager
+def project_lock(root: Union[str, Path] = ".", timeout: Optional[float] = None) -> Iterator[None]:
+    """
+    Hold the project lock while reading, patching, writing and verifying the project files.
+
+    The lock is an advisory ``fcntl.flock`` exclusive lock on :py:data:`LOCK_FILE`, in the git ignored cache
+    directory of the project root (next to ``manage.py``), thus concurrent ``django-app-enabler`` processes on the
+    same project are serialized instead of overwriting each other changes. Lock is released by the operating system
+    if the process dies.
+
+    Where ``fcntl`` is not available the project is not locked.
+
+    :param str root: project root directory
+    :param float timeout: seconds to wait for the lock held by another process, defaults to the value set by
+                          :py:func:`set_lock_timeout`
+    :raise LockTimeoutError: if the lock is not acquired before the timeout
+    """
+    if fcntl is None:  # pragma: no cover
+        yield
+        return
+    timeout = _timeout if timeout is None else timeout
+    path = Path(root) / LOCK_FILE
+    get_cache_dir(root)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    raise LockTimeoutError(messages["lock_timeout"].format(path=path, timeout=timeout))
+                time.sleep(min(POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    finally:
+        os.close(fd)
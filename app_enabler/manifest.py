@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Union
+
+from . import __version__
+from .cache import CACHE_DIR, content_hash, get_cache_dir
+
+#: path of the manifest file, created in the (git ignored) cache directory of the project root
+MANIFEST_FILE = f"{CACHE_DIR}/manifest.json"
+
+
+def configuration_hash(application_config: Dict[str, Any]) -> str:
+    """Compute the hash of the addon configuration content."""
+    return hashlib.sha256(json.dumps(application_config, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _file_hash(path: Union[str, Path]) -> Optional[str]:
+    """Compute the hash of the file content, ``None`` if the file can't be read."""
+    try:
+        return content_hash(Path(path).read_bytes())
+    except OSError:
+        return None
+
+
+class ApplyManifest:
+    """
+    Record of the addon configurations applied to the project.
+
+    The manifest stores the hashes of the configurations applied by the last run, in order, together with the paths
+    and the content hashes of the settings and urlconf files resulting from their application: as long as the files
+    are unchanged, applying the same configurations again would not change them, thus the whole apply cycle can be
+    skipped. Any other set of configurations is applied, as it may override values set by the recorded ones.
+
+    The manifest is invalidated when the files are changed by anything else, when the ``DJANGO_SETTINGS_MODULE``
+    environment variable changes or when a different ``django-app-enabler`` version is used.
+    """
+
+    def __init__(self, root: Union[str, Path] = "."):
+        self.root = Path(root)
+        self.path = self.root / MANIFEST_FILE
+        # django setup may set the variable from manage.py, thus it's read before applying the configurations
+        self.settings_module = os.environ.get("DJANGO_SETTINGS_MODULE")
+        self.reload()
+
+    def reload(self):
+        """
+        Load the manifest again and check it against the current project files.
+
+        It must be called while holding the project lock (see :py:func:`app_enabler.lock.project_lock`) before relying
+        on :py:meth:`is_applied`, as other processes may have changed the files since the manifest has been loaded.
+        """
+        self.data = self._load()
+        self.fresh = self._files_match()
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("version") != __version__:
+            return {}
+        return data
+
+    def _files_match(self) -> bool:
+        """Check if the project files are unchanged since the manifest has been recorded."""
+        files = self.data.get("files")
+        if not files or self.data.get("settings_module") != self.settings_module:
+            return False
+        return all(_file_hash(self.root / file_path) == digest for file_path, digest in files.items())
+
+    def is_applied(self, config_set: Iterable[Dict[str, Any]]) -> bool:
+        """
+        Check if the configurations are the ones applied by the last run to the current project files.
+
+        :param list config_set: list of addon configurations
+        :return: ``True`` if applying the configurations would not change the project files
+        """
+        hashes = [configuration_hash(application_config) for application_config in config_set]
+        return self.fresh and hashes == self.data.get("configurations")
+
+    def record(self, setting_file: str, urlconf_file: str, config_set: Iterable[Dict[str, Any]]):
+        """
+        Record the configurations as the ones applied to the project files, replacing the recorded ones.
+
+        It must be called while holding the project lock.
+
+        :param str setting_file: project settings file path
+        :param str urlconf_file: project urlconf file path
+        :param list config_set: list of the applied (and verified) addon configurations
+        """
+        files = {}
+        for file_path in (setting_file, urlconf_file):
+            digest = _file_hash(file_path)
+            if digest is None:
+                return
+            files[os.path.relpath(file_path, self.root)] = digest
+        self.data = {
+            "version": __version__,
+            "settings_module": self.settings_module,
+            "files": files,
+            "configurations": [configuration_hash(application_config) for application_config in config_set],
+        }
+        self.fresh = True
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=get_cache_dir(self.root), prefix=self.path.name, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w") as fp:
+                    json.dump(self.data, fp, indent=2)
+                os.replace(temp_path, self.path)
+            except BaseException:
+                os.unlink(temp_path)
+                raise
+        except OSError:  # pragma: no cover
+            # manifest is an optimization, failing to write it must not break the execution
+            pass
@@ -1,15 +1,30 @@
 import ast
-import os  # noqa - used when eval'ing the management command
+import copy
+import difflib
+import functools
+import io
+import marshal
+import math
+import os
+import pickle
+import shutil
 import sys
+import tempfile
+import tokenize
+import weakref
 from types import CodeType
-from typing import Any, Dict, Iterable, List, Optional, Union
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
 import astor
 
-from .errors import messages
+from .cache import ProjectCache, content_hash
+from .errors import ConfigurationError, messages
+from .profiling import phase
+from .schema import LIST_ITEM_SCHEMA, compile_schema
+from .source import splice_source
 
 
-def setup_django():
+def setup_django(cache: Optional[ProjectCache] = None):
     """
     Initialize the django environment by leveraging ``manage.py``.
 
@@ -20,27 +35,43 @@ def setup_django():
     Django runtime behavior.
 
     Manage.py is monkeypatched in memory to remove the call "execute_from_command_line" and executed from memory.
+
+    :param ProjectCache cache: cache for the patched ``manage.py`` code
     """
     import django
 
     try:
-        managed_command = monkeypatch_manage("manage.py")
-        eval(managed_command)
-        django.setup()
+        with phase("monkeypatch_manage"):
+            managed_command = monkeypatch_manage("manage.py", cache)
+            eval(managed_command)
+        with phase("django.setup"):
+            django.setup()
     except FileNotFoundError:
         sys.stderr.write(messages["no_managepy"])
         sys.exit(1)
 
 
-def monkeypatch_manage(manage_file: str) -> CodeType:
+def monkeypatch_manage(manage_file: str, cache: Optional[ProjectCache] = None) -> CodeType:
     """
     Patch ``manage.py`` to be executable without actually running any command.
 
     By using ast we remove the ``execute_from_command_line`` call and add an unconditional call to the main function.
 
     :param str manage_file: path to manage.py file
+    :param ProjectCache cache: cache for the patched code
     :return: patched manage.py code
     """
+    if cache:
+        cached = cache.get("manage", manage_file)
+        if cached:
+            return marshal.loads(cached)
+    patched = _monkeypatch_manage(manage_file)
+    if cache:
+        cache.set("manage", manage_file, marshal.dumps(patched))
+    return patched
+
+
+def _monkeypatch_manage(manage_file: str) -> CodeType:
     parsed = astor.parse_file(manage_file)
     # first patch run replace __name__ != '__main__' with a function call
     modified = DisableExecute().visit(parsed)
@@ -80,14 +111,52 @@ def _ast_get_constant_value(ast_obj: Union[ast.Constant, ast.Str, ast.Num]) -> A
         return ast_obj.s
 
 
+#: key to index maps of the ast Dict objects, see :py:func:`_ast_dict_keys_map`
+_dict_keys_maps: "weakref.WeakKeyDictionary[ast.Dict, Tuple[List, int, Dict[Any, int]]]" = weakref.WeakKeyDictionary()
+
+
+def _ast_dict_keys_map(dict_object: ast.Dict) -> Dict[Any, int]:
+    """
+    Get the key to index map of the ast Dict object.
+
+    Map is cached and it's rebuilt only if the dict keys are changed without using :py:func:`_ast_dict_set`.
+    """
+    try:
+        keys, length, keys_map = _dict_keys_maps[dict_object]
+        if keys is dict_object.keys and length == len(keys):
+            return keys_map
+    except KeyError:
+        pass
+    keys_map = {}
+    for position, dict_key in enumerate(dict_object.keys):
+        # dict unpacking (``**other``) has no key
+        if dict_key is not None:
+            keys_map.setdefault(_ast_get_constant_value(dict_key), position)
+    _dict_keys_maps[dict_object] = (dict_object.keys, len(dict_object.keys), keys_map)
+    return keys_map
+
+
 def _ast_dict_key_index(dict_object: ast.Dict, lookup_key: str) -> Optional[int]:
     """Get the index of the lookup key in the ast Dict object."""
     try:
-        return [_ast_get_constant_value(dict_key) for dict_key in dict_object.keys].index(lookup_key)
-    except ValueError:
+        return _ast_dict_keys_map(dict_object).get(lookup_key)
+    except TypeError:
         return None
 
 
+def _ast_dict_set(dict_object: ast.Dict, key: Any, value: Any):
+    """Set the value of the key in the ast Dict object, replacing the existing one or appending it."""
+    keys_map = _ast_dict_keys_map(dict_object)
+    ast_position = keys_map.get(key)
+    if ast_position is None:
+        dict_object.keys.append(_ast_get_object_from_value(key))
+        dict_object.values.append(_ast_get_object_from_value(value))
+        keys_map[key] = len(dict_object.keys) - 1
+        _dict_keys_maps[dict_object] = (dict_object.keys, len(dict_object.keys), keys_map)
+    else:
+        dict_object.values[ast_position] = _ast_get_object_from_value(value)
+
+
 def _ast_dict_lookup(dict_object: ast.Dict, lookup_key: str) -> Optional[Any]:
     """Get the value of the lookup key in the ast Dict object."""
     key_position = _ast_dict_key_index(dict_object, lookup_key)
@@ -96,16 +165,204 @@ def _ast_dict_lookup(dict_object: ast.Dict, lookup_key: str) -> Optional[Any]:
     return _ast_get_constant_value(dict_object.values[key_position])
 
 
-def _ast_get_object_from_value(val: Any) -> ast.Constant:
-    """Convert value to AST via :py:func:`ast.parse`."""
-    return ast.parse(repr(val)).body[0].value
+#: marker of the values which are not python literals, see :py:func:`_ast_literal`
+_NOT_LITERAL = object()
+
+
+def _ast_literal(node: ast.expr) -> Any:
+    """Get the value of the ast node if it's a python literal, :py:data:`_NOT_LITERAL` otherwise."""
+    try:
+        return ast.literal_eval(node)
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return _NOT_LITERAL
+
+
+@functools.lru_cache(maxsize=256)
+def _ast_parse_value(source: str) -> ast.expr:
+    """
+    Parse the python expression via :py:func:`ast.parse`, caching the result.
+
+    Location attributes are removed as the node is not part of the source it will be added to.
+    """
+    node = ast.parse(source).body[0].value
+    for child in ast.walk(node):
+        for attribute in child._attributes:
+            if hasattr(child, attribute):
+                delattr(child, attribute)
+    return node
+
+
+def _ast_get_object_from_value(val: Any) -> ast.expr:
+    """
+    Convert value to AST.
+
+    JSON compatible values (and tuples) are converted by directly building the corresponding AST nodes, any other
+    value is converted by parsing its ``repr``.
+    """
+    if val is None or isinstance(val, (str, bytes, bool, int)) or (isinstance(val, float) and math.isfinite(val)):
+        return ast.Constant(value=val)
+    elif isinstance(val, dict):
+        return ast.Dict(
+            keys=[_ast_get_object_from_value(key) for key in val],
+            values=[_ast_get_object_from_value(value) for value in val.values()],
+        )
+    elif isinstance(val, list):
+        return ast.List(elts=[_ast_get_object_from_value(item) for item in val], ctx=ast.Load())
+    elif isinstance(val, tuple):
+        return ast.Tuple(elts=[_ast_get_object_from_value(item) for item in val], ctx=ast.Load())
+    # parsed nodes are cached, so we must return a copy to avoid sharing nodes across the patched modules
+    return copy.deepcopy(_ast_parse_value(repr(val)))
+
+
+def _ast_get_urlpattern(pattern: str, urlconf: str) -> ast.Call:
+    """Build the AST of the ``path(pattern, include(urlconf))`` urlpattern."""
+    return ast.Call(
+        func=ast.Name(id="path", ctx=ast.Load()),
+        args=[
+            ast.Constant(value=pattern),
+            ast.Call(func=ast.Name(id="include", ctx=ast.Load()), args=[ast.Constant(value=urlconf)], keywords=[]),
+        ],
+        keywords=[],
+    )
+
+
+def _ast_get_included_urlconfs(urlpatterns: ast.List) -> List[str]:
+    """Get the dotted paths of the urlconfs included in the ast urlpatterns List object."""
+    existing_urlconf = []
+    for url_line in urlpatterns.elts:
+        # the following list comprehension matches path() / url() instances in urlpatterns
+        # using the `include()` statement as argument. ie.
+        # - matched: path('', include('cms.urls')
+        # - not matched: path('sitemap.xml', sitemap, {})
+        # we look for ast.Call (outer loop) wrapping ast.Str (inner loop),
+        # and we assume all is wrapped in ast.Call (as we cycle on url_line.args)
+        urlconf_path = [
+            subarg.s
+            for stmt in getattr(url_line, "args", [])
+            if isinstance(stmt, ast.Call)
+            for subarg in stmt.args
+            if isinstance(subarg, ast.Str)
+        ]
+        if urlconf_path:
+            existing_urlconf.extend(urlconf_path)
+    return existing_urlconf
+
+
+class _ListSettingIndex:
+    """
+    Value to position index of the items of an ast List setting.
+
+    Items can be indexed either by their literal value or, if ``key`` is provided, by the value of the ``key`` item
+    of each dictionary in the list.
+
+    Index is built once and kept in sync with insertions in the list (see :py:meth:`track`): appending items is O(1),
+    while items inserted in the middle of the list are recorded as shifts to be applied to the stored positions when
+    looking them up, until too many shifts are accumulated and the index is rebuilt.
+    """
+
+    #: number of recorded insertions after which the index is rebuilt
+    max_shifts = 32
+
+    def __init__(self, original_setting: List, key: Optional[str] = None):
+        self.original_setting = original_setting
+        self.key = key
+        self.has_values = False
+        self._rebuild()
+
+    def _flatten(self, item: ast.AST) -> Any:
+        if self.key:
+            return _ast_dict_lookup(item, self.key)
+        return _ast_get_constant_value(item)
+
+    def _rebuild(self):
+        self._positions = {}
+        self._shifts = []
+        for position, item in enumerate(self.original_setting):
+            value = self._flatten(item)
+            self.has_values = self.has_values or bool(value)
+            self._positions.setdefault(value, (position, 0))
+
+    def index(self, value: Any) -> Optional[int]:
+        """Get the position of the first item matching the value, ``None`` if not found."""
+        try:
+            position, generation = self._positions[value]
+        except (KeyError, TypeError):
+            return None
+        for shift in self._shifts[generation:]:
+            if position >= shift:
+                position += 1
+        return position
+
+    def __contains__(self, value: Any) -> bool:
+        return self.index(value) is not None
+
+    def track(self, position: int, item: ast.AST):
+        """
+        Record the insertion of the item at the given position.
+
+        Must be called after the item has been inserted in the list.
+        """
+        if position < len(self.original_setting) - 1:
+            self._shifts.append(position)
+            if len(self._shifts) > self.max_shifts:
+                self._rebuild()
+                return
+        value = self._flatten(item)
+        self.has_values = self.has_values or bool(value)
+        existing = self.index(value)
+        if existing is None or existing > position:
+            try:
+                self._positions[value] = (position, len(self._shifts))
+            except TypeError:  # pragma: no cover
+                pass
+
+
+#: validator of the dict items merged into an existing list setting
+_validate_list_item = compile_schema(LIST_ITEM_SCHEMA)
 
 
-def _update_list_setting(original_setting: List, configuration: Iterable):
-    for config_value in configuration:
+def _check_list_item(config_value: Dict[str, Any], path: str):
+    """
+    Validate the dict item merged into an existing list setting.
+
+    :param dict config_value: configuration item
+    :param str path: path of the item in the configuration, to prefix the error messages with
+    :raise ConfigurationError: if the item has not the ``value`` / ``position`` / ``next`` / ``key`` structure
+    """
+    errors = []
+    _validate_list_item(config_value, path, errors)
+    if errors:
+        raise ConfigurationError(errors)
+
+
+def _update_list_setting(
+    original_setting: List, configuration: Iterable, plan: Optional[List[Dict[str, Any]]] = None, setting: str = ""
+):
+    # indexes are created lazily (one for literal values and one for each lookup key) and reused for all the
+    # configuration items to avoid flattening the whole setting for each of them
+    indexes = {}
+
+    def get_index(key: Optional[str] = None) -> _ListSettingIndex:
+        if key not in indexes:
+            indexes[key] = _ListSettingIndex(original_setting, key)
+        return indexes[key]
+
+    def insert(position: int, value: Any):
+        length = len(original_setting)
+        # normalize the position according to list.insert semantics
+        position = min(max(length + position, 0) if position < 0 else position, length)
+        item = _ast_get_object_from_value(value)
+        original_setting.insert(position, item)
+        for index in indexes.values():
+            index.track(position, item)
+        _plan_list_insert(plan, setting, position, value)
+
+    path = "$.installed-apps" if setting == "INSTALLED_APPS" else f"$.settings.{setting}"
+    for item_index, config_value in enumerate(configuration):
         # configuration items can be either strings (which are appended) or dictionaries which contains information
         # about the position of the item
         if isinstance(config_value, dict):
+            _check_list_item(config_value, f"{path}[{item_index}]")
             value = config_value.get("value", None)
             position = config_value.get("position", None)
             relative_item = config_value.get("next", None)
@@ -114,36 +371,210 @@ def _update_list_setting(original_setting: List, configuration: Iterable):
                 # if the item is already existing, we skip its insertion
                 position = None
                 if key:
-                    # if the match is against a key we must both flatted the original setting to a list of literals
-                    # extracting the key value and getting the key value for the setting we want to add
-                    flattened_data = [_ast_dict_lookup(item, key) for item in original_setting]
+                    # if the match is against a key we must both index the original setting by the key value
+                    # and get the key value for the setting we want to add
+                    index = get_index(key)
                     check_value = value.get(key, None)
                 else:
-                    flattened_data = [_ast_get_constant_value(item) for item in original_setting]
+                    index = get_index()
                     check_value = value
-                if any(flattened_data) and check_value not in flattened_data:
-                    try:
-                        position = flattened_data.index(relative_item)
-                    except ValueError:
+                if index.has_values and check_value not in index:
+                    position = index.index(relative_item)
+                    if position is None:
                         # in case the relative item is not found we add the value on top
                         position = 0
             if position is not None:
-                original_setting.insert(position, _ast_get_object_from_value(value))
+                insert(position, value)
         else:
-            if config_value not in [_ast_get_constant_value(item) for item in original_setting]:
-                original_setting.append(_ast_get_object_from_value(config_value))
+            if config_value not in get_index():
+                insert(len(original_setting), config_value)
+
+
+#: original source, encoding and pickled original module of the parsed modules, see :py:func:`parse_file`
+_original_sources: "weakref.WeakKeyDictionary[ast.Module, Tuple[str, str, Optional[bytes]]]" = (
+    weakref.WeakKeyDictionary()
+)
 
 
-def update_setting(project_setting: str, config: Dict[str, Any]):
+def parse_file(path: str, cache: Optional[ProjectCache] = None) -> ast.Module:
     """
-    Patch the settings module to include addon settings.
+    Parse the given python file.
 
-    Original file is overwritten. As file is patched using AST, original comments and file structure is lost.
+    Original source is retained to render the patched module by only changing the patched parts, see
+    :py:func:`get_patched_source`; when caching, the pickled module stored in the cache is retained as well, to get
+    the original module back without parsing the source again.
 
-    :param str project_setting: project settings file path
+    :param str path: python file path
+    :param ProjectCache cache: cache for the parsed module
+    :return: parsed module
+    """
+    with phase("parse"):
+        cached = cache.get("module", path) if cache else None
+        if cached:
+            source, encoding, pickled = cached
+            parsed = pickle.loads(pickled)
+        else:
+            # file is stat'ed before reading it, so that any later change invalidates the cache
+            stat = os.stat(path)
+            with open(path, "rb") as fp:
+                content = fp.read()
+            encoding, __ = tokenize.detect_encoding(io.BytesIO(content).readline)
+            # newlines are not translated to keep the original ones when writing the file
+            source = content.decode(encoding)
+            parsed = ast.parse(source, filename=str(path))
+            pickled = None
+            if cache:
+                pickled = pickle.dumps(parsed, protocol=pickle.HIGHEST_PROTOCOL)
+                fingerprints = {os.path.abspath(path): (stat.st_size, stat.st_mtime_ns, content_hash(content))}
+                cache.set("module", path, (source, encoding, pickled), fingerprints=fingerprints)
+    _original_sources[parsed] = (source, encoding, pickled)
+    return parsed
+
+
+def get_patched_source(parsed: ast.Module) -> str:
+    """
+    Render the patched module as python source.
+
+    If the module has been parsed with :py:func:`parse_file`, only the changed parts of the original source are
+    rewritten and the rest of the file (comments included) is kept as is.
+
+    :param ast.Module parsed: patched module
+    :return: python source
+    """
+    with phase("generate"):
+        try:
+            source, __, pickled = _original_sources[parsed]
+        except KeyError:
+            return astor.to_source(parsed)
+        original = pickle.loads(pickled) if pickled else None
+        return splice_source(source, parsed, original)
+
+
+#: file status after :py:func:`write_file`: file content is not changed, file is not written
+FILE_UNCHANGED = "unchanged"
+#: file status after :py:func:`write_file`: file content is changed
+FILE_MODIFIED = "modified"
+#: file status after :py:func:`write_file`: file did not exist
+FILE_CREATED = "created"
+
+
+def write_file(path: str, parsed: ast.Module) -> str:
+    """
+    Write the given module to file.
+
+    Only the patched parts of the file are changed (see :py:func:`get_patched_source`).
+
+    File is not written if its content would not change, to avoid touching it (and triggering file watchers, like
+    Django autoreloader); otherwise it's atomically replaced with the new content.
+
+    :param str path: python file path
+    :param ast.Module parsed: module to write
+    :return: file status (one of :py:data:`FILE_UNCHANGED`, :py:data:`FILE_MODIFIED`, :py:data:`FILE_CREATED`)
+    """
+    src = get_patched_source(parsed)
+    encoding = _original_sources[parsed][1] if parsed in _original_sources else "utf-8"
+    content = src.encode(encoding)
+
+    with phase("write"):
+        try:
+            with open(path, "rb") as fp:
+                if fp.read() == content:
+                    return FILE_UNCHANGED
+            status = FILE_MODIFIED
+        except FileNotFoundError:
+            status = FILE_CREATED
+
+        directory, filename = os.path.split(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=f".{filename}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(content)
+            if status == FILE_MODIFIED:
+                shutil.copymode(path, temp_path)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return status
+
+
+def get_settings_values(parsed: ast.Module) -> Dict[str, Any]:
+    """
+    Extract the literal settings values from the parsed settings module.
+
+    Settings whose value is not a python literal (e.g.: ``os.path.join(...)``) are skipped.
+
+    :param ast.Module parsed: parsed project settings module
+    :return: settings values by name
+    """
+    values = {}
+    for node in parsed.body:
+        if isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name):
+            try:
+                values[node.targets[0].id] = ast.literal_eval(node.value)
+            except (ValueError, TypeError):
+                values.pop(node.targets[0].id, None)
+    return values
+
+
+def get_settings_module(parsed: ast.Module) -> Optional[str]:
+    """
+    Extract the ``DJANGO_SETTINGS_MODULE`` value set by the parsed ``manage.py`` module.
+
+    Both ``os.environ.setdefault("DJANGO_SETTINGS_MODULE", ...)`` and ``os.environ["DJANGO_SETTINGS_MODULE"] = ...``
+    are detected; as for the former the environment takes precedence, the current environment value is returned if set.
+
+    :param ast.Module parsed: parsed ``manage.py`` module
+    :return: settings module dotted path; if ``None``, no literal value is set in ``manage.py``
+    """
+    for node in ast.walk(parsed):
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr == "setdefault"
+            and len(node.args) == 2
+            and all(isinstance(arg, ast.Constant) for arg in node.args)
+            and node.args[0].value == "DJANGO_SETTINGS_MODULE"
+        ):
+            return os.environ.get("DJANGO_SETTINGS_MODULE") or node.args[1].value
+        if (
+            isinstance(node, ast.Assign)
+            and isinstance(node.targets[0], ast.Subscript)
+            and isinstance(node.targets[0].slice, ast.Constant)
+            and node.targets[0].slice.value == "DJANGO_SETTINGS_MODULE"
+            and isinstance(node.value, ast.Constant)
+        ):
+            return node.value.value
+    return None
+
+
+def get_urlconf_includes(parsed: ast.Module) -> Optional[List[str]]:
+    """
+    Extract the dotted paths of the urlconfs included in the parsed ``ROOT_URLCONF`` module.
+
+    :param ast.Module parsed: parsed project urlconf module
+    :return: included urlconfs; if ``None``, ``include`` is not imported from ``django.urls``
+    """
+    include_imported = False
+    included_urls = []
+    for node in parsed.body:
+        if isinstance(node, ast.ImportFrom) and node.module == "django.urls":
+            include_imported = include_imported or "include" in [alias.name for alias in node.names]
+        elif isinstance(node, ast.Assign) and node.targets[0].id == "urlpatterns" and isinstance(node.value, ast.List):
+            included_urls.extend(_ast_get_included_urlconfs(node.value))
+    if not include_imported:
+        return None
+    return included_urls
+
+
+def patch_setting(parsed: ast.Module, config: Dict[str, Any], plan: Optional[List[Dict[str, Any]]] = None):
+    """
+    Patch the parsed settings module in memory to include addon settings.
+
+    :param ast.Module parsed: parsed project settings module
     :param dict config: addon setting parameters
+    :param list plan: if given, the applied changes are recorded in it (see :py:func:`plan_update_set`)
     """
-    parsed = astor.parse_file(project_setting)
     existing_setting = []
     addon_settings = config.get("settings", {})
     addon_installed_apps = config.get("installed-apps", [])
@@ -151,77 +582,214 @@ def update_setting(project_setting: str, config: Dict[str, Any]):
 
     for node in parsed.body:
         if isinstance(node, ast.Assign) and node.targets[0].id == "INSTALLED_APPS":
-            _update_list_setting(node.value.elts, addon_installed_apps)
+            _update_list_setting(node.value.elts, addon_installed_apps, plan, "INSTALLED_APPS")
         elif isinstance(node, ast.Assign) and node.targets[0].id in addon_settings.keys():  # noqa
             config_param = addon_settings[node.targets[0].id]
             if isinstance(node.value, ast.List) and (
                 isinstance(config_param, list) or isinstance(config_param, tuple)
             ):
-                _update_list_setting(node.value.elts, config_param)
+                _update_list_setting(node.value.elts, config_param, plan, node.targets[0].id)
             elif isinstance(node.value, ast.Dict):
                 for dict_key, dict_value in config_param.items():
-                    ast_position = _ast_dict_key_index(node.value, dict_key)
-                    if ast_position is None:
-                        node.value.keys.append(_ast_get_object_from_value(dict_key))
-                        node.value.values.append(_ast_get_object_from_value(dict_value))
-                    else:
-                        node.value.values[ast_position] = _ast_get_object_from_value(dict_value)
-                pass
+                    key_position = _ast_dict_key_index(node.value, dict_key)
+                    if key_position is None or _ast_literal(node.value.values[key_position]) != dict_value:
+                        _plan_record(plan, PLAN_DICT_SET, setting=node.targets[0].id, key=dict_key, value=dict_value)
+                    _ast_dict_set(node.value, dict_key, dict_value)
             elif type(node.value) in constant_subclasses:
                 # check required as in python 3.6 / 3.7 ast.Str / ast.Num are not subclasses of ast.Constant
+                if _ast_literal(node.value) != config_param:
+                    _plan_record(plan, PLAN_SETTING_CHANGE, setting=node.targets[0].id, value=config_param)
                 node.value = _ast_get_object_from_value(config_param)
             existing_setting.append(node.targets[0].id)
     for name, value in addon_settings.items():
         if name not in existing_setting:
-            parsed.body.append(ast.Assign(targets=[ast.Name(id=name)], value=_ast_get_object_from_value(value)))
-
-    src = astor.to_source(parsed)
+            _plan_record(plan, PLAN_SETTING_ADD, setting=name, value=value)
+            parsed.body.append(
+                ast.Assign(targets=[ast.Name(id=name, ctx=ast.Store())], value=_ast_get_object_from_value(value))
+            )
 
-    with open(project_setting, "w") as fp:
-        fp.write(src)
 
-
-def update_urlconf(project_urls: str, config: Dict[str, Any]):
+def patch_urlconf(parsed: ast.Module, config: Dict[str, Any], plan: Optional[List[Dict[str, Any]]] = None):
     """
-    Patch the ``ROOT_URLCONF`` module to include addon url patterns.
+    Patch the parsed ``ROOT_URLCONF`` module in memory to include addon url patterns.
 
-    Original file is overwritten. As file is patched using AST, original comments and file structure is lost.
-
-    :param str project_urls: project urls.py file path
+    :param ast.Module parsed: parsed project urlconf module
     :param dict config: addon urlconf configuration
+    :param list plan: if given, the applied changes are recorded in it (see :py:func:`plan_update_set`)
     """
-    parsed = astor.parse_file(project_urls)
-
     addon_urls = config.get("urls", [])
     for node in parsed.body:
         if isinstance(node, ast.ImportFrom) and node.module == "django.urls":
             existing_names = [alias.name for alias in node.names]
             if "include" not in existing_names:
+                _plan_record(plan, PLAN_IMPORT_ADD, module="django.urls", name="include")
                 node.names.append(ast.alias(name="include", asname=None))
         elif isinstance(node, ast.Assign) and node.targets[0].id == "urlpatterns":
-            existing_urlconf = []
-            for url_line in node.value.elts:
-                # the following list comprehension matches path() / url() instances in urlpatterns
-                # using the `include()` statement as argument. ie.
-                # - matched: path('', include('cms.urls')
-                # - not matched: path('sitemap.xml', sitemap, {})
-                # we look for ast.Call (outer loop) wrapping ast.Str (inner loop),
-                # and we assume all is wrapped in ast.Call (as we cycle on url_line.args)
-                urlconf_path = [
-                    subarg.s
-                    for stmt in url_line.args
-                    if isinstance(stmt, ast.Call)
-                    for subarg in stmt.args
-                    if isinstance(subarg, ast.Str)
-                ]
-                if urlconf_path:
-                    existing_urlconf.extend(urlconf_path)
+            existing_urlconf = _ast_get_included_urlconfs(node.value)
             for pattern, urlconf in addon_urls:
                 if urlconf not in existing_urlconf:
-                    part = ast.parse(f"path('{pattern}', include('{urlconf}'))")
-                    node.value.elts.append(part.body[0].value)
+                    _plan_record(plan, PLAN_URLPATTERN_ADD, pattern=pattern, urlconf=urlconf)
+                    node.value.elts.append(_ast_get_urlpattern(pattern, urlconf))
 
-    src = astor.to_source(parsed)
 
-    with open(project_urls, "w") as fp:
-        fp.write(src)
+def update_setting(project_setting: str, config: Dict[str, Any], cache: Optional[ProjectCache] = None) -> str:
+    """
+    Patch the settings module to include addon settings.
+
+    Original file is overwritten, only the patched parts of the file are changed.
+
+    :param str project_setting: project settings file path
+    :param dict config: addon setting parameters
+    :param ProjectCache cache: cache for the parsed module
+    :return: file status (see :py:func:`write_file`)
+    """
+    return update_setting_set(project_setting, [config], cache)
+
+
+def update_setting_set(
+    project_setting: str, config_set: Iterable[Dict[str, Any]], cache: Optional[ProjectCache] = None
+) -> str:
+    """
+    Patch the settings module to include the settings of all the given addons.
+
+    Settings file is parsed and written only once, whatever the number of addon configurations.
+
+    :param str project_setting: project settings file path
+    :param list config_set: list of addon setting parameters
+    :param ProjectCache cache: cache for the parsed module
+    :return: file status (see :py:func:`write_file`)
+    """
+    return patch_file_set(project_setting, patch_setting, config_set, cache)[1]
+
+
+def update_urlconf(project_urls: str, config: Dict[str, Any], cache: Optional[ProjectCache] = None) -> str:
+    """
+    Patch the ``ROOT_URLCONF`` module to include addon url patterns.
+
+    Original file is overwritten, only the patched parts of the file are changed.
+
+    :param str project_urls: project urls.py file path
+    :param dict config: addon urlconf configuration
+    :param ProjectCache cache: cache for the parsed module
+    :return: file status (see :py:func:`write_file`)
+    """
+    return update_urlconf_set(project_urls, [config], cache)
+
+
+def update_urlconf_set(
+    project_urls: str, config_set: Iterable[Dict[str, Any]], cache: Optional[ProjectCache] = None
+) -> str:
+    """
+    Patch the ``ROOT_URLCONF`` module to include the url patterns of all the given addons.
+
+    Urlconf file is parsed and written only once, whatever the number of addon configurations.
+
+    :param str project_urls: project urls.py file path
+    :param list config_set: list of addon urlconf configurations
+    :param ProjectCache cache: cache for the parsed module
+    :return: file status (see :py:func:`write_file`)
+    """
+    return patch_file_set(project_urls, patch_urlconf, config_set, cache)[1]
+
+
+def patch_file_set(
+    project_file: str,
+    patcher: Callable[[ast.Module, Dict[str, Any]], None],
+    config_set: Iterable[Dict[str, Any]],
+    cache: Optional[ProjectCache] = None,
+) -> Tuple[ast.Module, str]:
+    """
+    Patch the project file with all the given addon configurations and write it.
+
+    File is parsed and written only once, whatever the number of addon configurations; the patched module is returned,
+    so that it can be verified without parsing the written file again.
+
+    :param str project_file: project settings or urlconf file path
+    :param callable patcher: either :py:func:`patch_setting` or :py:func:`patch_urlconf`
+    :param list config_set: list of addon configurations
+    :param ProjectCache cache: cache for the parsed module
+    :return: patched module and file status (see :py:func:`write_file`)
+    """
+    parsed = parse_file(project_file, cache)
+    with phase("patch"):
+        for config in config_set:
+            patcher(parsed, config)
+    return parsed, write_file(project_file, parsed)
+
+
+#: plan operation: setting added to the settings module
+PLAN_SETTING_ADD = "setting-add"
+#: plan operation: value of an existing setting changed
+PLAN_SETTING_CHANGE = "setting-change"
+#: plan operation: key of an existing dict setting set
+PLAN_DICT_SET = "dict-set"
+#: plan operation: item inserted in a list setting
+PLAN_LIST_INSERT = "list-insert"
+#: plan operation: name imported in the urlconf module
+PLAN_IMPORT_ADD = "import-add"
+#: plan operation: url pattern added to the urlconf module
+PLAN_URLPATTERN_ADD = "urlpattern-add"
+
+
+def _plan_record(plan: Optional[List[Dict[str, Any]]], operation: str, **details: Any):
+    """Record the operation in the plan, if any."""
+    if plan is not None:
+        plan.append({"operation": operation, **details})
+
+
+def _plan_list_insert(plan: Optional[List[Dict[str, Any]]], setting: str, position: int, value: Any):
+    """
+    Record the insertion of the value in the list setting in the plan, if any.
+
+    Positions of the items previously inserted in the same setting are shifted by the insertion, thus the recorded
+    positions are always the final positions of the items in the patched setting.
+    """
+    if plan is None:
+        return
+    for operation in plan:
+        if (
+            operation["operation"] == PLAN_LIST_INSERT
+            and operation["setting"] == setting
+            and operation["position"] >= position
+        ):
+            operation["position"] += 1
+    _plan_record(plan, PLAN_LIST_INSERT, setting=setting, position=position, value=value)
+
+
+def plan_update_set(
+    project_file: str,
+    patcher: Callable[[ast.Module, Dict[str, Any], Optional[List[Dict[str, Any]]]], None],
+    config_set: Iterable[Dict[str, Any]],
+    cache: Optional[ProjectCache] = None,
+) -> Dict[str, Any]:
+    """
+    Compute the changes the patcher would apply to the project file, without writing it.
+
+    The plan is a dict with the following keys:
+
+    * ``file``: project file path
+    * ``operations``: applied operations, each one described by a dict with the ``operation`` type (one of the
+      ``PLAN_*`` constants) and its details (e.g.: ``setting``, ``position`` and ``value`` for list insertions, where
+      ``position`` is the final position of the item in the patched setting)
+    * ``diff``: unified diff of the file content
+
+    :param str project_file: project settings or urlconf file path
+    :param callable patcher: either :py:func:`patch_setting` or :py:func:`patch_urlconf`
+    :param list config_set: list of addon configurations
+    :param ProjectCache cache: cache for the parsed module
+    :return: plan of the changes
+    """
+    parsed = parse_file(project_file, cache)
+    original = _original_sources[parsed][0]
+    operations = []
+    with phase("patch"):
+        for config in config_set:
+            patcher(parsed, config, operations)
+    patched = get_patched_source(parsed)
+    diff = difflib.unified_diff(
+        original.splitlines(keepends=True),
+        patched.splitlines(keepends=True),
+        fromfile=str(project_file),
+        tofile=str(project_file),
+    )
+    return {"file": str(project_file), "operations": operations, "diff": "".join(diff)}
@@ -0,0 +1,144 @@
+import importlib
+import queue
+import threading
+from subprocess import CalledProcessError
+from typing import Iterable, List, Optional, Union
+
+from .cache import ProjectCache
+from .django import load_addon
+from .enable import _get_manifest, _skip_applied, apply_configurations
+from .errors import messages
+from .install import get_application_from_package, install_packages
+from .manifest import ApplyManifest
+from .patcher import setup_django
+
+#: maximum number of installed packages waiting to be enabled before pip is paused
+QUEUE_SIZE = 2
+
+#: marker of the end of the installation queue
+_DONE = object()
+
+
+def _install_worker(packages: List[str], installed: queue.Queue, stop: threading.Event, **options):
+    """
+    Install the packages one by one, queueing the result of each installation.
+
+    Failed pip invocations are queued with the package; any other error stops the installation and it's queued
+    without package, to be raised by the consumer. The end of the queue is always marked with ``_DONE``.
+
+    :param list packages: Packages names (or rather their requirement strings)
+    :param queue.Queue installed: queue of the installed packages
+    :param threading.Event stop: event set by the consumer to stop the installation of the remaining packages
+    :param options: :py:func:`app_enabler.install.install_packages` options
+    """
+    try:
+        for package in packages:
+            if stop.is_set():
+                break
+            try:
+                install_packages([package], **options)
+                installed.put((package, None))
+            except CalledProcessError as e:
+                installed.put((package, e))
+    except Exception as e:
+        installed.put((None, e))
+    finally:
+        installed.put(_DONE)
+
+
+def install_and_enable(
+    packages: Iterable[str],
+    verbose: bool = False,
+    pip_options: str = "",
+    log_file: Optional[str] = None,
+    wheelhouse: Optional[str] = None,
+    static_verify: bool = False,
+    cache: bool = False,
+    static_resolve: bool = False,
+    manifest: Union[bool, ApplyManifest] = False,
+    queue_size: int = QUEUE_SIZE,
+) -> List[str]:
+    """
+    Install the packages one by one and enable them, overlapping pip with the enable work.
+
+    Packages are installed by pip in a background thread, while django is initialized and the addon configuration of
+    each installed package is loaded in the calling thread. Installed packages are passed through a bounded queue, thus
+    pip is paused if more than ``queue_size`` packages are waiting to be enabled.
+
+    Configurations are applied in a single batch (see :py:func:`app_enabler.enable.apply_configurations`) once all the
+    packages are installed, in the order the packages are given, regardless of the installation order; they are
+    skipped if the project manifest records them as already applied (see
+    :py:class:`app_enabler.manifest.ApplyManifest`).
+
+    Unlike :py:func:`app_enabler.install.install_packages`, packages dependencies are resolved separately, as each
+    package is installed by a separate pip invocation.
+
+    :param list packages: Packages names (or rather their requirement strings)
+    :param bool verbose: Verbose output
+    :param str pip_options: Additional options passed to pip
+    :param str log_file: Path of the file where pip output is written
+    :param str wheelhouse: Path of the wheels directory
+    :param bool static_verify: Verify the patched files without importing them
+    :param bool cache: Use the project cache for parsed files and resolved paths
+    :param bool static_resolve: Resolve the project settings and urlconf paths without initializing django
+    :param bool manifest: Record the applied configurations in the project manifest, or the manifest instance to use
+    :param int queue_size: maximum number of installed packages waiting to be enabled
+    :return: error messages of the packages that have not been installed or enabled
+    """
+    packages = list(packages)
+    # manifest is loaded before initializing django, which may set the settings module environment variable
+    project_manifest = _get_manifest(manifest)
+    installed = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    worker = threading.Thread(
+        target=_install_worker,
+        args=(packages, installed, stop),
+        kwargs={"verbose": verbose, "pip_options": pip_options, "log_file": log_file, "wheelhouse": wheelhouse},
+        daemon=True,
+    )
+    worker.start()
+    configs = {}
+    errors = {}
+    item = None
+    try:
+        if not static_verify:
+            # django is initialized while pip installs the first package
+            setup_django(ProjectCache() if cache else None)
+        while (item := installed.get()) is not _DONE:
+            package, error = item
+            if package is None:
+                raise error
+            if error:
+                errors[package] = messages["install_error"].format(package=package)
+                if error.output:
+                    errors[package] = messages["install_error_output"].format(
+                        message=errors[package], output=error.output
+                    )
+                continue
+            # the package modules have been created after the import system cached the directories content
+            importlib.invalidate_caches()
+            application = get_application_from_package(package)
+            if not application:
+                errors[package] = messages["enable_error"].format(package=package)
+                continue
+            application_config = load_addon(application)
+            if application_config:
+                configs[package] = application_config
+    finally:
+        # on errors the worker is stopped and the queue drained, as the worker may be blocked on the full queue
+        stop.set()
+        while item is not _DONE:
+            item = installed.get()
+        worker.join()
+
+    config_set = [configs[package] for package in packages if package in configs]
+    if not _skip_applied(config_set, project_manifest, verbose):
+        apply_configurations(
+            config_set,
+            verbose=verbose,
+            static_verify=static_verify,
+            cache=cache,
+            static_resolve=static_resolve,
+            manifest=project_manifest or False,
+        )
+    return [errors[package] for package in packages if package in errors]
@@ -0,0 +1,102 @@
+import contextlib
+import json
+import threading
+import time
+from typing import Any, ContextManager, Dict, Optional
+
+#: phases timings, by phase name: ``[calls, wall time, cpu time]``; ``None`` if profiling is disabled
+_timings: Optional[Dict[str, list]] = None
+
+_lock = threading.Lock()
+
+#: context manager used to skip timing when profiling is disabled
+_DISABLED = contextlib.nullcontext()
+
+
+class _Phase:
+    """Context manager recording the wall and CPU time spent in a phase."""
+
+    __slots__ = ("cpu", "name", "timing", "wall")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        with _lock:
+            # phases are listed in the order they are first entered
+            self.timing = _timings.setdefault(self.name, [0, 0.0, 0.0]) if _timings is not None else None
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+
+    def __exit__(self, *args):
+        cpu = time.process_time() - self.cpu
+        wall = time.perf_counter() - self.wall
+        with _lock:
+            if self.timing is not None:
+                self.timing[0] += 1
+                self.timing[1] += wall
+                self.timing[2] += cpu
+
+
+def phase(name: str) -> ContextManager:
+    """
+    Record the time spent in the wrapped block as part of the given phase.
+
+    Nothing is recorded (and the overhead is negligible) if profiling is not enabled.
+
+    :param str name: phase name
+    :return: context manager
+    """
+    if _timings is None:
+        return _DISABLED
+    return _Phase(name)
+
+
+def enable_profiling():
+    """Start recording the phases timings, discarding any previous one."""
+    global _timings
+    _timings = {}
+
+
+def disable_profiling() -> Dict[str, Dict[str, Any]]:
+    """
+    Stop recording the phases timings.
+
+    :return: recorded timings (see :py:func:`get_timings`)
+    """
+    global _timings
+    timings = get_timings()
+    _timings = None
+    return timings
+
+
+def get_timings() -> Dict[str, Dict[str, Any]]:
+    """
+    Get the recorded phases timings.
+
+    Phases are returned in the order they have been first entered; CPU time is the time of the whole process, including
+    the concurrent threads (e.g.: pip output reading in the pipeline mode).
+
+    :return: ``calls`` number, total ``wall`` and ``cpu`` time in seconds by phase name
+    """
+    with _lock:
+        return {
+            name: {"calls": calls, "wall": wall, "cpu": cpu} for name, (calls, wall, cpu) in (_timings or {}).items()
+        }
+
+
+def format_timings(timings: Dict[str, Dict[str, Any]], json_output: bool = False) -> str:
+    """
+    Format the phases timings as a table or as JSON.
+
+    :param dict timings: phases timings (see :py:func:`get_timings`)
+    :param bool json_output: Format the timings as JSON
+    :return: formatted timings
+    """
+    if json_output:
+        return json.dumps(timings, indent=2) + "\n"
+    width = max([len(name) for name in timings] + [5])
+    lines = ["{:<{width}}  {:>6}  {:>9}  {:>9}".format("phase", "calls", "wall", "cpu", width=width)]
+    for name, timing in timings.items():
+        lines.append("{:<{width}}  {calls:>6}  {wall:>8.3f}s  {cpu:>8.3f}s".format(name, width=width, **timing))
+    return "\n".join(lines) + "\n"
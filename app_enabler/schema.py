@@ -0,0 +1,272 @@
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .errors import ConfigurationError
+
+#: validator compiled from a schema: it appends to the errors the messages for the value found at the path
+Validator = Callable[[Any, str, List[str]], None]
+
+#: configuration sets larger than this are validated in parallel worker processes
+PARALLEL_THRESHOLD = 5000
+
+_TYPES = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "null": (type(None),),
+    "array": (list,),
+    "object": (dict,),
+}
+
+#: any JSON value
+_ANY = {}
+
+#: dict item merged into an existing list setting (or ``installed-apps``): the value and its position
+LIST_ITEM_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "value": _ANY,
+        "position": {"type": "integer"},
+        "next": {"type": "string"},
+        "key": {"type": "string"},
+    },
+    "required": ["value"],
+    "additionalProperties": False,
+}
+
+#: item of ``installed-apps``: either a literal or a dict with the value and its position
+_LIST_ITEM = {"anyOf": [{"type": ["string", "integer", "number", "boolean", "null", "array"]}, LIST_ITEM_SCHEMA]}
+
+#: addon configuration schema, see :ref:`addon_configuration`
+#:
+#: ``settings`` values are not checked, as settings not existing in the project are added verbatim: the dict items
+#: of list settings are checked against :py:data:`LIST_ITEM_SCHEMA` when merged into an existing list setting.
+#: Unknown attributes are ignored (e.g.: ``$schema``).
+CONFIGURATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "package-name": {"type": "string"},
+        "installed-apps": {"type": "array", "items": _LIST_ITEM},
+        "settings": {
+            "type": "object",
+            "propertyNames": {"pattern": r"^[A-Za-z_][A-Za-z0-9_]*$"},
+        },
+        "urls": {
+            "type": "array",
+            "items": {"type": "array", "items": {"type": "string"}, "minItems": 2, "maxItems": 2},
+        },
+        "message": {"type": "string"},
+    },
+}
+
+#: ``addon.json`` schema: like :py:data:`CONFIGURATION_SCHEMA`, with the required attributes
+ADDON_SCHEMA = {**CONFIGURATION_SCHEMA, "required": ["package-name", "installed-apps"]}
+
+
+def _is_type(value: Any, types: Iterable[str]) -> bool:
+    """Check if the value is an instance of the JSON types (booleans are not numbers)."""
+    for type_name in types:
+        if isinstance(value, _TYPES[type_name]) and (type_name in ("boolean", "null") or not isinstance(value, bool)):
+            return True
+    return False
+
+
+def _get_types(schema: Dict[str, Any]) -> List[str]:
+    """Get the JSON types allowed by the schema, empty if any type is allowed."""
+    types = schema.get("type") or []
+    return [types] if isinstance(types, str) else types
+
+
+def _compile_any_of(schema: Dict[str, Any]) -> Validator:
+    """Compile the ``anyOf`` keyword."""
+    options = [(_get_types(option), compile_schema(option)) for option in schema["anyOf"]]
+
+    def check_any_of(value: Any, path: str, errors: List[str]):
+        for option_types, option in options:
+            option_errors = []
+            option(value, path, option_errors)
+            if not option_errors:
+                return
+            if option_types and _is_type(value, option_types):
+                # report the errors of the option matching the value type, as it's the intended one
+                errors.extend(option_errors)
+                return
+        errors.append(f"{path}: invalid value {value!r}")
+
+    return check_any_of
+
+
+def _compile_pattern(schema: Dict[str, Any]) -> Validator:
+    """Compile the ``pattern`` keyword."""
+    pattern = re.compile(schema["pattern"])
+
+    def check_pattern(value: Any, path: str, errors: List[str]):
+        if isinstance(value, str) and not pattern.match(value):
+            errors.append(f"{path}: {value!r} does not match {pattern.pattern}")
+
+    return check_pattern
+
+
+def _compile_object(schema: Dict[str, Any]) -> Validator:
+    """Compile the ``properties``, ``required``, ``additionalProperties`` and ``propertyNames`` keywords."""
+    properties = {name: compile_schema(item) for name, item in schema.get("properties", {}).items()}
+    required = schema.get("required", [])
+    additional = schema.get("additionalProperties", True)
+    additional = compile_schema(additional) if isinstance(additional, dict) else additional
+    names = compile_schema(schema["propertyNames"]) if "propertyNames" in schema else None
+
+    def check_property(name: str, item: Any, path: str, errors: List[str]):
+        item_path = f"{path}.{name}"
+        if names:
+            names(name, item_path, errors)
+        if name in properties:
+            properties[name](item, item_path, errors)
+        elif additional is False:
+            errors.append(f"{path}: unknown attribute {name!r}")
+        elif additional is not True:
+            additional(item, item_path, errors)
+
+    def check_object(value: Any, path: str, errors: List[str]):
+        if not isinstance(value, dict):
+            return
+        errors.extend(f"{path}: {name!r} is required" for name in required if name not in value)
+        for name, item in value.items():
+            check_property(name, item, path, errors)
+
+    return check_object
+
+
+def _compile_array(schema: Dict[str, Any]) -> Validator:
+    """Compile the ``items``, ``minItems`` and ``maxItems`` keywords."""
+    items = compile_schema(schema["items"]) if "items" in schema else None
+    min_items = schema.get("minItems", 0)
+    max_items = schema.get("maxItems")
+
+    def check_array(value: Any, path: str, errors: List[str]):
+        if not isinstance(value, list):
+            return
+        if len(value) < min_items:
+            errors.append(f"{path}: expected at least {min_items} items, got {len(value)}")
+        elif max_items is not None and len(value) > max_items:
+            errors.append(f"{path}: expected at most {max_items} items, got {len(value)}")
+        if items:
+            for index, item in enumerate(value):
+                items(item, f"{path}[{index}]", errors)
+
+    return check_array
+
+
+#: keyword compilers, each compiling the group of keywords it handles if any of them is in the schema
+_KEYWORD_COMPILERS: List[Tuple[Tuple[str, ...], Callable[[Dict[str, Any]], Validator]]] = [
+    (("anyOf",), _compile_any_of),
+    (("pattern",), _compile_pattern),
+    (("properties", "required", "additionalProperties", "propertyNames"), _compile_object),
+    (("items", "minItems", "maxItems"), _compile_array),
+]
+
+
+def compile_schema(schema: Dict[str, Any]) -> Validator:
+    """
+    Compile the schema into a validator function.
+
+    Only the subset of JSON schema used by :py:data:`CONFIGURATION_SCHEMA` is supported: ``type``, ``anyOf``,
+    ``pattern``, ``properties``, ``required``, ``additionalProperties``, ``propertyNames``, ``items``, ``minItems``
+    and ``maxItems``.
+
+    Schema is walked once at compile time, so that validating a value only runs the checks needed by its schema.
+
+    :param dict schema: schema to compile
+    :return: validator
+    """
+    types = _get_types(schema)
+    checks = [compiler(schema) for keywords, compiler in _KEYWORD_COMPILERS if any(key in schema for key in keywords)]
+
+    def validate(value: Any, path: str, errors: List[str]):
+        if types and not _is_type(value, types):
+            errors.append(f"{path}: expected {' or '.join(types)}, got {type(value).__name__}")
+            return
+        for check in checks:
+            check(value, path, errors)
+
+    return validate
+
+
+#: compiled validators, by ``addon`` flag
+_validators = {False: compile_schema(CONFIGURATION_SCHEMA), True: compile_schema(ADDON_SCHEMA)}
+
+
+def validate_configuration(application_config: Any, addon: bool = False, source: str = "") -> List[str]:
+    """
+    Validate the addon configuration.
+
+    :param dict application_config: addon configuration
+    :param bool addon: Validate as ``addon.json`` content, thus ``package-name`` and ``installed-apps`` are required
+    :param str source: configuration source (e.g.: file path) to prefix the error messages with
+    :return: error messages, empty if the configuration is valid
+    """
+    errors = []
+    _validators[addon](application_config, "$", errors)
+    if source:
+        errors = [f"{source}: {error}" for error in errors]
+    return errors
+
+
+def check_configuration(application_config: Any, addon: bool = False, source: str = ""):
+    """
+    Validate the addon configuration, raising an error if it's invalid.
+
+    :param dict application_config: addon configuration
+    :param bool addon: Validate as ``addon.json`` content
+    :param str source: configuration source (e.g.: file path) to prefix the error messages with
+    :raise ConfigurationError: if the configuration is invalid
+    """
+    errors = validate_configuration(application_config, addon=addon, source=source)
+    if errors:
+        raise ConfigurationError(errors)
+
+
+def _validate_item(item: Tuple[str, Any, bool]) -> List[str]:
+    """Validate a configuration of the set (worker function of :py:func:`validate_configuration_set`)."""
+    source, application_config, addon = item
+    return validate_configuration(application_config, addon=addon, source=source)
+
+
+def validate_configuration_set(
+    config_set: List[Any], addon: bool = False, source: str = "", workers: Optional[int] = None
+) -> List[str]:
+    """
+    Validate all the configurations of the set.
+
+    Sets larger than :py:data:`PARALLEL_THRESHOLD` are validated in parallel worker processes.
+
+    :param list config_set: list of addon configurations
+    :param bool addon: Validate the configurations as ``addon.json`` content
+    :param str source: configurations source (e.g.: file path) to prefix the error messages with
+    :param int workers: number of worker processes, defaults to the number of CPUs
+    :return: error messages, prefixed by the source and the configuration index in the set, empty if all the
+             configurations are valid
+    """
+    items = [(f"{source}[{index}]", application_config, addon) for index, application_config in enumerate(config_set)]
+    if len(items) <= PARALLEL_THRESHOLD:
+        results = map(_validate_item, items)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # items are sent to the workers in chunks to amortize the inter-process communication cost
+            results = list(executor.map(_validate_item, items, chunksize=max(len(items) // 32, 1)))
+    return [error for errors in results for error in errors]
+
+
+def check_configuration_set(config_set: List[Any], addon: bool = False, source: str = ""):
+    """
+    Validate all the configurations of the set, raising an error if any is invalid.
+
+    :param list config_set: list of addon configurations
+    :param bool addon: Validate the configurations as ``addon.json`` content
+    :param str source: configurations source (e.g.: file path) to prefix the error messages with
+    :raise ConfigurationError: if any configuration is invalid
+    """
+    errors = validate_configuration_set(config_set, addon=addon, source=source)
+    if errors:
+        raise ConfigurationError(errors)
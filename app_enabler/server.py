@@ -0,0 +1,162 @@
+import contextlib
+import importlib
+import io
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .cache import MemoryCache
+from .django import load_addon
+from .enable import _setup_django, apply_configurations, load_configuration_set, plan_configurations
+
+#: default path of the server socket, relative to the project directory
+SOCKET_PATH = ".app_enabler.sock"
+
+#: commands accepted by the server
+COMMANDS = ("enable", "apply", "plan")
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handle the requests sent on a connection, one JSON document per line."""
+
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = {"status": "error", "error": f"Invalid request: {e}"}
+            else:
+                response = self.server.process(request)
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class EnablerServer(socketserver.UnixStreamServer):
+    """
+    Long-lived server applying addon configurations to the project in the current directory.
+
+    Django is initialized once (unless ``static_verify`` is set) and the parsed project files and resolved paths are
+    kept in a :py:class:`app_enabler.cache.MemoryCache` between requests, thus files are only parsed again when they
+    change. Django settings are loaded again for each request, as the previous ones may have changed them.
+
+    Requests are processed one at a time, in the order they are received.
+    """
+
+    def __init__(self, socket_path: str = SOCKET_PATH, static_verify: bool = False, static_resolve: bool = False):
+        self.static_verify = static_verify
+        self.static_resolve = static_resolve
+        self.cache = MemoryCache()
+        _remove_stale_socket(socket_path)
+        super().__init__(socket_path, _RequestHandler)
+        _setup_django(static_verify, self.cache)
+
+    def server_close(self):
+        """Close the server and remove the socket file."""
+        super().server_close()
+        with contextlib.suppress(OSError):
+            os.unlink(self.server_address)
+
+    def _get_configurations(self, request: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Collect the addon configurations from the applications, files and inline configurations of the request."""
+        config_set = []
+        if request.get("application"):
+            # packages may have been installed after the server started
+            importlib.invalidate_caches()
+            application_config = load_addon(request["application"])
+            if not application_config:
+                raise ValueError(f"Application {request['application']} has no addon configuration")
+            config_set.append(application_config)
+        config_set.extend(load_configuration_set([Path(path) for path in request.get("config_set", [])]))
+        config_set.extend(request.get("configurations", []))
+        return config_set
+
+    def process(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process a single request.
+
+        Requests are dicts with the ``command`` key (one of :py:data:`COMMANDS`) and the configurations to apply:
+
+        * ``application``: python module name to enable (required by ``enable``)
+        * ``config_set``: list of paths to addon configuration files
+        * ``configurations``: list of addon configurations
+
+        Response is a dict with the ``status`` (either ``ok`` or ``error``) and either the command ``output`` (and the
+        ``plan`` for the ``plan`` command) or the ``error`` message.
+
+        :param dict request: request
+        :return: response
+        """
+        command = request.get("command")
+        if command not in COMMANDS:
+            return {"status": "error", "error": f"Unknown command: {command}"}
+        if command == "enable" and not request.get("application"):
+            return {"status": "error", "error": "Missing application"}
+        response = {"status": "ok"}
+        output = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(output):
+                _reload_settings()
+                config_set = self._get_configurations(request)
+                if command == "plan":
+                    response["plan"] = plan_configurations(
+                        config_set, cache=self.cache, static_resolve=self.static_resolve
+                    )
+                else:
+                    apply_configurations(
+                        config_set,
+                        static_verify=self.static_verify,
+                        cache=self.cache,
+                        static_resolve=self.static_resolve,
+                    )
+        except Exception as e:
+            # a failing request must not stop the server
+            return {"status": "error", "error": f"{type(e).__name__}: {e}"}
+        response["output"] = output.getvalue()
+        return response
+
+
+def _reload_settings():
+    """Discard the loaded django settings, for them to be loaded again from the settings module on first access."""
+    from django.conf import settings
+    from django.utils.functional import empty
+
+    if settings.configured and settings.SETTINGS_MODULE:
+        sys.modules.pop(settings.SETTINGS_MODULE, None)
+        settings._wrapped = empty
+
+
+def _remove_stale_socket(socket_path: str):
+    """Remove the socket file left by a server which has not been properly stopped."""
+    try:
+        if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+            return
+    except OSError:
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        try:
+            client.connect(socket_path)
+        except OSError:
+            os.unlink(socket_path)
+
+
+def send_request(socket_path: str, request: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Send a request to the server and wait for the response.
+
+    :param str socket_path: path of the server socket
+    :param dict request: request (see :py:meth:`EnablerServer.process`)
+    :return: response
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        with client.makefile("rwb") as stream:
+            stream.write(json.dumps(request).encode("utf-8") + b"\n")
+            stream.flush()
+            return json.loads(stream.readline())
@@ -0,0 +1,455 @@
+import ast
+import re
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import astor
+
+#: line length after which new literal values are split on multiple lines
+LINE_LENGTH = 88
+#: indentation used for new literal values split on multiple lines
+INDENT = "    "
+
+_newline_re = re.compile(r"\r\n|\r|\n")
+_trailing_comma_re = re.compile(r"[ \t]*,")
+
+#: an edit on the original source: start offset, end offset, replacement text
+Edit = Tuple[int, int, str]
+
+
+def _is_located(node: Any) -> bool:
+    """Check if the node comes from the original source (i.e.: it has a location)."""
+    return getattr(node, "lineno", None) is not None
+
+
+def _has_location(node: ast.AST) -> bool:
+    """Check if the node type is expected to have a location."""
+    return "lineno" in node._attributes
+
+
+def _matches(original: ast.AST, patched: ast.AST) -> bool:
+    """Check if the patched node is the same original source node."""
+    return (
+        type(original) is type(patched)
+        and original.lineno == patched.lineno
+        and original.col_offset == patched.col_offset
+        and original.end_lineno == patched.end_lineno
+        and original.end_col_offset == patched.end_col_offset
+    )
+
+
+def render_string(value: str, quote: str = '"') -> str:
+    """Render the string literal using the preferred quote character if possible."""
+    rendered = repr(value)
+    if quote == '"' and rendered[0] == "'" and '"' not in value:
+        rendered = '"{}"'.format(rendered[1:-1].replace("\\'", "'"))
+    return rendered
+
+
+def _render_flat(node: ast.AST, quote: str) -> str:
+    """Render the node on a single line."""
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, str):
+            return render_string(node.value, quote)
+        elif node.value is Ellipsis:
+            return "..."
+        return repr(node.value)
+    elif isinstance(node, ast.List):
+        return "[{}]".format(", ".join(_render_flat(item, quote) for item in node.elts))
+    elif isinstance(node, ast.Tuple):
+        if len(node.elts) == 1:
+            return "({},)".format(_render_flat(node.elts[0], quote))
+        return "({})".format(", ".join(_render_flat(item, quote) for item in node.elts))
+    elif isinstance(node, ast.Set) and node.elts:
+        return "{{{}}}".format(", ".join(_render_flat(item, quote) for item in node.elts))
+    elif isinstance(node, ast.Dict):
+        return "{{{}}}".format(
+            ", ".join(
+                (
+                    "**{}".format(_render_flat(value, quote))
+                    if key is None
+                    else "{}: {}".format(_render_flat(key, quote), _render_flat(value, quote))
+                )
+                for key, value in zip(node.keys, node.values)
+            )
+        )
+    elif isinstance(node, ast.Name):
+        return node.id
+    elif isinstance(node, ast.Attribute):
+        return "{}.{}".format(_render_flat(node.value, quote), node.attr)
+    elif isinstance(node, ast.Call) and isinstance(node.func, (ast.Name, ast.Attribute)):
+        arguments = [_render_flat(arg, quote) for arg in node.args]
+        arguments.extend(
+            (
+                "{}={}".format(keyword.arg, _render_flat(keyword.value, quote))
+                if keyword.arg
+                else "**{}".format(_render_flat(keyword.value, quote))
+            )
+            for keyword in node.keywords
+        )
+        return "{}({})".format(_render_flat(node.func, quote), ", ".join(arguments))
+    return astor.to_source(node).strip()
+
+
+def _render_pair(key: Optional[ast.AST], value: ast.AST, quote: str, indent: str = "") -> str:
+    """Render a dictionary item, splitting the value on multiple lines if needed."""
+    if key is None:
+        return "**{}".format(render_node(value, indent, quote))
+    return "{}: {}".format(render_node(key, indent, quote), render_node(value, indent, quote))
+
+
+def render_node(node: ast.AST, indent: str = "", quote: str = '"') -> str:
+    """
+    Render the node as python source.
+
+    Literal containers which do not fit in :py:data:`LINE_LENGTH` are split on multiple lines, with one item per
+    line.
+
+    :param ast.AST node: node to render
+    :param str indent: indentation of the line the node is rendered on
+    :param str quote: preferred quote character for strings
+    :return: python source
+    """
+    rendered = _render_flat(node, quote)
+    if len(indent) + len(rendered) <= LINE_LENGTH or "\n" in rendered:
+        return rendered
+    inner = indent + INDENT
+    if isinstance(node, ast.Dict):
+        items = [_render_pair(key, value, quote, inner) for key, value in zip(node.keys, node.values)]
+        brackets = "{}"
+    elif isinstance(node, (ast.List, ast.Tuple, ast.Set)) and node.elts:
+        items = [render_node(item, inner, quote) for item in node.elts]
+        brackets = "{}" if isinstance(node, ast.Set) else "()" if isinstance(node, ast.Tuple) else "[]"
+    else:
+        return rendered
+    return "{}\n{}{}".format(brackets[0], "".join(f"{inner}{item},\n" for item in items), indent + brackets[1])
+
+
+def render_statement(node: ast.stmt, indent: str = "", quote: str = '"') -> str:
+    """
+    Render the statement as python source.
+
+    :param ast.stmt node: statement to render
+    :param str indent: indentation of the statement
+    :param str quote: preferred quote character for strings
+    :return: python source
+    """
+    if isinstance(node, ast.Assign) and all(isinstance(target, ast.Name) for target in node.targets):
+        targets = " = ".join(target.id for target in node.targets)
+        return "{} = {}".format(targets, render_node(node.value, indent, quote))
+    return astor.to_source(node).rstrip()
+
+
+class _Splicer:
+    """
+    Compute the edits to apply to the original source to match the patched module.
+
+    The patched module must be the original module (parsed from the source) modified in place: the nodes retained from
+    the original module keep their location, while the new nodes must not have any location information.
+
+    Original nodes are matched with a pristine copy of the original module to detect changes, and only the changed
+    spans are rendered from the AST; anything else in the original source (comments and formatting included) is kept
+    as is.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.line_offsets = [0] + [match.end() for match in _newline_re.finditer(source)]
+        newline = _newline_re.search(source)
+        self.newline = newline.group() if newline else "\n"
+        self.quote = '"' if source.count('"') >= source.count("'") else "'"
+
+    def offset(self, lineno: int, col_offset: int) -> int:
+        """Convert the line number / utf-8 column offset to an offset in the source text."""
+        start = self.line_offsets[lineno - 1]
+        if self.source[start : start + col_offset].isascii():
+            return start + col_offset
+        end = self.line_offsets[lineno] if lineno < len(self.line_offsets) else len(self.source)
+        return start + len(self.source[start:end].encode("utf-8")[:col_offset].decode("utf-8", errors="ignore"))
+
+    def start(self, node: ast.AST) -> int:
+        """Get the start offset of the node."""
+        return self.offset(node.lineno, node.col_offset)
+
+    def end(self, node: ast.AST) -> int:
+        """Get the end offset of the node."""
+        return self.offset(node.end_lineno, node.end_col_offset)
+
+    def indent(self, node: ast.AST) -> str:
+        """Get the indentation of the line the node starts on."""
+        start = self.line_offsets[node.lineno - 1]
+        prefix = self.source[start : self.start(node)]
+        return prefix if not prefix.strip() else prefix[: len(prefix) - len(prefix.lstrip())]
+
+    def replace(self, original: ast.AST, patched: ast.AST) -> List[Edit]:
+        """Replace the original node span with the rendered patched node."""
+        if isinstance(patched, ast.stmt):
+            text = render_statement(patched, self.indent(original), self.quote)
+        else:
+            text = render_node(patched, self.indent(original), self.quote)
+        return [(self.start(original), self.end(original), text)]
+
+    def splice(self, original: ast.Module, patched: ast.Module) -> Optional[str]:
+        """
+        Compute the patched source.
+
+        :return: patched source; if ``None`` the patched module can't be spliced into the original source
+        """
+        alignment = self._align(original.body, patched.body)
+        if alignment is None:
+            return None
+        edits = []
+        appended = []
+        for position, patched_node in alignment:
+            if _is_located(patched_node):
+                edits.extend(self.node(original.body[position], patched_node))
+            elif position < len(original.body):
+                before = original.body[position]
+                text = render_statement(patched_node, "", self.quote) + self.newline
+                edits.append((self.start(before), self.start(before), text))
+            else:
+                appended.append(render_statement(patched_node, "", self.quote))
+        if appended:
+            prefix = self.newline if self.source and not self.source.endswith(("\n", "\r")) else ""
+            if self.source.strip():
+                prefix += self.newline
+            text = prefix + self.newline.join(appended) + self.newline
+            edits.append((len(self.source), len(self.source), text))
+        return self.apply(edits)
+
+    def apply(self, edits: List[Edit]) -> str:
+        """Apply the edits to the original source."""
+        chunks = []
+        position = 0
+        for start, end, text in sorted(edits, key=lambda edit: (edit[0], edit[1])):
+            chunks.append(self.source[position:start])
+            chunks.append(text)
+            position = end
+        chunks.append(self.source[position:])
+        return "".join(chunks)
+
+    def _align(
+        self, original: Sequence[Any], patched: Sequence[Any], anchor: Callable[[Any], ast.AST] = lambda item: item
+    ) -> Optional[List[Tuple[int, Any]]]:
+        """
+        Align the items of the patched sequence with the original ones.
+
+        Each patched item is returned with the position of the matching original item, or of the original item it is
+        inserted before (which is the length of the original sequence for items appended at the end).
+
+        :return: aligned items; if ``None``, original items have been removed or reordered
+        """
+        alignment = []
+        position = 0
+        for item in patched:
+            node = anchor(item)
+            if _is_located(node):
+                if position >= len(original) or not _matches(anchor(original[position]), node):
+                    return None
+                alignment.append((position, item))
+                position += 1
+            else:
+                alignment.append((position, item))
+        if position != len(original):
+            return None
+        return alignment
+
+    def node(self, original: ast.AST, patched: ast.AST) -> List[Edit]:
+        """Compute the edits for an original node, replacing it as a whole if it cannot be spliced."""
+        edits = self._node(original, patched)
+        if edits is None:
+            return self.replace(original, patched)
+        return edits
+
+    def _node(self, original: ast.AST, patched: ast.AST) -> Optional[List[Edit]]:
+        edits = []
+        for field in patched._fields:
+            original_value = getattr(original, field, None)
+            patched_value = getattr(patched, field, None)
+            if isinstance(patched, ast.Dict) and field in ("keys", "values"):
+                if field == "keys":
+                    field_edits = self._dict(original, patched)
+                else:
+                    continue
+            elif isinstance(patched_value, list):
+                if (isinstance(patched, (ast.List, ast.Tuple, ast.Set)) and field == "elts") or (
+                    isinstance(patched, ast.ImportFrom) and field == "names"
+                ):
+                    field_edits = self._sequence(original, original_value, patched_value)
+                elif all(not isinstance(item, ast.AST) for item in patched_value):
+                    field_edits = [] if original_value == patched_value else None
+                else:
+                    field_edits = self._children(original_value, patched_value)
+            elif isinstance(patched_value, ast.AST):
+                field_edits = self._child(original_value, patched_value)
+            else:
+                field_edits = [] if original_value == patched_value else None
+            if field_edits is None:
+                return None
+            edits.extend(field_edits)
+        return edits
+
+    def _child(self, original: Any, patched: ast.AST) -> Optional[List[Edit]]:
+        """Compute the edits for a single child node."""
+        if not isinstance(original, ast.AST):
+            return None
+        if not _has_location(patched):
+            # nodes without location (expression contexts, operators, arguments) can't be new nodes in an
+            # unchanged parent
+            return self._node(original, patched) if type(original) is type(patched) else None
+        if not _is_located(patched):
+            return self.replace(original, patched)
+        if not _matches(original, patched):
+            return None
+        return self.node(original, patched)
+
+    def _children(self, original: List[ast.AST], patched: List[ast.AST]) -> Optional[List[Edit]]:
+        """Compute the edits for a list of children nodes which does not support insertions."""
+        if len(original) != len(patched):
+            return None
+        edits = []
+        for original_item, patched_item in zip(original, patched):
+            item_edits = self._child(original_item, patched_item)
+            if item_edits is None:
+                return None
+            edits.extend(item_edits)
+        return edits
+
+    def _dict(self, original: ast.Dict, patched: ast.Dict) -> Optional[List[Edit]]:
+        """Compute the edits for the items of a dictionary."""
+
+        def anchor(item: Tuple[Optional[ast.AST], ast.AST]) -> ast.AST:
+            return item[0] if item[0] is not None else item[1]
+
+        original_items = list(zip(original.keys, original.values))
+        patched_items = list(zip(patched.keys, patched.values))
+        alignment = self._align(original_items, patched_items, anchor)
+        if alignment is None:
+            return None
+        edits = []
+        for position, (key, value) in alignment:
+            if not _is_located(anchor((key, value))):
+                continue
+            original_key, original_value = original_items[position]
+            if key is not None:
+                key_edits = self._child(original_key, key)
+                if key_edits is None:
+                    return None
+                edits.extend(key_edits)
+            if _is_located(value):
+                value_edits = self._child(original_value, value)
+                if value_edits is None:
+                    return None
+                edits.extend(value_edits)
+            else:
+                text = render_node(value, self.indent(anchor(original_items[position])), self.quote)
+                edits.append((self.start(original_value), self.end(original_value), text))
+        insert_edits = self._insertions(
+            original,
+            original_items,
+            alignment,
+            anchor,
+            lambda item: self.start(item[0]) if item[0] is not None else self.start(item[1]) - 2,
+            lambda item: self.end(item[1]),
+            lambda item, indent: _render_pair(item[0], item[1], self.quote, indent),
+        )
+        if insert_edits is None:
+            return None
+        return edits + insert_edits
+
+    def _sequence(self, container: ast.AST, original: List[ast.AST], patched: List[ast.AST]) -> Optional[List[Edit]]:
+        """Compute the edits for the items of a sequence (list, tuple, set, imported names)."""
+        alignment = self._align(original, patched)
+        if alignment is None:
+            return None
+        edits = []
+        for position, item in alignment:
+            if _is_located(item):
+                edits.extend(self.node(original[position], item))
+
+        def render(item: ast.AST, indent: str) -> str:
+            if isinstance(item, ast.alias):
+                return item.name if not item.asname else f"{item.name} as {item.asname}"
+            return render_node(item, indent, self.quote)
+
+        insert_edits = self._insertions(
+            container, original, alignment, lambda item: item, self.start, self.end, render
+        )
+        if insert_edits is None:
+            return None
+        return edits + insert_edits
+
+    def _insertions(
+        self,
+        container: ast.AST,
+        original: List[Any],
+        alignment: List[Tuple[int, Any]],
+        anchor: Callable[[Any], ast.AST],
+        item_start: Callable[[Any], int],
+        item_end: Callable[[Any], int],
+        render: Callable[[Any, str], str],
+    ) -> Optional[List[Edit]]:
+        """
+        Compute the edits to insert new items in a container.
+
+        Items layout (one item per line, or all items on the same line) is detected from the original items; empty
+        containers are not supported as the layout can't be detected.
+        """
+        inserted = {}
+        for position, item in alignment:
+            if not _is_located(anchor(item)):
+                inserted.setdefault(position, []).append(item)
+        if not inserted:
+            return []
+        if not original:
+            return None
+        lines = [anchor(item).lineno for item in original]
+        one_per_line = container.lineno < lines[0] and len(set(lines)) == len(lines)
+        indent = self.indent(anchor(original[0])) if one_per_line else self.indent(container)
+        edits = []
+        for position, items in inserted.items():
+            rendered = [render(item, indent) for item in items]
+            if position < len(original):
+                start = item_start(original[position])
+                separator = f",{self.newline}{indent}" if one_per_line else ", "
+                edits.append((start, start, "".join(f"{text}{separator}" for text in rendered)))
+                continue
+            last_end = item_end(original[-1])
+            container_end = self.end(container)
+            trailing_comma = _trailing_comma_re.match(self.source, last_end, container_end)
+            if not one_per_line:
+                edits.append((last_end, last_end, "".join(f", {text}" for text in rendered)))
+            elif trailing_comma:
+                line_end = _newline_re.search(self.source, trailing_comma.end(), container_end)
+                if line_end:
+                    text = "".join(f"{self.newline}{indent}{text}," for text in rendered)
+                    edits.append((line_end.start(), line_end.start(), text))
+                else:
+                    text = "".join(f" {text}," for text in rendered)
+                    edits.append((trailing_comma.end(), trailing_comma.end(), text))
+            else:
+                text = "".join(f",{self.newline}{indent}{text}" for text in rendered)
+                edits.append((last_end, last_end, text))
+        return edits
+
+
+def splice_source(source: str, patched: ast.Module, original: Optional[ast.Module] = None) -> str:
+    """
+    Render the patched module by splicing the changed parts into the original source.
+
+    Only the changed spans of the original source are rewritten, so that comments and formatting are preserved and
+    the cost of rendering depends on the size of the changes.
+
+    If the patched module can't be matched with the original source (e.g.: statements have been removed), the whole
+    module is rendered from the AST.
+
+    :param str source: original source
+    :param ast.Module patched: module parsed from the source and patched in place
+    :param ast.Module original: unpatched module parsed from the source, if not given the source is parsed again
+    :return: patched source
+    """
+    if original is None:
+        original = ast.parse(source)
+    spliced = _Splicer(source).splice(original, patched)
+    if spliced is None:
+        return astor.to_source(patched)
+    return spliced
@@ -0,0 +1,240 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set
+
+from .cache import MemoryCache
+from .enable import _setup_django, apply_configurations, load_configuration_set
+from .errors import ConfigurationError, LockTimeoutError, messages
+from .manifest import configuration_hash
+
+#: seconds without further changes waited before applying the configurations
+DEBOUNCE = 0.3
+
+#: seconds between checks of the files of the polling watcher
+POLL_INTERVAL = 0.5
+
+# inotify events signalling that a file in the watched directory has been written, replaced or removed
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+_IN_EVENT = struct.Struct("iIII")
+
+
+class PollingWatcher:
+    """Detect the changes of the files by periodically checking their size and modification time."""
+
+    def __init__(self, paths: List[Path], interval: float = POLL_INTERVAL):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.interval = interval
+        self.snapshot = self._snapshot()
+
+    def _snapshot(self) -> Dict[str, Any]:
+        snapshot = {}
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+                snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+            except OSError:
+                snapshot[path] = None
+        return snapshot
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for any of the files to change.
+
+        :param float timeout: maximum seconds to wait, forever if ``None``
+        :return: ``True`` if any file changed, ``False`` on timeout
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            snapshot = self._snapshot()
+            if snapshot != self.snapshot:
+                self.snapshot = snapshot
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(self.interval if deadline is None else max(min(self.interval, deadline - time.monotonic()), 0))
+
+    def close(self):
+        """Release the watcher resources."""
+
+
+class InotifyWatcher:
+    """
+    Detect the changes of the files with Linux inotify.
+
+    The directories containing the files are watched (instead of the files themselves) to detect the files atomically
+    replaced by editors.
+    """
+
+    def __init__(self, paths: List[Path]):
+        libc = _get_libc()
+        self.fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches: Dict[int, Set[str]] = {}
+        directories: Dict[str, Set[str]] = {}
+        for path in paths:
+            directory, name = os.path.split(os.path.abspath(path))
+            directories.setdefault(directory, set()).add(name)
+        for directory, names in directories.items():
+            watch = libc.inotify_add_watch(self.fd, os.fsencode(directory), _IN_MASK)
+            if watch < 0:
+                error = ctypes.get_errno()
+                os.close(self.fd)
+                raise OSError(error, "inotify_add_watch failed", directory)
+            self.watches[watch] = names
+
+    def _read_changes(self) -> bool:
+        """Read the pending events, checking if any of them is about the watched files."""
+        changed = False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        offset = 0
+        while offset < len(data):
+            watch, __, __, length = _IN_EVENT.unpack_from(data, offset)
+            offset += _IN_EVENT.size
+            name = data[offset : offset + length].rstrip(b"\0").decode(sys.getfilesystemencoding(), "replace")
+            offset += length
+            changed = changed or name in self.watches.get(watch, ())
+        return changed
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for any of the files to change.
+
+        :param float timeout: maximum seconds to wait, forever if ``None``
+        :return: ``True`` if any file changed, ``False`` on timeout
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            remaining = max(deadline - time.monotonic(), 0) if deadline is not None else None
+            readable, __, __ = select.select([self.fd], [], [], remaining)
+            if readable and self._read_changes():
+                return True
+            if not readable and deadline is not None:
+                return False
+
+    def close(self):
+        """Release the watcher resources."""
+        os.close(self.fd)
+
+
+def _get_libc() -> ctypes.CDLL:
+    """
+    Load the C library exposing the inotify functions.
+
+    :raise AttributeError: if the C library does not provide the inotify functions
+    """
+    libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+    for function in ("inotify_init1", "inotify_add_watch"):
+        if not hasattr(libc, function):
+            raise AttributeError(f"{function} is not available in the C library")
+    return libc
+
+
+def get_watcher(paths: List[Path]):
+    """
+    Get the best available watcher for the files.
+
+    :py:class:`InotifyWatcher` is used on Linux; :py:class:`PollingWatcher` if inotify is not available.
+
+    :param list paths: paths of the files to watch
+    :return: watcher
+    """
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(paths)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(paths)
+
+
+class ConfigurationWatcher:
+    """
+    Apply the configuration files each time they change.
+
+    Only the configurations (the items of the files) which have been added or changed since the previous application
+    are applied again; project files are kept parsed in memory between the applications (see
+    :py:class:`app_enabler.cache.MemoryCache`).
+    """
+
+    def __init__(
+        self,
+        config_set: List[Path],
+        verbose: bool = False,
+        static_verify: bool = False,
+        static_resolve: bool = False,
+    ):
+        self.config_set = config_set
+        self.verbose = verbose
+        self.static_verify = static_verify
+        self.static_resolve = static_resolve
+        self.cache = MemoryCache()
+        self.applied: Set[str] = set()
+
+    def apply_changes(self) -> List[Dict[str, Any]]:
+        """
+        Apply the configurations changed since the previous call.
+
+        Invalid configurations, project lock timeouts and I/O errors are reported without stopping the watch session:
+        the configurations are applied again on the next change.
+
+        :return: applied configurations
+        """
+        try:
+            config_set = load_configuration_set(self.config_set)
+        except ValueError as e:
+            # files are likely being written, they will be loaded on the next change
+            sys.stderr.write(messages["watch_invalid_config"].format(error=e))
+            return []
+        hashes = [configuration_hash(application_config) for application_config in config_set]
+        changed = [config for config, digest in zip(config_set, hashes) if digest not in self.applied]
+        if changed:
+            try:
+                _setup_django(self.static_verify, self.cache)
+                apply_configurations(
+                    changed,
+                    verbose=self.verbose,
+                    static_verify=self.static_verify,
+                    cache=self.cache,
+                    static_resolve=self.static_resolve,
+                )
+            except (ConfigurationError, LockTimeoutError, OSError) as e:
+                # configurations are applied again on the next change, the watch session goes on
+                sys.stderr.write(messages["watch_apply_error"].format(error=e))
+                return []
+        self.applied = set(hashes)
+        if self.verbose:
+            sys.stdout.write(messages["watch_applied"].format(changed=len(changed), total=len(config_set)))
+        return changed
+
+    def run(self, debounce: float = DEBOUNCE, watcher=None):
+        """
+        Apply the configurations, then apply them again on each change until interrupted.
+
+        Changes are debounced: configurations are applied once no further change happens for ``debounce`` seconds.
+
+        :param float debounce: seconds without further changes waited before applying the configurations
+        :param watcher: files watcher, defaults to :py:func:`get_watcher`
+        """
+        watcher = watcher or get_watcher(self.config_set)
+        try:
+            self.apply_changes()
+            while watcher.wait():
+                while watcher.wait(debounce):
+                    pass
+                self.apply_changes()
+        finally:
+            watcher.close()
@@ -0,0 +1 @@
+Add index of installed addons and list-addons command
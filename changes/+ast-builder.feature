@@ -0,0 +1 @@
+Build AST nodes for settings and urlpatterns directly instead of parsing their source
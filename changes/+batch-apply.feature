@@ -0,0 +1 @@
+Apply configuration sets in a single parse / write / verify batch
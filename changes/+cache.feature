@@ -0,0 +1 @@
+Add opt-in persistent cache for parsed project files and resolved paths
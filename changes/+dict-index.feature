@@ -0,0 +1 @@
+Speed up lookup of dictionary settings keys
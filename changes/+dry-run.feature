@@ -0,0 +1 @@
+Add --dry-run and --json options to preview the changes to the project files
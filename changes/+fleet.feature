@@ -0,0 +1 @@
+Add fleet command to apply configurations to all the projects under a directory in parallel
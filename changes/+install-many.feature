@@ -0,0 +1 @@
+Install and enable multiple packages and requirements files in a single batch
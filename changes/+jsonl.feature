@@ -0,0 +1 @@
+apply command reads JSON Lines files and the standard input, applying the configurations while reading them.
@@ -0,0 +1 @@
+Speed up cli startup by importing business modules lazily and replacing pkg_resources with importlib
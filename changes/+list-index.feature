@@ -0,0 +1 @@
+Speed up merge of list settings by indexing existing items
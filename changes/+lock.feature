@@ -0,0 +1 @@
+Serialize concurrent runs on the same project with a lock file, waiting up to --lock-timeout seconds.
@@ -0,0 +1 @@
+Add --manifest option recording the applied configurations to skip them on later runs if the project files are unchanged.
@@ -0,0 +1 @@
+Add --pipeline option to overlap packages installation with enabling them
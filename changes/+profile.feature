@@ -0,0 +1 @@
+Add --profile option to print the time spent in each phase and --cprofile option to dump cProfile stats
@@ -0,0 +1 @@
+Validate addon configurations against the documented schema before initializing Django or changing any file
@@ -0,0 +1 @@
+Add serve command to enable applications on request through a Unix socket, reusing the parsed project files
@@ -0,0 +1 @@
+Preserve comments and formatting of patched files by only rewriting the changed parts
@@ -0,0 +1 @@
+Add static resolution of project settings and urlconf paths without initializing django
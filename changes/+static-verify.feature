@@ -0,0 +1 @@
+Add static verification of patched settings and urlconf
@@ -0,0 +1 @@
+Stream pip output during installation and optionally write it to a log file
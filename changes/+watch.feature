@@ -0,0 +1 @@
+Add --watch option to apply to apply again the changed configurations each time the files change
@@ -0,0 +1 @@
+Add --wheelhouse option to install packages offline from a local wheels directory
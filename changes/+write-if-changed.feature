@@ -0,0 +1 @@
+Write patched files only if changed, atomically replacing them
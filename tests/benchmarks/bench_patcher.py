@@ -0,0 +1,101 @@
+import copy
+from pathlib import Path
+from types import SimpleNamespace
+
+from app_enabler.enable import verify_installation, verify_installation_static_set, verify_patched_static_set
+from app_enabler.patcher import (
+    FILE_MODIFIED,
+    _update_list_setting,
+    parse_file,
+    patch_file_set,
+    patch_setting,
+    patch_urlconf,
+    update_setting,
+    update_urlconf,
+)
+from tests.benchmarks.project import PROJECT_PACKAGE
+
+#: rounds of each benchmark; project files are restored before each round
+ROUNDS = 10
+
+
+def _restore(path: str):
+    """Build a pedantic setup function restoring the file original content."""
+    content = Path(path).read_bytes()
+
+    def setup():
+        Path(path).write_bytes(content)
+
+    return setup
+
+
+def test_update_setting(benchmark, bench_project):
+    """Patch the settings file."""
+    result = benchmark.pedantic(
+        update_setting,
+        args=(bench_project["settings"], bench_project["config"]),
+        setup=_restore(bench_project["settings"]),
+        rounds=ROUNDS,
+    )
+    assert result == FILE_MODIFIED
+
+
+def test_update_urlconf(benchmark, bench_project):
+    """Patch the urlconf file."""
+    result = benchmark.pedantic(
+        update_urlconf,
+        args=(bench_project["urlconf"], bench_project["config"]),
+        setup=_restore(bench_project["urlconf"]),
+        rounds=ROUNDS,
+    )
+    assert result == FILE_MODIFIED
+
+
+def test_update_list_setting(benchmark, bench_project):
+    """Merge the configuration items in INSTALLED_APPS."""
+    installed_apps = next(
+        node.value.elts
+        for node in parse_file(bench_project["settings"]).body
+        if getattr(node, "targets", None) and node.targets[0].id == "INSTALLED_APPS"
+    )
+    configuration = bench_project["config"]["installed-apps"]
+
+    def setup():
+        return (copy.deepcopy(installed_apps), configuration), {}
+
+    benchmark.pedantic(_update_list_setting, setup=setup, rounds=ROUNDS)
+
+
+def test_verify_installation(benchmark, bench_project):
+    """Verify the patched project by importing its modules."""
+    update_setting(bench_project["settings"], bench_project["config"])
+    update_urlconf(bench_project["urlconf"], bench_project["config"])
+    settings = SimpleNamespace(SETTINGS_MODULE=f"{PROJECT_PACKAGE}.settings", ROOT_URLCONF=f"{PROJECT_PACKAGE}.urls")
+
+    assert benchmark.pedantic(verify_installation, args=(settings, bench_project["config"]), rounds=ROUNDS)
+
+
+def test_verify_installation_static(benchmark, bench_project):
+    """Verify the patched project by inspecting its files."""
+    update_setting(bench_project["settings"], bench_project["config"])
+    update_urlconf(bench_project["urlconf"], bench_project["config"])
+
+    result = benchmark.pedantic(
+        verify_installation_static_set,
+        args=(bench_project["settings"], bench_project["urlconf"], [bench_project["config"]]),
+        rounds=ROUNDS,
+    )
+    assert result == [True]
+
+
+def test_verify_patched_static(benchmark, bench_project):
+    """Verify the patched modules in memory, as done after applying the configurations."""
+    parsed_settings, __ = patch_file_set(bench_project["settings"], patch_setting, [bench_project["config"]])
+    parsed_urlconf, __ = patch_file_set(bench_project["urlconf"], patch_urlconf, [bench_project["config"]])
+
+    result = benchmark.pedantic(
+        verify_patched_static_set,
+        args=(parsed_settings, parsed_urlconf, [bench_project["config"]]),
+        rounds=ROUNDS,
+    )
+    assert result == [True]
@@ -0,0 +1,20 @@
+import sys
+
+import pytest
+
+from tests.benchmarks.project import PROJECT_PACKAGE, generate_project
+
+#: number of entries of the synthetic project lists, settings and url patterns
+SIZES = (100, 1000, 5000)
+
+
+@pytest.fixture(params=SIZES, ids=lambda size: f"size-{size}")
+def bench_project(request, tmp_path):
+    """Generate a synthetic project, importable from the python path."""
+    project = generate_project(tmp_path, request.param)
+    project["size"] = request.param
+    sys.path.insert(0, str(tmp_path))
+    yield project
+    sys.path.remove(str(tmp_path))
+    for module in [name for name in sys.modules if name.split(".")[0] == PROJECT_PACKAGE]:
+        del sys.modules[module]
@@ -0,0 +1,118 @@
+import json
+from pathlib import Path
+from typing import Any, Dict
+
+#: name of the generated project package
+PROJECT_PACKAGE = "bench_project"
+
+
+def _nested_dict(depth: int, breadth: int) -> Dict[str, Any]:
+    """Build a dict nested ``depth`` levels, with ``breadth`` literal keys at each level."""
+    value = {f"leaf_{index}": index for index in range(breadth)}
+    for level in range(depth):
+        value = {f"level_{level}": value, **{f"key_{level}_{index}": f"value_{index}" for index in range(breadth)}}
+    return value
+
+
+def generate_settings(size: int) -> str:
+    """
+    Generate the source of a settings module.
+
+    ``INSTALLED_APPS`` and ``MIDDLEWARE`` have ``size`` entries, ``size`` scalar settings (each preceded by a comment)
+    are added, and ``size // 10`` deeply nested dict settings.
+
+    :param int size: size of the project
+    :return: settings source
+    """
+    lines = [
+        '"""Synthetic settings module."""',
+        "import os",
+        "",
+        "BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))",
+        "",
+        "INSTALLED_APPS = [",
+        *(f'    "app_{index}",' for index in range(size)),
+        '    "django.contrib.sites",',
+        "]",
+        "",
+        "MIDDLEWARE = [",
+        *(f'    "middleware_{index}.Middleware",' for index in range(size)),
+        "]",
+        "",
+        f'ROOT_URLCONF = "{PROJECT_PACKAGE}.urls"',
+        "",
+    ]
+    for index in range(size):
+        lines.extend([f"# setting number {index}", f"SETTING_{index} = {index}"])
+    for index in range(max(size // 10, 1)):
+        lines.append(f"NESTED_{index} = {json.dumps(_nested_dict(depth=8, breadth=3), indent=4)}")
+    return "\n".join(lines) + "\n"
+
+
+def generate_urlconf(size: int) -> str:
+    """
+    Generate the source of a urlconf module with ``size`` ``path()`` entries.
+
+    :param int size: size of the project
+    :return: urlconf source
+    """
+    lines = [
+        '"""Synthetic urlconf module."""',
+        "from django.urls import path",
+        "",
+        "",
+        "def view(request):",
+        "    pass",
+        "",
+        "",
+        "urlpatterns = [",
+        *(f'    path("page_{index}/", view, name="page_{index}"),' for index in range(size)),
+        "]",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def generate_config(size: int) -> Dict[str, Any]:
+    """
+    Generate an addon configuration touching every kind of setting of the generated project.
+
+    :param int size: size of the project
+    :return: addon configuration
+    """
+    return {
+        "package-name": "bench-addon",
+        "installed-apps": [
+            *(f"addon_app_{index}" for index in range(10)),
+            {"value": "addon_first", "next": "app_0"},
+            {"value": "addon_middle", "next": f"app_{size // 2}"},
+            {"value": "addon_sites", "next": "django.contrib.sites"},
+        ],
+        "settings": {
+            "MIDDLEWARE": [
+                {"value": "addon.Middleware", "next": f"middleware_{size - 1}.Middleware"},
+                "addon.LastMiddleware",
+            ],
+            f"SETTING_{size - 1}": "changed",
+            "ADDON_SETTING": _nested_dict(depth=8, breadth=3),
+        },
+        "urls": [["addon/", f"{PROJECT_PACKAGE}.addon_urls"]],
+    }
+
+
+def generate_project(root: Path, size: int) -> Dict[str, Any]:
+    """
+    Generate a synthetic project in the given directory.
+
+    :param Path root: directory where the project package is created
+    :param int size: size of the project
+    :return: paths of the ``settings`` and ``urlconf`` files and the addon ``config`` to apply
+    """
+    package = root / PROJECT_PACKAGE
+    package.mkdir(parents=True)
+    (package / "__init__.py").write_text("")
+    (package / "addon_urls.py").write_text("urlpatterns = []\n")
+    settings = package / "settings.py"
+    settings.write_text(generate_settings(size))
+    urlconf = package / "urls.py"
+    urlconf.write_text(generate_urlconf(size))
+    return {"settings": str(settings), "urlconf": str(urlconf), "config": generate_config(size)}
@@ -12,6 +12,14 @@ from tests.utils import get_project_dir, unload_django, working_directory
 pytest_plugins = "pytester"
 
 
+@pytest.fixture(autouse=True)
+def addons_cache_dir(tmp_path_factory, monkeypatch) -> Path:
+    """Store the installed addons index in a temporary directory."""
+    cache_dir = tmp_path_factory.mktemp("cache")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_dir))
+    return cache_dir
+
+
 @pytest.fixture
 def blog_package():
     """Ensure djangocms-blog is installed."""
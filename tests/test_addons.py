@@ -0,0 +1,95 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from app_enabler.addons import (
+    build_addons_index,
+    get_addons_index,
+    get_cache_dir,
+    get_distribution_entry,
+    list_addons,
+    normalize_name,
+)
+
+
+@pytest.fixture
+def sample_distribution(tmp_path, monkeypatch):
+    """Create a distribution without ``top_level.txt`` providing an addon configuration in the python path."""
+    site_packages = tmp_path / "site-packages"
+    dist_info = site_packages / "sample_addon-1.0.dist-info"
+    dist_info.mkdir(parents=True)
+    (dist_info / "METADATA").write_text("Metadata-Version: 2.1\nName: Sample.Addon\nVersion: 1.0\n")
+    (dist_info / "RECORD").write_text(
+        "sample_addon/__init__.py,,\n"
+        "sample_addon/addon.json,,\n"
+        "sample_helpers/__init__.py,,\n"
+        "sample_module.py,,\n"
+        "sample_addon-1.0.dist-info/METADATA,,\n"
+        "sample_addon-1.0.dist-info/RECORD,,\n"
+    )
+    for package in ("sample_addon", "sample_helpers"):
+        (site_packages / package).mkdir()
+        (site_packages / package / "__init__.py").write_text("")
+    (site_packages / "sample_module.py").write_text("")
+    (site_packages / "sample_addon" / "addon.json").write_text(json.dumps({"package-name": "sample-addon"}))
+    monkeypatch.syspath_prepend(str(site_packages))
+    return site_packages
+
+
+@pytest.mark.parametrize(
+    "name,expected",
+    (("djangocms-blog", "djangocms-blog"), ("Django_CMS.Blog", "django-cms-blog"), ("A__b", "a-b")),
+)
+def test_normalize_name(name, expected):
+    """Distribution names are normalized according to PEP 503."""
+    assert normalize_name(name) == expected
+
+
+def test_build_addons_index(blog_package, sample_distribution):
+    """Installed distributions are indexed with their modules and addon configurations."""
+    index = build_addons_index()
+
+    assert index["djangocms-blog"]["modules"] == ["djangocms_blog"]
+    assert index["djangocms-blog"]["addons"]["djangocms_blog"].endswith("djangocms_blog/addon.json")
+    assert index["pytest"]["modules"][0] == "_pytest"
+    assert index["pytest"]["addons"] == {}
+    # modules are detected from RECORD if top_level.txt is not available
+    assert index["sample-addon"] == {
+        "name": "Sample.Addon",
+        "version": "1.0",
+        "modules": ["sample_addon", "sample_helpers", "sample_module"],
+        "addons": {"sample_addon": str(sample_distribution / "sample_addon" / "addon.json")},
+    }
+
+
+def test_get_addons_index_cache(sample_distribution):
+    """Index is stored and rebuilt only when the environment changes."""
+    with patch("app_enabler.addons.build_addons_index", wraps=build_addons_index) as build_mock:
+        index = get_addons_index()
+        assert list(get_cache_dir().glob("addons-*.json"))
+        assert get_addons_index() == index
+        assert build_mock.call_count == 1
+
+        (sample_distribution / "other_module.py").write_text("")
+        get_addons_index()
+        assert build_mock.call_count == 2
+
+        get_addons_index(cache=False)
+        assert build_mock.call_count == 3
+
+
+def test_get_distribution_entry(sample_distribution):
+    """Distribution entry is retrieved by any non normalized name."""
+    assert get_distribution_entry("sample_addon")["name"] == "Sample.Addon"
+    assert get_distribution_entry("not-existing") is None
+
+
+def test_list_addons(blog_package, sample_distribution):
+    """Only distributions providing addon configurations are listed."""
+    names = [entry["name"] for entry in list_addons()]
+
+    assert names == sorted(names, key=str.lower)
+    assert "djangocms-blog" in names
+    assert "Sample.Addon" in names
+    assert "pytest" not in names
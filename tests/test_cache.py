@@ -0,0 +1,95 @@
+import ast
+import os
+from unittest.mock import patch
+
+from app_enabler.cache import CACHE_DIR, ProjectCache, fingerprint
+from app_enabler.patcher import get_patched_source, parse_file
+
+
+def test_cache_roundtrip(tmp_path):
+    """Cached values are returned as long as the source file is not changed."""
+    source = tmp_path / "settings.py"
+    source.write_text("DEBUG = True\n")
+    cache = ProjectCache(tmp_path)
+
+    assert cache.get("test", source) is None
+    cache.set("test", source, {"value": 1})
+
+    assert cache.get("test", source) == {"value": 1}
+    assert (tmp_path / CACHE_DIR / ".gitignore").read_text() == "*\n"
+    assert cache.get("other", source) is None
+
+
+def test_cache_invalidation(tmp_path):
+    """Cached values are invalidated when the source file or any dependency changes."""
+    source = tmp_path / "settings.py"
+    source.write_text("DEBUG = True\n")
+    dependency = tmp_path / "local.py"
+    dependency.write_text("DEBUG = False\n")
+    cache = ProjectCache(tmp_path)
+    cache.set("test", source, "value", dependencies=[dependency])
+
+    dependency.write_text("DEBUG = None\n")
+    assert cache.get("test", source) is None
+
+    cache.set("test", source, "value", dependencies=[dependency])
+    source.write_text("DEBUG = False\n")
+    assert cache.get("test", source) is None
+
+    cache.set("test", source, "value")
+    source.unlink()
+    assert cache.get("test", source) is None
+
+
+def test_cache_touched_file(tmp_path):
+    """Changing only the modification time of the file does not invalidate the cache."""
+    source = tmp_path / "settings.py"
+    source.write_text("DEBUG = True\n")
+    cache = ProjectCache(tmp_path)
+    cache.set("test", source, "value")
+    size, mtime, digest = fingerprint(source)
+
+    os.utime(source, ns=(mtime + 10**9, mtime + 10**9))
+
+    assert cache.get("test", source) == "value"
+
+
+def test_cache_corrupted(tmp_path):
+    """Corrupted cache entries are ignored."""
+    source = tmp_path / "settings.py"
+    source.write_text("DEBUG = True\n")
+    cache = ProjectCache(tmp_path)
+    cache.set("test", source, "value")
+    for entry in (tmp_path / CACHE_DIR).glob("*.pickle"):
+        entry.write_bytes(b"garbage")
+
+    assert cache.get("test", source) is None
+
+
+def test_parse_file_cache(tmp_path):
+    """Parsed modules are loaded from the cache."""
+    source = tmp_path / "settings.py"
+    source.write_text("DEBUG = True  # comment\n")
+    cache = ProjectCache(tmp_path)
+
+    parsed = parse_file(source, cache)
+    cached = parse_file(source, cache)
+
+    assert cached is not parsed
+    assert cached.body[0].value.value is True
+    source.write_text("DEBUG = False\n")
+    assert parse_file(source, cache).body[0].value.value is False
+
+
+def test_parse_file_cache_splice(tmp_path):
+    """Cached modules are spliced into the original source without parsing it again."""
+    source = tmp_path / "settings.py"
+    source.write_text("DEBUG = True  # comment\n")
+    cache = ProjectCache(tmp_path)
+    parse_file(source, cache)
+
+    with patch("app_enabler.patcher.ast.parse", wraps=ast.parse) as parse_mock:
+        cached = parse_file(source, cache)
+        cached.body[0].value = ast.Constant(value=False)
+        assert get_patched_source(cached) == "DEBUG = False  # comment\n"
+    parse_mock.assert_not_called()
@@ -1,4 +1,6 @@
+import json
 import os
+import subprocess
 import sys
 from pathlib import Path
 from subprocess import CalledProcessError
@@ -14,18 +16,20 @@ from tests.utils import working_directory
 
 def test_cli_install_wrong_dir(blog_package):
     """Running install command from the wrong directory raise an error."""
-    with patch("app_enabler.cli.install_fun") as install_fun:
+    with patch("app_enabler.install.install_packages") as install_fun:
         runner = CliRunner()
         result = runner.invoke(cli, ["--verbose", "install", "djangocms-blog"])
         assert result.exit_code == 1
         assert result.output.strip() == messages["no_managepy"].strip()
         install_fun.assert_called_once()
-        assert install_fun.call_args_list == [call("djangocms-blog", verbose=True, pip_options="")]
+        assert install_fun.call_args_list == [
+            call(("djangocms-blog",), verbose=True, pip_options="", requirements=(), log_file=None, wheelhouse=None)
+        ]
 
 
 def test_cli_sys_path(project_dir, blog_package):
     """Running install command from the wrong directory raise an error."""
-    with patch("app_enabler.cli.enable_fun"):
+    with patch("app_enabler.enable.enable_application"):
         # not using working_directory context manager to skip setting the sys.path (which is what we want to test)
         os.chdir(str(project_dir))
         runner = CliRunner()
@@ -36,24 +40,142 @@ def test_cli_sys_path(project_dir, blog_package):
 def test_cli_install(project_dir, blog_package):
     """Running install command calls the business functions with the correct arguments."""
     with (
-        patch("app_enabler.cli.enable_fun") as enable_fun,
-        patch("app_enabler.cli.install_fun") as install_fun,
+        patch("app_enabler.enable.enable_applications") as enable_fun,
+        patch("app_enabler.install.install_packages") as install_fun,
         working_directory(project_dir),
     ):
         runner = CliRunner()
         result = runner.invoke(cli, ["--verbose", "install", "djangocms-blog"])
         assert result.exit_code == 0
         install_fun.assert_called_once()
-        assert install_fun.call_args_list == [call("djangocms-blog", verbose=True, pip_options="")]
+        assert install_fun.call_args_list == [
+            call(("djangocms-blog",), verbose=True, pip_options="", requirements=(), log_file=None, wheelhouse=None)
+        ]
 
         enable_fun.assert_called_once()
-        assert enable_fun.call_args_list == [call("djangocms_blog", verbose=True)]
+        assert enable_fun.call_args_list == [
+            call(
+                ["djangocms_blog"],
+                verbose=True,
+                static_verify=False,
+                cache=False,
+                static_resolve=False,
+                manifest=False,
+            )
+        ]
+
+
+def test_cli_install_many(project_dir, blog_package):
+    """Packages from arguments and requirements files are installed and enabled in a single batch."""
+    requirements = project_dir / "requirements.txt"
+    requirements.write_text("# addons\n--index-url https://example.com\nsix  # helpers\nhttps://example.com/a.whl\n")
+    with (
+        patch("app_enabler.enable.enable_applications") as enable_fun,
+        patch("app_enabler.install.install_packages") as install_fun,
+        working_directory(project_dir),
+    ):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["install", "djangocms-blog", "django>=4", "-r", str(requirements)])
+        assert result.exit_code == 0
+        assert install_fun.call_args_list == [
+            call(
+                ("djangocms-blog", "django>=4"),
+                verbose=False,
+                pip_options="",
+                requirements=(str(requirements),),
+                log_file=None,
+                wheelhouse=None,
+            )
+        ]
+        assert enable_fun.call_args_list == [
+            call(
+                ["djangocms_blog", "django", "six"],
+                verbose=False,
+                static_verify=False,
+                cache=False,
+                static_resolve=False,
+                manifest=False,
+            )
+        ]
+
+
+@pytest.mark.parametrize("verbose", (True, False))
+def test_cli_install_pipeline(verbose: bool):
+    """Packages are installed and enabled by the pipeline."""
+    with patch("app_enabler.pipeline.install_and_enable") as install_and_enable:
+        install_and_enable.return_value = [messages["enable_error"].format(package="b")]
+        runner = CliRunner()
+        args = ["--verbose"] if verbose else []
+        result = runner.invoke(cli, [*args, "install", "--pipeline", "a", "b"])
+
+        assert install_and_enable.call_args_list == [
+            call(
+                ["a", "b"],
+                verbose=verbose,
+                pip_options="",
+                log_file=None,
+                wheelhouse=None,
+                static_verify=False,
+                cache=False,
+                static_resolve=False,
+                manifest=False,
+            )
+        ]
+        if verbose:
+            assert str(result.exception) == messages["enable_error"].format(package="b")
+        else:
+            assert result.output == messages["enable_error"].format(package="b")
+
+
+def test_cli_dry_run(project_dir, addon_config_minimal):
+    """Dry run prints the plan without applying the configurations."""
+    config_file = project_dir / "config.json"
+    config_file.write_text(json.dumps(addon_config_minimal))
+    settings_file = project_dir / "test_project" / "settings.py"
+    original_settings = settings_file.read_text()
+    with (
+        working_directory(project_dir),
+        patch("app_enabler.enable.apply_configuration_set") as apply_configuration_set,
+        patch("app_enabler.enable.enable_application") as enable_fun,
+        patch("app_enabler.django.load_addon", return_value=addon_config_minimal),
+        patch("app_enabler.install.install_packages") as install_fun,
+        patch("app_enabler.install.get_application_from_package", return_value="djangocms_blog"),
+    ):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--static-resolve", "apply", "--dry-run", str(config_file)])
+        assert result.exit_code == 0
+        assert '+    "djangocms_blog",' in result.output
+
+        result = runner.invoke(cli, ["--static-resolve", "enable", "--dry-run", "--json", "djangocms_blog"])
+        assert result.exit_code == 0
+        assert json.loads(result.output)["settings"]["file"] == str(settings_file)
+
+        result = runner.invoke(cli, ["--static-resolve", "install", "--dry-run", "djangocms-blog"])
+        assert result.exit_code == 0
+        assert '+    "djangocms_blog",' in result.output
+        assert install_fun.call_args[1]["dry_run"]
+
+        apply_configuration_set.assert_not_called()
+        enable_fun.assert_not_called()
+    assert settings_file.read_text() == original_settings
+
+
+def test_cli_install_no_package():
+    """Install command requires at least a package or a requirements file."""
+    with patch("app_enabler.install.install_packages") as install_fun:
+        runner = CliRunner()
+        result = runner.invoke(cli, ["install"])
+        assert result.exit_code == 2
+        install_fun.assert_not_called()
 
 
 @pytest.mark.parametrize("verbose", (True, False))
 def test_cli_install_error_verbose(verbose: bool):
     """Error raised during package install is reported to the user."""
-    with patch("app_enabler.cli.enable_fun") as enable_fun, patch("app_enabler.cli.install_fun") as install_fun:
+    with (
+        patch("app_enabler.enable.enable_applications") as enable_fun,
+        patch("app_enabler.install.install_packages") as install_fun,
+    ):
         install_fun.side_effect = CalledProcessError(cmd="cmd", returncode=1)
 
         runner = CliRunner()
@@ -74,18 +196,37 @@ def test_cli_install_error_verbose(verbose: bool):
             assert result.output == messages["install_error"].format(package="djangocms-blog")
 
         install_fun.assert_called_once()
-        assert install_fun.call_args_list == [call("djangocms-blog", verbose=verbose, pip_options="")]
+        assert install_fun.call_args_list == [
+            call(("djangocms-blog",), verbose=verbose, pip_options="", requirements=(), log_file=None, wheelhouse=None)
+        ]
 
         enable_fun.assert_not_called()
 
 
+def test_cli_install_error_output():
+    """Tail of the pip output is reported on installation error."""
+    with patch("app_enabler.install.install_packages") as install_fun:
+        install_fun.side_effect = CalledProcessError(
+            cmd="cmd", returncode=1, output="ERROR: No matching distribution\n"
+        )
+
+        runner = CliRunner()
+        result = runner.invoke(cli, ["install", "djangocms-blog", "--log-file", "pip.log"])
+
+        assert result.output == messages["install_error_output"].format(
+            message=messages["install_error"].format(package="djangocms-blog"),
+            output="ERROR: No matching distribution\n",
+        )
+        assert install_fun.call_args[1]["log_file"] == "pip.log"
+
+
 @pytest.mark.parametrize("verbose", (True, False))
 def test_cli_install_bad_application_verbose(verbose: bool):
     """Error due to bad application name is reported to the user."""
     with (
-        patch("app_enabler.cli.enable_fun") as enable_fun,
-        patch("app_enabler.cli.install_fun"),
-        patch("app_enabler.cli.get_application_from_package") as get_application_from_package,
+        patch("app_enabler.enable.enable_applications") as enable_fun,
+        patch("app_enabler.install.install_packages"),
+        patch("app_enabler.install.get_application_from_package") as get_application_from_package,
     ):
         get_application_from_package.return_value = None
 
@@ -112,7 +253,7 @@ def test_cli_install_bad_application_verbose(verbose: bool):
 @pytest.mark.parametrize("verbose", (True, False))
 def test_cli_enable(verbose: bool):
     """Running enable command calls the business functions with the correct arguments."""
-    with patch("app_enabler.cli.enable_fun") as enable_fun:
+    with patch("app_enabler.enable.enable_application") as enable_fun:
         runner = CliRunner()
         if verbose:
             args = ["--verbose"]
@@ -123,13 +264,22 @@ def test_cli_enable(verbose: bool):
         assert result.exit_code == 0
 
         enable_fun.assert_called_once()
-        assert enable_fun.call_args_list == [call("djangocms_blog", verbose=verbose)]
+        assert enable_fun.call_args_list == [
+            call(
+                "djangocms_blog",
+                verbose=verbose,
+                static_verify=False,
+                cache=False,
+                static_resolve=False,
+                manifest=False,
+            )
+        ]
 
 
 @pytest.mark.parametrize("verbose", (True, False))
 def test_cli_apply(verbose: bool):
     """Running apply command calls the business functions with the correct arguments."""
-    with patch("app_enabler.cli.apply_configuration_set") as apply_configuration_set:
+    with patch("app_enabler.enable.apply_configuration_set") as apply_configuration_set:
         runner = CliRunner()
         if verbose:
             args = ["--verbose"]
@@ -142,13 +292,80 @@ def test_cli_apply(verbose: bool):
         assert result.exit_code == 0
 
         apply_configuration_set.assert_called_once()
-        assert apply_configuration_set.call_args_list == [call([Path(config) for config in configs], verbose=verbose)]
+        assert apply_configuration_set.call_args_list == [
+            call(
+                [Path(config) for config in configs],
+                verbose=verbose,
+                static_verify=False,
+                cache=False,
+                static_resolve=False,
+                manifest=False,
+            )
+        ]
+
+
+def test_cli_static_verify():
+    """Static verification flag is passed to the business functions."""
+    with (
+        patch("app_enabler.enable.enable_application") as enable_fun,
+        patch("app_enabler.enable.apply_configuration_set") as apply_configuration_set,
+    ):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--static-verify", "enable", "djangocms_blog"])
+        assert result.exit_code == 0
+        assert enable_fun.call_args_list == [
+            call(
+                "djangocms_blog", verbose=False, static_verify=True, cache=False, static_resolve=False, manifest=False
+            )
+        ]
+
+        result = runner.invoke(cli, ["--static-verify", "apply", "/path/config1.json"])
+        assert result.exit_code == 0
+        assert apply_configuration_set.call_args_list == [
+            call(
+                [Path("/path/config1.json")],
+                verbose=False,
+                static_verify=True,
+                cache=False,
+                static_resolve=False,
+                manifest=False,
+            )
+        ]
+
+
+def test_cli_cache():
+    """Cache flag is passed to the business functions."""
+    with patch("app_enabler.enable.enable_application") as enable_fun:
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--cache", "enable", "djangocms_blog"])
+        assert result.exit_code == 0
+        assert enable_fun.call_args_list == [
+            call(
+                "djangocms_blog", verbose=False, static_verify=False, cache=True, static_resolve=False, manifest=False
+            )
+        ]
+
+
+def test_cli_static_resolve():
+    """Static resolution flag is passed to the business functions."""
+    with patch("app_enabler.enable.enable_application") as enable_fun:
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--static-resolve", "enable", "djangocms_blog"])
+        assert result.exit_code == 0
+        assert enable_fun.call_args_list == [
+            call(
+                "djangocms_blog", verbose=False, static_verify=False, cache=False, static_resolve=True, manifest=False
+            )
+        ]
 
 
 @pytest.mark.parametrize("verbose", (True, False))
 def test_cli_function(verbose: bool):
     """Running cli without commands return info message."""
-    with patch("app_enabler.cli.enable_fun") as enable_fun, patch("app_enabler.cli.install_fun") as install_fun:
+    with (
+        patch("app_enabler.enable.enable_application") as enable_fun,
+        patch("app_enabler.install.install") as install_fun,
+    ):
         runner = CliRunner()
         if verbose:
             args = ["--verbose"]
@@ -164,3 +381,48 @@ def test_cli_function(verbose: bool):
         else:
             assert result.exit_code == 0
             assert "Commands:" in result.output
+
+
+@pytest.mark.parametrize("verbose", (True, False))
+def test_cli_list_addons(blog_package, verbose):
+    """Installed addons are listed."""
+    runner = CliRunner()
+    args = ["--verbose"] if verbose else []
+    result = runner.invoke(cli, [*args, "list-addons"])
+
+    assert result.exit_code == 0
+    line = [line for line in result.output.splitlines() if line.startswith("djangocms-blog ")][0]
+    assert line.split(": ")[1].startswith("djangocms_blog")
+    assert line.endswith("addon.json)") == verbose
+
+
+def test_cli_serve(project_dir):
+    """Server is run until interrupted, removing the socket on exit."""
+    with (
+        working_directory(project_dir),
+        patch("app_enabler.server.EnablerServer.serve_forever", side_effect=KeyboardInterrupt) as serve_forever,
+    ):
+        runner = CliRunner()
+        result = runner.invoke(
+            cli, ["--verbose", "--static-verify", "--static-resolve", "serve", "--socket", "s.sock"]
+        )
+
+        assert result.exit_code == 0
+        assert result.output == messages["server_listening"].format(socket="s.sock")
+        serve_forever.assert_called_once()
+        assert not (project_dir / "s.sock").exists()
+
+
+def test_cli_import_time():
+    """Importing the cli does not import the business modules dependencies."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app_enabler.cli"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # each line of -X importtime output is "import time: self [us] | cumulative | imported package"
+    imported = {line.split("|")[-1].strip() for line in result.stderr.splitlines() if line.startswith("import time:")}
+
+    assert "app_enabler.cli" in imported
+    assert not imported & {"django", "astor", "pkg_resources", "importlib.metadata", "app_enabler.enable"}
@@ -1,4 +1,10 @@
-from app_enabler.django import get_settings_path, get_urlconf_path, load_addon
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from app_enabler.django import get_project_paths_static, get_settings_path, get_urlconf_path, load_addon
 from tests.utils import working_directory
 
 
@@ -14,6 +20,28 @@ def test_load_addon_no_application(blog_package):
     assert load_addon("djangocms_blog2") is None
 
 
+def test_load_addon_not_found(tmp_path):
+    """Modules without addon.json are not addons, while any other error is raised."""
+    package = tmp_path / "broken_addon"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (tmp_path / "plain_module.py").write_text("")
+    sys.path.insert(0, str(tmp_path))
+    try:
+        assert load_addon("broken_addon") is None
+        assert load_addon("plain_module") is None
+        assert load_addon("broken_addon.missing") is None
+
+        (package / "addon.json").write_bytes(b"{}")
+        with patch("app_enabler.django.resources.files", side_effect=RuntimeError("broken loader")):
+            with pytest.raises(RuntimeError):
+                load_addon("broken_addon")
+    finally:
+        sys.path.remove(str(tmp_path))
+        sys.modules.pop("broken_addon", None)
+        sys.modules.pop("plain_module", None)
+
+
 def test_get_settings_path(django_setup, project_dir):
     """Settings file path can is retrieved from settings in memory module."""
     from django.conf import settings
@@ -32,3 +60,29 @@ def test_get_urlconf_path(django_setup, project_dir):
         expected = project_dir / "test_project" / "urls.py"
         urlconf_file = get_urlconf_path(settings)
         assert str(urlconf_file) == str(expected)
+
+
+def test_get_project_paths_static(pytester, project_dir, teardown_django):
+    """Settings and urlconf file paths are resolved from manage.py and settings without initializing django."""
+    with working_directory(project_dir), patch.dict(os.environ), patch("django.setup") as setup_mock:
+        os.environ.pop("DJANGO_SETTINGS_MODULE", None)
+
+        settings_file, urlconf_file = get_project_paths_static()
+
+        assert settings_file == str(project_dir / "test_project" / "settings.py")
+        assert urlconf_file == str(project_dir / "test_project" / "urls.py")
+        setup_mock.assert_not_called()
+
+
+def test_get_project_paths_static_unresolved(pytester, project_dir, teardown_django):
+    """Paths are not resolved if the settings module or the urlconf can't be found statically."""
+    with working_directory(project_dir), patch.dict(os.environ):
+        os.environ["DJANGO_SETTINGS_MODULE"] = "test_project.not_existing"
+        assert get_project_paths_static() is None
+
+        os.environ["DJANGO_SETTINGS_MODULE"] = "test_project.settings"
+        settings_file = project_dir / "test_project" / "settings.py"
+        settings_file.write_text(settings_file.read_text().replace('"test_project.urls"', '"test_project." + "urls"'))
+        assert get_project_paths_static() is None
+
+        assert get_project_paths_static("not_existing.py") is None
@@ -1,12 +1,44 @@
+import io
 import json
 import os
 import sys
+import warnings
 from importlib import import_module
+from pathlib import Path
 from types import ModuleType
 from unittest.mock import patch
 
-from app_enabler.enable import _verify_settings, _verify_urlconf, apply_configuration_set, enable_application
-from app_enabler.errors import messages
+import pytest
+
+from app_enabler.cache import CACHE_DIR
+from app_enabler.enable import (
+    _import_project_modules,
+    _verify_settings,
+    _verify_urlconf,
+    apply_configuration_set,
+    apply_configuration_stream,
+    apply_configurations,
+    enable_application,
+    enable_applications,
+    iter_configuration_set,
+    output_plan,
+    plan_configurations,
+    verify_installation_static,
+)
+from app_enabler.errors import ConfigurationError, messages
+from app_enabler.patcher import (
+    PLAN_SETTING_ADD,
+    PLAN_SETTING_CHANGE,
+    PLAN_URLPATTERN_ADD,
+    parse_file,
+    patch_file_set,
+    patch_setting,
+    patch_urlconf,
+    setup_django,
+    update_setting,
+    update_urlconf,
+    write_file,
+)
 from tests.utils import working_directory
 
 
@@ -132,3 +164,300 @@ def test_apply_configuration_set(capsys, pytester, project_dir, teardown_django)
             for item in config:
                 assert _verify_settings(imported_settings, item)
                 assert _verify_urlconf(imported_urls, item)
+
+
+def test_apply_configuration_set_single_pass(capsys, pytester, project_dir, teardown_django):
+    """Configuration set is applied with a single parse / write / verification cycle."""
+
+    with (
+        working_directory(project_dir),
+        patch("app_enabler.enable.patch_file_set", wraps=patch_file_set) as patch_file_mock,
+        patch("app_enabler.enable._import_project_modules", wraps=_import_project_modules) as import_mock,
+    ):
+        os.environ["DJANGO_SETTINGS_MODULE"] = "test_project.settings"
+
+        apply_configuration_set([project_dir / "config" / "1.json", project_dir / "config" / "2.json"])
+
+        captured = capsys.readouterr()
+        assert "json1-a" in captured.out
+        assert "json1-b" in captured.out
+        assert "json2" in captured.out
+        assert [call[0][1] for call in patch_file_mock.call_args_list] == [patch_setting, patch_urlconf]
+        assert import_mock.call_count == 1
+
+
+def test_apply_configuration_set_static_verify_patched(capsys, project_dir):
+    """Static verification checks the patched modules without parsing the written files again."""
+
+    with (
+        working_directory(project_dir),
+        patch("app_enabler.enable.parse_file", wraps=parse_file) as parse_mock,
+        patch("app_enabler.patcher.parse_file", wraps=parse_file) as patcher_parse_mock,
+    ):
+        apply_configuration_set([project_dir / "config" / "2.json"], static_verify=True, static_resolve=True)
+
+    assert "json2" in capsys.readouterr().out
+    parse_mock.assert_not_called()
+    assert patcher_parse_mock.call_count == 2
+
+
+def test_apply_configuration_stream(capsys, pytester, project_dir, teardown_django):
+    """Streamed configurations are patched while being read, and project files are written once."""
+    events = []
+
+    def configurations():
+        for index in range(3):
+            events.append(f"read-{index}")
+            yield {"installed-apps": [f"stream_app_{index}"], "message": f"stream-{index}"}
+
+    def record_patch(parsed, application_config):
+        events.append(f"patch-{application_config['installed-apps'][0][-1]}")
+        return patch_setting(parsed, application_config)
+
+    with (
+        working_directory(project_dir),
+        patch("app_enabler.enable.patch_setting", side_effect=record_patch),
+        patch("app_enabler.enable.write_file", wraps=write_file) as write_mock,
+    ):
+        apply_configuration_stream(configurations(), static_verify=True, static_resolve=True)
+
+    assert events == ["read-0", "patch-0", "read-1", "patch-1", "read-2", "patch-2"]
+    assert write_mock.call_count == 2
+    settings = (project_dir / "test_project" / "settings.py").read_text()
+    assert '"stream_app_0"' in settings
+    assert '"stream_app_2"' in settings
+    captured = capsys.readouterr()
+    assert captured.out == "stream-0stream-1stream-2"
+
+
+def test_apply_configuration_set_json_lines(capsys, pytester, project_dir, teardown_django):
+    """JSON Lines files and standard input are streamed, invalid lines leave the project files untouched."""
+    settings_file = project_dir / "test_project" / "settings.py"
+    original_settings = settings_file.read_text()
+    config_file = project_dir / "config.jsonl"
+    config_file.write_text(json.dumps({"installed-apps": ["jsonl_app"], "message": "jsonl"}) + "\n\n")
+    stdin = io.StringIO(json.dumps({"installed-apps": ["stdin_app"], "message": "stdin"}) + "\n")
+
+    with working_directory(project_dir), patch("sys.stdin", stdin):
+        os.environ["DJANGO_SETTINGS_MODULE"] = "test_project.settings"
+        apply_configuration_set([Path("-"), config_file, project_dir / "config" / "2.json"], static_verify=True)
+
+        captured = capsys.readouterr()
+        assert captured.out == "stdinjsonljson2"
+        assert '"stdin_app"' in settings_file.read_text()
+        assert '"jsonl_app"' in settings_file.read_text()
+
+        settings_file.write_text(original_settings)
+        config_file.write_text(json.dumps({"installed-apps": ["jsonl_app"]}) + "\n" + '{"installed-apps": 1}\n')
+        with pytest.raises(ConfigurationError) as exc_info:
+            apply_configuration_set([config_file], static_verify=True)
+        assert exc_info.value.errors == [f"{config_file}:2: $.installed-apps: expected array, got int"]
+        assert settings_file.read_text() == original_settings
+
+
+def test_iter_configuration_set_json_lines_files(tmp_path):
+    """JSON Lines files are closed when iteration stops early, missing ones are skipped."""
+    config_file = tmp_path / "config.jsonl"
+    config_file.write_text(json.dumps({"installed-apps": ["first_app"]}) + "\n" + "not json\n")
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", ResourceWarning)
+        configurations = iter_configuration_set([tmp_path / "missing.jsonl", config_file])
+        assert next(configurations) == {"installed-apps": ["first_app"]}
+        configurations.close()
+
+    assert list(iter_configuration_set([tmp_path / "missing.jsonl"])) == []
+
+
+def test_apply_configurations_overridden_setting(capsys, pytester, project_dir, teardown_django):
+    """Settings overridden by a later configuration in the same set are not reported as errors."""
+
+    with working_directory(project_dir):
+        os.environ["DJANGO_SETTINGS_MODULE"] = "test_project.settings"
+        setup_django()
+
+        apply_configurations(
+            [
+                {"package-name": "first", "settings": {"MY_SETTING": "a"}, "message": "first-ok"},
+                {"package-name": "second", "settings": {"MY_SETTING": "b"}, "message": "second-ok"},
+            ]
+        )
+
+        captured = capsys.readouterr()
+        assert "first-ok" in captured.out
+        assert "second-ok" in captured.out
+        assert messages["verify_error"].format(package="first") not in captured.out
+
+
+def test_enable_static_verify(capsys, pytester, project_dir, addon_config, teardown_django):
+    """Enabling application with static verification does not re-import the project modules."""
+
+    with (
+        working_directory(project_dir),
+        patch("app_enabler.enable.load_addon") as load_addon,
+        patch("app_enabler.enable._import_project_modules") as import_mock,
+    ):
+        del addon_config["settings"]["AUTH_PASSWORD_VALIDATORS"][-1]
+        load_addon.return_value = addon_config
+        os.environ["DJANGO_SETTINGS_MODULE"] = "test_project.settings"
+
+        enable_application("djangocms_blog", static_verify=True)
+
+        captured = capsys.readouterr()
+        assert addon_config["message"] in captured.out
+        import_mock.assert_not_called()
+
+
+def test_verify_installation_static(pytester, project_dir, addon_config_minimal):
+    """Static verification detects missing settings and urlconfs."""
+    settings_file = project_dir / "test_project" / "settings.py"
+    urlconf_file = project_dir / "test_project" / "urls.py"
+    config = {**addon_config_minimal, "urls": [["", "djangocms_blog.taggit_urls"]]}
+
+    with warnings.catch_warnings(record=True):
+        assert not verify_installation_static(settings_file, urlconf_file, config)
+        assert not verify_installation_static(settings_file, urlconf_file, {"settings": {"NOT_EXISTING": 1}})
+    update_setting(settings_file, config)
+    assert not verify_installation_static(settings_file, urlconf_file, config)
+    update_urlconf(urlconf_file, config)
+    assert verify_installation_static(settings_file, urlconf_file, config)
+
+
+def test_enable_verbose_file_status(capsys, pytester, project_dir, addon_config_minimal, teardown_django):
+    """Status of patched files is reported in verbose mode."""
+
+    with working_directory(project_dir), patch("app_enabler.enable.load_addon") as load_addon:
+        load_addon.return_value = addon_config_minimal
+        os.environ["DJANGO_SETTINGS_MODULE"] = "test_project.settings"
+        settings_file = project_dir / "test_project" / "settings.py"
+        urlconf_file = project_dir / "test_project" / "urls.py"
+
+        enable_application("djangocms_blog", verbose=True)
+
+        captured = capsys.readouterr()
+        assert messages["file_status"].format(path=settings_file, status="modified") in captured.out
+        assert messages["file_status"].format(path=urlconf_file, status="modified") in captured.out
+
+        apply_configurations([addon_config_minimal], verbose=True)
+
+        captured = capsys.readouterr()
+        assert messages["file_status"].format(path=settings_file, status="unchanged") in captured.out
+        assert messages["file_status"].format(path=urlconf_file, status="unchanged") in captured.out
+
+
+def test_enable_cache(capsys, pytester, project_dir, addon_config_minimal, teardown_django):
+    """Project files paths are cached and django is not initialized on later runs with static verification."""
+
+    with working_directory(project_dir), patch("app_enabler.enable.load_addon") as load_addon:
+        load_addon.return_value = addon_config_minimal
+        os.environ["DJANGO_SETTINGS_MODULE"] = "test_project.settings"
+
+        enable_application("djangocms_blog", static_verify=True, cache=True)
+
+        captured = capsys.readouterr()
+        assert messages["verify_error"].format(package=addon_config_minimal["package-name"]) not in captured.out
+        assert (project_dir / CACHE_DIR / ".gitignore").exists()
+
+        with patch("app_enabler.enable.setup_django") as setup_mock:
+            enable_application("djangocms_blog", static_verify=True, cache=True)
+
+        captured = capsys.readouterr()
+        assert messages["verify_error"].format(package=addon_config_minimal["package-name"]) not in captured.out
+        setup_mock.assert_not_called()
+
+
+def test_enable_cache_root_urlconf(pytester, project_dir, teardown_django):
+    """Cached project paths are resolved again when ROOT_URLCONF changes."""
+    settings_file = project_dir / "test_project" / "settings.py"
+    other_urlconf = project_dir / "test_project" / "other_urls.py"
+    other_urlconf.write_text((project_dir / "test_project" / "urls.py").read_text())
+    config = {"urls": [["", "djangocms_blog.taggit_urls"]]}
+
+    with working_directory(project_dir):
+        apply_configurations([config], static_verify=True, cache=True, static_resolve=True)
+        assert "djangocms_blog.taggit_urls" in (project_dir / "test_project" / "urls.py").read_text()
+
+        settings_file.write_text(settings_file.read_text().replace('"test_project.urls"', '"test_project.other_urls"'))
+        apply_configurations([config], static_verify=True, cache=True, static_resolve=True)
+        assert "djangocms_blog.taggit_urls" in other_urlconf.read_text()
+
+
+def test_enable_static_resolve(capsys, pytester, project_dir, addon_config_minimal, teardown_django):
+    """Enabling application with static resolution and verification does not initialize django."""
+
+    with (
+        working_directory(project_dir),
+        patch("app_enabler.enable.load_addon") as load_addon,
+        patch("app_enabler.enable.setup_django") as setup_mock,
+    ):
+        load_addon.return_value = addon_config_minimal
+
+        enable_application("djangocms_blog", static_verify=True, static_resolve=True)
+
+        captured = capsys.readouterr()
+        assert messages["verify_error"].format(package=addon_config_minimal["package-name"]) not in captured.out
+        assert "djangocms_blog" in (project_dir / "test_project" / "settings.py").read_text()
+        setup_mock.assert_not_called()
+
+
+def test_enable_applications(capsys, pytester, project_dir, addon_config_minimal, teardown_django):
+    """Applications are enabled in a single batch."""
+
+    with (
+        working_directory(project_dir),
+        patch("app_enabler.enable.load_addon") as load_addon,
+        patch("app_enabler.enable.patch_file_set", wraps=patch_file_set) as patch_file_mock,
+    ):
+        other_config = {"package-name": "other", "installed-apps": ["other_app"], "message": "other-ok"}
+        load_addon.side_effect = {"djangocms_blog": addon_config_minimal, "other": other_config, "none": None}.get
+        os.environ["DJANGO_SETTINGS_MODULE"] = "test_project.settings"
+
+        enable_applications(["djangocms_blog", "other", "none"], static_verify=True)
+
+        captured = capsys.readouterr()
+        assert "other-ok" in captured.out
+        assert "error" not in captured.out.lower()
+        assert patch_file_mock.call_count == 2
+        assert patch_file_mock.call_args_list[0][0][1:3] == (patch_setting, [addon_config_minimal, other_config])
+
+
+def test_plan_configurations(capsys, pytester, project_dir, addon_config, teardown_django):
+    """Configuration plan is computed without writing files or importing project modules."""
+    settings_file = project_dir / "test_project" / "settings.py"
+    urlconf_file = project_dir / "test_project" / "urls.py"
+    original_settings = settings_file.read_bytes()
+    original_urlconf = urlconf_file.read_bytes()
+
+    with (
+        working_directory(project_dir),
+        patch("app_enabler.enable._import_project_modules") as import_mock,
+        patch("app_enabler.enable.setup_django") as setup_mock,
+    ):
+        plan = plan_configurations([addon_config], static_resolve=True)
+
+        output_plan(plan)
+        diff = capsys.readouterr().out
+        output_plan(plan, json_output=True)
+        json_plan = json.loads(capsys.readouterr().out)
+
+    import_mock.assert_not_called()
+    setup_mock.assert_not_called()
+    assert settings_file.read_bytes() == original_settings
+    assert urlconf_file.read_bytes() == original_urlconf
+    assert plan["settings"]["file"] == str(settings_file)
+    assert plan["urlconf"]["file"] == str(urlconf_file)
+    assert json_plan == plan
+    assert diff == plan["settings"]["diff"] + plan["urlconf"]["diff"]
+    assert f"--- {settings_file}" in diff
+    assert '+    "djangocms_blog",' in diff
+    assert {"operation": PLAN_SETTING_CHANGE, "setting": "USE_I18N", "value": False} in plan["settings"]["operations"]
+    assert {"operation": PLAN_SETTING_ADD, "setting": "META_SITE_PROTOCOL", "value": "https"} in plan["settings"][
+        "operations"
+    ]
+    assert {
+        "operation": PLAN_URLPATTERN_ADD,
+        "pattern": "",
+        "urlconf": "djangocms_blog.taggit_urls",
+    } in plan[
+        "urlconf"
+    ]["operations"]
@@ -0,0 +1,110 @@
+import json
+import os
+import shutil
+import sys
+
+from click.testing import CliRunner
+
+from app_enabler.cli import cli
+from app_enabler.fleet import apply_fleet, apply_project, discover_projects
+from app_enabler.patcher import FILE_MODIFIED, FILE_UNCHANGED
+from tests.utils import get_project_dir
+
+
+def _create_fleet(root):
+    """Create a tree of sample projects, some of which in excluded directories."""
+    for path in ("site_a", "group/site_b", "group/site_c", ".hidden/site", "node_modules/site", "site_a/nested"):
+        shutil.copytree(get_project_dir(), root / path)
+    (root / "venv").mkdir()
+    (root / "venv" / "pyvenv.cfg").write_text("")
+    shutil.copytree(get_project_dir(), root / "venv" / "site")
+    (root / "empty").mkdir()
+    return [root / "group" / "site_b", root / "group" / "site_c", root / "site_a"]
+
+
+def test_discover_projects(tmp_path):
+    """Projects are found in non excluded directories and are not nested."""
+    expected = _create_fleet(tmp_path)
+
+    assert discover_projects(tmp_path) == expected
+    assert discover_projects(tmp_path, max_depth=1) == [tmp_path / "site_a"]
+
+
+def test_apply_project(monkeypatch, tmp_path, addon_config_minimal):
+    """Configurations are applied to the project without initializing django."""
+    project = shutil.copytree(get_project_dir(), tmp_path / "site")
+    monkeypatch.setenv("DJANGO_SETTINGS_MODULE", "not_existing.settings")
+
+    result = apply_project(project, [addon_config_minimal])
+
+    # settings module of the project is not affected by the environment, which is restored afterwards
+    assert os.environ["DJANGO_SETTINGS_MODULE"] == "not_existing.settings"
+    assert result["error"] is None
+    assert result["settings"] == FILE_MODIFIED
+    assert result["urlconf"] == FILE_MODIFIED
+    assert result["verified"] == [True]
+    assert result["elapsed"] > 0
+    assert "djangocms_blog" in (project / "test_project" / "settings.py").read_text()
+    assert "test_project" not in sys.modules
+
+
+def test_apply_project_error(tmp_path, addon_config_minimal):
+    """Projects which can't be resolved statically are reported as errors."""
+    project = tmp_path / "site"
+    project.mkdir()
+    (project / "manage.py").write_text("import os\n")
+
+    result = apply_project(project, [addon_config_minimal])
+
+    assert result["error"]
+    assert result["settings"] is None
+
+
+def test_apply_fleet(tmp_path, addon_config_minimal):
+    """Configurations are applied to all the projects in worker processes."""
+    projects = _create_fleet(tmp_path)
+    (projects[0] / "test_project" / "settings.py").write_text("broken(\n")
+
+    results = apply_fleet(projects, [addon_config_minimal], workers=2)
+
+    assert [result["project"] for result in results] == [str(project) for project in projects]
+    assert results[0]["error"].startswith("SyntaxError")
+    for result, project in zip(results[1:], projects[1:]):
+        assert result["error"] is None
+        assert result["verified"] == [True]
+        assert "djangocms_blog" in (project / "test_project" / "settings.py").read_text()
+    assert apply_fleet(projects[1:], [addon_config_minimal], workers=1)[0]["settings"] == FILE_UNCHANGED
+
+
+def test_cli_fleet(tmp_path, addon_config_minimal):
+    """Fleet command reports the results of each project."""
+    projects = _create_fleet(tmp_path / "root")
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps(addon_config_minimal))
+    runner = CliRunner()
+
+    result = runner.invoke(cli, ["fleet", str(tmp_path / "root"), str(config_file), "--workers", "2"])
+    assert result.exit_code == 0
+    for project in projects:
+        assert f"{project}: settings modified, urlconf modified, verified 1/1" in result.output
+
+    result = runner.invoke(cli, ["fleet", "--json", str(tmp_path / "root"), str(config_file)])
+    assert result.exit_code == 0
+    # summary is written to stderr, after the results
+    output, summary = result.output.rstrip("\n").rsplit("\n", 1)
+    assert [item["settings"] for item in json.loads(output)] == [FILE_UNCHANGED] * 3
+    assert summary.startswith("3 projects, 0 failed in ")
+
+    (projects[0] / "test_project" / "urls.py").unlink()
+    result = runner.invoke(cli, ["fleet", str(tmp_path / "root"), str(config_file)])
+    assert result.exit_code == 1
+
+
+def test_cli_fleet_workers(tmp_path):
+    """Number of workers must be positive."""
+    runner = CliRunner()
+
+    for workers in ("0", "-1"):
+        result = runner.invoke(cli, ["fleet", str(tmp_path), "config.json", "--workers", workers])
+        assert result.exit_code == 2
+        assert "--workers" in result.output
@@ -1,15 +1,30 @@
+import hashlib
+import re
+import shutil
 import sys
+import zipfile
+from pathlib import Path
 from subprocess import CalledProcessError
 from unittest.mock import patch
 
 import pytest
 
-from app_enabler.install import get_application_from_package, install
+from app_enabler.install import (
+    OUTPUT_TAIL,
+    WHEELHOUSE_INDEX,
+    build_wheels,
+    get_application_from_package,
+    install,
+    install_packages,
+    read_requirements,
+    store_wheels,
+)
 
 
 def test_get_application_not_existing():
     """Retrieving the main module from a non existing package returns None."""
     assert get_application_from_package("bla_bla") is None
+    assert get_application_from_package("~=1.0") is None
 
 
 @pytest.mark.parametrize(
@@ -18,6 +33,9 @@ def test_get_application_not_existing():
         ("pytest", "_pytest"),
         ("django", "django"),
         ("six", "six"),
+        ("Django>=3.2,<6", "django"),
+        ("six ; python_version > '3'", "six"),
+        ("pytest[testing]", "_pytest"),
     ),
 )
 def test_get_application(package, expected):
@@ -25,6 +43,19 @@ def test_get_application(package, expected):
     assert get_application_from_package(package) == expected
 
 
+def test_get_application_addon_module(tmp_path, monkeypatch):
+    """Module providing the addon configuration is preferred over the first module."""
+    dist_info = tmp_path / "sample_addon-1.0.dist-info"
+    dist_info.mkdir()
+    (dist_info / "METADATA").write_text("Metadata-Version: 2.1\nName: sample-addon\nVersion: 1.0\n")
+    (dist_info / "top_level.txt").write_text("a_helpers\nsample_addon\n")
+    (tmp_path / "sample_addon").mkdir()
+    (tmp_path / "sample_addon" / "addon.json").write_text("{}")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    assert get_application_from_package("sample-addon>=1.0") == "sample_addon"
+
+
 def test_install_real():
     """Package is installed via app_enabler.install.install function."""
     assert install("djangocms_blog")
@@ -34,33 +65,176 @@ def test_install_real():
     assert djangocms_blog
 
 
+def _mock_popen(popen, lines, returncode=0):
+    """Set the output lines and return code of the mocked pip process."""
+    process = popen.return_value.__enter__.return_value
+    process.stdout = iter(lines)
+    process.wait.return_value = returncode
+    return process
+
+
 def test_install_args(capsys):
     """Package is installed via app_enabler.install.install function."""
-    with patch("subprocess.check_output") as check_output:
-        check_output.return_value = b"Installed"
+    with patch("subprocess.Popen") as popen:
+        _mock_popen(popen, ["Collecting djangocms_blog\n", "Installed\n"])
         args = [sys.executable, "-mpip", "install", "--disable-pip-version-check", "-v", "djangocms_blog"]
         installed = install("djangocms_blog", pip_options="-v", verbose=True)
 
         captured = capsys.readouterr()
         assert installed
-        assert check_output.call_args[0][0] == args
+        assert popen.call_args[0][0] == args
         assert f"python path: {sys.executable}" in captured.out
         assert f"packages install command: {sys.executable}" in captured.out
+        assert re.search(r"^\[ +\d+\.\ds\] Installed$", captured.out, re.MULTILINE)
+        assert "pip completed in" in captured.out
 
 
-def test_install_error(capsys):
-    """Package installation error report detailed message."""
-    with patch("subprocess.check_output") as check_output:
-        check_output.side_effect = CalledProcessError(cmd="cmd", returncode=1)
+def test_install_stream(capsys, tmp_path):
+    """Pip output is streamed to stdout and to the log file."""
+    log_file = tmp_path / "pip.log"
+    with patch("subprocess.Popen") as popen:
+        _mock_popen(popen, ["Collecting djangocms_blog\n", "Installed\n"])
 
-        with pytest.raises(CalledProcessError) as exception:
-            installed = install("djangocms_blog")
-            captured = capsys.readouterr()
+        assert install("djangocms_blog", log_file=str(log_file))
+
+        captured = capsys.readouterr()
+        assert captured.out == "Collecting djangocms_blog\nInstalled\n"
+        assert log_file.read_text() == "Collecting djangocms_blog\nInstalled\n"
 
-            assert installed is None
-            assert exception.cmd
-            assert exception.return_code == 1
-            assert exception.output
 
-            assert f"python path: {sys.executable}" in captured.out
-            assert f"packages install command: {sys.executable}" in captured.out
+def test_install_error(capsys):
+    """Package installation error report the tail of the pip output."""
+    with patch("subprocess.Popen") as popen:
+        _mock_popen(popen, [f"line {num}\n" for num in range(100)], returncode=1)
+
+        with pytest.raises(CalledProcessError) as exception:
+            install("djangocms_blog")
+
+        assert exception.value.returncode == 1
+        assert exception.value.cmd[-1] == "djangocms_blog"
+        assert exception.value.output == "".join(f"line {num}\n" for num in range(100 - OUTPUT_TAIL, 100))
+        assert capsys.readouterr().out.count("line") == 100
+
+
+def test_install_packages_args():
+    """Packages and requirements files are installed with a single pip invocation."""
+    with patch("subprocess.Popen") as popen:
+        _mock_popen(popen, [])
+        args = [sys.executable, "-mpip", "install", "--disable-pip-version-check", "-q", "-r", "req.txt", "a", "b>1"]
+
+        assert install_packages(["a", "b>1"], requirements=["req.txt"])
+        assert popen.call_count == 1
+        assert popen.call_args[0][0] == args
+
+
+def test_read_requirements(tmp_path):
+    """Requirement strings are read from requirements files."""
+    (tmp_path / "base.txt").write_text("django>=4.2  # framework\n")
+    (tmp_path / "requirements.txt").write_text(
+        "-r base.txt\n"
+        "--index-url https://example.com/simple\n"
+        "# addons\n"
+        "\n"
+        "djangocms-blog~=2.0\n"
+        "-e git+https://example.com/repo.git#egg=addon\n"
+        "https://example.com/addon.whl\n"
+        "addon @ https://example.com/addon.whl\n"
+    )
+
+    assert read_requirements(tmp_path / "requirements.txt") == [
+        "django>=4.2",
+        "djangocms-blog~=2.0",
+        "addon @ https://example.com/addon.whl",
+    ]
+
+
+@pytest.mark.parametrize("option", ("-r base.txt", "-rbase.txt", "--requirement base.txt", "--requirement=base.txt"))
+def test_read_requirements_nested(tmp_path, option):
+    """Nested requirements files are followed in all the forms accepted by pip."""
+    (tmp_path / "base.txt").write_text("django>=4.2\n")
+    (tmp_path / "requirements.txt").write_text(f"{option}\nsix\n")
+
+    assert read_requirements(tmp_path / "requirements.txt") == ["django>=4.2", "six"]
+
+
+def _make_wheel(directory: Path, name: str = "sample_wheel", version: str = "1.0") -> Path:
+    """Create a minimal pure python wheel in the directory."""
+    dist_info = f"{name}-{version}.dist-info"
+    files = {
+        f"{name}/__init__.py": "",
+        f"{dist_info}/METADATA": f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n",
+        f"{dist_info}/WHEEL": "Wheel-Version: 1.0\nGenerator: test\nRoot-Is-Purelib: true\nTag: py3-none-any\n",
+    }
+    record = "".join(f"{path},,\n" for path in files) + f"{dist_info}/RECORD,,\n"
+    wheel = directory / f"{name}-{version}-py3-none-any.whl"
+    with zipfile.ZipFile(wheel, "w") as archive:
+        for path, content in files.items():
+            archive.writestr(path, content)
+        archive.writestr(f"{dist_info}/RECORD", record)
+    return wheel
+
+
+def test_install_wheelhouse(tmp_path, monkeypatch):
+    """Packages are built into the wheelhouse and installed offline from it."""
+    # local simple index (PEP 503), ignored by pip when installing with --no-index
+    source_dir = tmp_path / "index" / "sample-wheel"
+    source_dir.mkdir(parents=True)
+    wheel = _make_wheel(source_dir)
+    (source_dir / "index.html").write_text(f'<a href="{wheel.name}">{wheel.name}</a>')
+    index_url = (tmp_path / "index").as_uri()
+    wheelhouse = tmp_path / "wheelhouse"
+
+    with patch("app_enabler.install.build_wheels", wraps=build_wheels) as build_mock:
+        # wheels are not in the wheelhouse: they are fetched from the (local) index and stored
+        monkeypatch.setenv("PIP_TARGET", str(tmp_path / "project_1"))
+        assert install_packages(["sample-wheel"], wheelhouse=str(wheelhouse), pip_options=f"--index-url {index_url}")
+        assert build_mock.call_count == 1
+        assert (tmp_path / "project_1" / "sample_wheel" / "__init__.py").exists()
+        assert (wheelhouse / wheel.name).read_bytes() == wheel.read_bytes()
+        digest = hashlib.sha256(wheel.read_bytes()).hexdigest()
+        assert (wheelhouse / WHEELHOUSE_INDEX).read_text() == f"{digest}  {wheel.name}\n"
+
+        # wheels are reused from the wheelhouse without any index
+        shutil.rmtree(tmp_path / "index")
+        monkeypatch.setenv("PIP_TARGET", str(tmp_path / "project_2"))
+        assert install_packages(["sample-wheel"], wheelhouse=str(wheelhouse))
+        assert build_mock.call_count == 1
+        assert (tmp_path / "project_2" / "sample_wheel" / "__init__.py").exists()
+
+
+def test_install_wheelhouse_error(tmp_path):
+    """Pip errors while checking the wheelhouse are reported instead of building the wheels."""
+    requirements_file = tmp_path / "missing.txt"
+
+    with patch("app_enabler.install.build_wheels") as build_mock, pytest.raises(CalledProcessError) as exception:
+        install_packages([], requirements=[requirements_file], wheelhouse=str(tmp_path / "wheelhouse"))
+    assert "Could not open requirements file" in exception.value.output
+    build_mock.assert_not_called()
+
+
+def test_store_wheels(tmp_path):
+    """Wheels are stored once and never replaced by different builds."""
+    build_dir = tmp_path / "build"
+    build_dir.mkdir()
+    wheelhouse = tmp_path / "wheelhouse"
+    wheelhouse.mkdir()
+    wheel = _make_wheel(build_dir)
+    other = _make_wheel(build_dir, "other_wheel")
+    stored_content = wheel.read_bytes()
+
+    assert store_wheels([wheel], wheelhouse) == [wheelhouse / wheel.name]
+    _make_wheel(build_dir).write_bytes(stored_content + b"rebuilt")
+    assert store_wheels([wheel, other], wheelhouse) == [wheelhouse / wheel.name, wheelhouse / other.name]
+
+    assert (wheelhouse / wheel.name).read_bytes() == stored_content
+    assert len((wheelhouse / WHEELHOUSE_INDEX).read_text().splitlines()) == 2
+
+
+def test_install_packages_dry_run(tmp_path):
+    """Dry run only reports the packages pip would install, without building wheels."""
+    with patch("subprocess.Popen") as popen, patch("app_enabler.install.build_wheels") as build_mock:
+        _mock_popen(popen, [])
+
+        assert install_packages(["a"], dry_run=True, wheelhouse=str(tmp_path))
+        assert popen.call_args[0][0][-5:] == ["--dry-run", "--no-index", "--find-links", str(tmp_path), "a"]
+        build_mock.assert_not_called()
@@ -0,0 +1,109 @@
+import json
+import subprocess
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from app_enabler.cli import cli
+from app_enabler.enable import apply_configurations
+from app_enabler.errors import LockTimeoutError, messages
+from app_enabler.lock import LOCK_FILE, project_lock
+from app_enabler.patcher import patch_file_set
+from tests.utils import working_directory
+
+
+def test_project_lock_timeout(tmp_path):
+    """Lock held by another holder is waited for up to the timeout."""
+    with project_lock(tmp_path):
+        assert (tmp_path / LOCK_FILE).exists()
+        start = time.monotonic()
+        with pytest.raises(LockTimeoutError) as exc_info:
+            with project_lock(tmp_path, timeout=0.1):
+                pass  # pragma: no cover
+        assert time.monotonic() - start >= 0.1
+        assert str(exc_info.value) == messages["lock_timeout"].format(path=tmp_path / LOCK_FILE, timeout=0.1)
+    with project_lock(tmp_path, timeout=0):
+        pass
+
+
+def test_project_lock_wait(tmp_path):
+    """Lock is acquired as soon as the other holder releases it."""
+    acquired = threading.Event()
+    events = []
+
+    def hold_lock():
+        with project_lock(tmp_path):
+            acquired.set()
+            time.sleep(0.2)
+            events.append("released")
+
+    thread = threading.Thread(target=hold_lock)
+    thread.start()
+    acquired.wait()
+    with project_lock(tmp_path, timeout=5):
+        events.append("acquired")
+    thread.join()
+    assert events == ["released", "acquired"]
+
+
+def test_concurrent_apply(project_dir):
+    """Concurrent runs on the same project are serialized, thus no change is lost."""
+
+    def slow_update(*args, **kwargs):
+        # widen the window between reading and writing the project files
+        time.sleep(0.1)
+        return patch_file_set(*args, **kwargs)
+
+    def apply(app):
+        apply_configurations([{"installed-apps": [app]}], static_verify=True, static_resolve=True)
+
+    with working_directory(project_dir), patch("app_enabler.enable.patch_file_set", side_effect=slow_update):
+        threads = [threading.Thread(target=apply, args=(app,)) for app in ("first_app", "second_app")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    settings = (project_dir / "test_project" / "settings.py").read_text()
+    assert '"first_app"' in settings
+    assert '"second_app"' in settings
+
+
+def test_cli_lock_timeout(project_dir):
+    """Lock timeout is reported without changing the project files."""
+    config_file = project_dir / "config.json"
+    config_file.write_text(json.dumps({"installed-apps": ["locked_app"]}))
+
+    with working_directory(project_dir), project_lock():
+        runner = CliRunner()
+        result = runner.invoke(
+            cli, ["--static-verify", "--static-resolve", "--lock-timeout", "0", "apply", str(config_file)]
+        )
+
+    assert result.exit_code == 1
+    assert result.output == messages["lock_timeout"].format(path=LOCK_FILE, timeout=0)
+    assert '"locked_app"' not in (project_dir / "test_project" / "settings.py").read_text()
+
+
+def test_enable_no_untracked_files(project_dir, addon_config_minimal):
+    """Lock file is created in the git ignored cache directory, thus no untracked file is added to the project."""
+    subprocess.run(["git", "init", "-q"], cwd=project_dir, check=True)
+    subprocess.run(["git", "add", "-A"], cwd=project_dir, check=True)
+
+    with working_directory(project_dir), patch("app_enabler.enable.load_addon", return_value=addon_config_minimal):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--static-verify", "--static-resolve", "enable", "djangocms_blog"])
+
+    assert result.exit_code == 0
+    assert (project_dir / LOCK_FILE).exists()
+    status = subprocess.run(
+        ["git", "status", "--porcelain", "--untracked-files=all"],
+        cwd=project_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert [line for line in status.stdout.splitlines() if line.startswith("??")] == []
@@ -0,0 +1,153 @@
+import json
+import os
+import subprocess
+from unittest.mock import patch
+
+from click.testing import CliRunner
+
+from app_enabler.cli import cli
+from app_enabler.enable import _skip_applied, apply_configuration_set, enable_application
+from app_enabler.errors import messages
+from app_enabler.manifest import MANIFEST_FILE, ApplyManifest, configuration_hash
+from tests.utils import working_directory
+
+
+def test_manifest_record(project_dir, addon_config_minimal):
+    """Configurations recorded by the last run are applied as long as the project files are unchanged."""
+    settings_file = project_dir / "test_project" / "settings.py"
+    urlconf_file = project_dir / "test_project" / "urls.py"
+    other_config = {"installed-apps": ["other_app"]}
+
+    manifest = ApplyManifest(project_dir)
+    assert not manifest.is_applied([addon_config_minimal])
+    manifest.record(str(settings_file), str(urlconf_file), [addon_config_minimal])
+
+    manifest = ApplyManifest(project_dir)
+    assert manifest.is_applied([addon_config_minimal])
+    assert not manifest.is_applied([addon_config_minimal, other_config])
+    data = json.loads((project_dir / MANIFEST_FILE).read_text())
+    assert data["configurations"] == [configuration_hash(addon_config_minimal)]
+    assert set(data["files"]) == {os.path.join("test_project", "settings.py"), os.path.join("test_project", "urls.py")}
+
+    # each run replaces the recorded configurations, set and order must match
+    manifest.record(str(settings_file), str(urlconf_file), [addon_config_minimal, other_config])
+    manifest = ApplyManifest(project_dir)
+    assert manifest.is_applied([addon_config_minimal, other_config])
+    assert not manifest.is_applied([other_config, addon_config_minimal])
+    assert not manifest.is_applied([addon_config_minimal])
+
+    # any other change to the files invalidates the manifest
+    settings_file.write_text(settings_file.read_text() + "\nDEBUG = False\n")
+    manifest = ApplyManifest(project_dir)
+    assert not manifest.is_applied([addon_config_minimal])
+    manifest.record(str(settings_file), str(urlconf_file), [other_config])
+    assert ApplyManifest(project_dir).is_applied([other_config])
+
+    with patch.dict(os.environ, {"DJANGO_SETTINGS_MODULE": "other_project.settings"}):
+        assert not ApplyManifest(project_dir).is_applied([other_config])
+    with patch("app_enabler.manifest.__version__", "0.0.0"):
+        assert not ApplyManifest(project_dir).is_applied([other_config])
+
+
+def test_enable_manifest(capsys, pytester, project_dir, addon_config_minimal, teardown_django):
+    """Enabling an already enabled application skips django initialization and the files update."""
+    addon_config_minimal["message"] = "enabled"
+
+    with working_directory(project_dir), patch("app_enabler.enable.load_addon", return_value=addon_config_minimal):
+        os.environ["DJANGO_SETTINGS_MODULE"] = "test_project.settings"
+        enable_application("djangocms_blog", static_verify=True, manifest=True)
+        assert capsys.readouterr().out == "enabled"
+        assert (project_dir / MANIFEST_FILE).exists()
+
+        with (
+            patch("app_enabler.enable.setup_django") as setup_mock,
+            patch("app_enabler.enable.patch_file_set") as update_mock,
+        ):
+            enable_application("djangocms_blog", verbose=True, manifest=True)
+        setup_mock.assert_not_called()
+        update_mock.assert_not_called()
+        assert capsys.readouterr().out == messages["manifest_applied"].format(path=MANIFEST_FILE) + "enabled"
+
+
+def test_apply_manifest(capsys, pytester, project_dir, addon_config_minimal, teardown_django):
+    """Configurations are recorded only if all of them are verified, changed configurations are applied again."""
+    config_file = project_dir / "config.json"
+    config_file.write_text(json.dumps([addon_config_minimal, {"settings": {"NEW_SETTING": 1}, "message": "applied"}]))
+
+    with (
+        working_directory(project_dir),
+        patch("app_enabler.enable._verify_urlconf_static", side_effect=[True, False]),
+    ):
+        os.environ["DJANGO_SETTINGS_MODULE"] = "test_project.settings"
+        apply_configuration_set([config_file], static_verify=True, manifest=True)
+        assert not (project_dir / MANIFEST_FILE).exists()
+
+    with working_directory(project_dir):
+        config_file.write_text(json.dumps(addon_config_minimal))
+        apply_configuration_set([config_file], static_verify=True, manifest=True)
+        with patch("app_enabler.enable.patch_file_set") as update_mock:
+            apply_configuration_set([config_file], static_verify=True, manifest=True)
+        update_mock.assert_not_called()
+
+
+def test_apply_manifest_overridden(capsys, pytester, project_dir, teardown_django):
+    """Configuration overridden by a later run is applied again."""
+    settings_file = project_dir / "test_project" / "settings.py"
+    first_file = project_dir / "first.json"
+    first_file.write_text(json.dumps({"settings": {"USE_I18N": False}}))
+    second_file = project_dir / "second.json"
+    second_file.write_text(json.dumps({"settings": {"USE_I18N": True}}))
+
+    with working_directory(project_dir):
+        os.environ["DJANGO_SETTINGS_MODULE"] = "test_project.settings"
+        for config_file in (first_file, second_file, first_file):
+            apply_configuration_set([config_file], verbose=True, static_verify=True, manifest=True)
+
+    assert "USE_I18N = False" in settings_file.read_text()
+    assert messages["manifest_applied"].format(path=MANIFEST_FILE) not in capsys.readouterr().out
+
+
+def test_skip_applied_changed_files(project_dir, addon_config_minimal):
+    """Manifest is checked again while holding the project lock before skipping the configurations."""
+    settings_file = project_dir / "test_project" / "settings.py"
+    urlconf_file = project_dir / "test_project" / "urls.py"
+
+    with working_directory(project_dir):
+        ApplyManifest().record(str(settings_file), str(urlconf_file), [addon_config_minimal])
+        manifest = ApplyManifest()
+        assert _skip_applied([addon_config_minimal], manifest)
+
+        # files changed by another process after the manifest has been loaded
+        settings_file.write_text(settings_file.read_text() + "\nDEBUG = False\n")
+        assert manifest.is_applied([addon_config_minimal])
+        assert not _skip_applied([addon_config_minimal], manifest)
+
+
+def test_cli_manifest():
+    """Manifest flag is passed to the business functions."""
+    with patch("app_enabler.enable.enable_application") as enable_fun:
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--manifest", "enable", "djangocms_blog"])
+        assert result.exit_code == 0
+        assert enable_fun.call_args[1]["manifest"] is True
+
+
+def test_manifest_no_untracked_files(project_dir, addon_config_minimal):
+    """Manifest is recorded in the git ignored cache directory, thus no untracked file is added to the project."""
+    subprocess.run(["git", "init", "-q"], cwd=project_dir, check=True)
+    subprocess.run(["git", "add", "-A"], cwd=project_dir, check=True)
+
+    with working_directory(project_dir), patch("app_enabler.enable.load_addon", return_value=addon_config_minimal):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--static-verify", "--static-resolve", "--manifest", "enable", "djangocms_blog"])
+
+    assert result.exit_code == 0
+    assert (project_dir / MANIFEST_FILE).exists()
+    status = subprocess.run(
+        ["git", "status", "--porcelain", "--untracked-files=all"],
+        cwd=project_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert [line for line in status.stdout.splitlines() if line.startswith("??")] == []
@@ -3,6 +3,7 @@ import os
 import sys
 import warnings
 from importlib import import_module
+from unittest.mock import patch
 
 import astor
 import pytest
@@ -10,7 +11,34 @@ from django.urls import LocalePrefixPattern, URLPattern, URLResolver
 
 from app_enabler.enable import _verify_settings, _verify_urlconf
 from app_enabler.errors import messages
-from app_enabler.patcher import setup_django, update_setting, update_urlconf
+from app_enabler.patcher import (
+    FILE_CREATED,
+    FILE_MODIFIED,
+    FILE_UNCHANGED,
+    PLAN_DICT_SET,
+    PLAN_IMPORT_ADD,
+    PLAN_LIST_INSERT,
+    PLAN_SETTING_ADD,
+    PLAN_SETTING_CHANGE,
+    PLAN_URLPATTERN_ADD,
+    _ast_dict_key_index,
+    _ast_dict_set,
+    _ast_get_constant_value,
+    _ast_get_object_from_value,
+    _ast_get_urlpattern,
+    _update_list_setting,
+    get_settings_module,
+    parse_file,
+    patch_setting,
+    patch_urlconf,
+    plan_update_set,
+    setup_django,
+    update_setting,
+    update_setting_set,
+    update_urlconf,
+    update_urlconf_set,
+    write_file,
+)
 from tests.utils import working_directory
 
 
@@ -134,3 +162,241 @@ def test_update_urlconf_multiple_urlconf(pytester, django_setup, project_dir, ad
     assert instances_i18n == 1
     assert instances_view == 1
     assert instances_sitemap == 1
+
+
+def test_update_setting_set(pytester, project_dir, addon_config, addon_config_minimal):
+    """Settings file is parsed and written once when patching a set of addon configurations."""
+    settings_file = project_dir / "test_project" / "settings.py"
+    config_set = [addon_config_minimal, {"settings": {"MY_SETTING": "a"}}, {"settings": {"MY_SETTING": "b"}}]
+
+    with (
+        patch("app_enabler.patcher.parse_file", wraps=parse_file) as parse_mock,
+        patch("app_enabler.patcher.write_file", wraps=write_file) as write_mock,
+    ):
+        update_setting_set(settings_file, config_set)
+    assert parse_mock.call_count == 1
+    assert write_mock.call_count == 1
+
+    sys.path.insert(0, str(settings_file.parent))
+    imported = import_module("settings")
+    assert _verify_settings(imported, addon_config_minimal)
+    assert imported.MY_SETTING == "b"
+
+
+def test_update_urlconf_set(pytester, django_setup, project_dir, addon_config):
+    """Urlconf file is parsed and written once when patching a set of addon configurations."""
+    urlconf_file = project_dir / "test_project" / "urls.py"
+
+    with (
+        patch("app_enabler.patcher.parse_file", wraps=parse_file) as parse_mock,
+        patch("app_enabler.patcher.write_file", wraps=write_file) as write_mock,
+    ):
+        update_urlconf_set(urlconf_file, [addon_config, addon_config])
+    assert parse_mock.call_count == 1
+    assert write_mock.call_count == 1
+
+    sys.path.insert(0, str(urlconf_file.parent))
+    imported = import_module("urls")
+    assert _verify_urlconf(imported, addon_config)
+
+
+def test_update_list_setting_many_insertions():
+    """Index stays consistent when many items are inserted in the middle of the list setting."""
+    expected = [f"app_{idx}" for idx in range(100)]
+    original = [_ast_get_object_from_value(value) for value in expected]
+    configuration = []
+    for idx in range(50):
+        configuration.append({"value": f"new_{idx}", "next": f"app_{idx * 2}"})
+        configuration.append({"value": f"pos_{idx}", "position": 1})
+        configuration.append(f"app_{idx}")
+        configuration.append(f"tail_{idx}")
+    # expected result computed by sequentially patching a plain list
+    for config_value in configuration:
+        if isinstance(config_value, dict) and "next" in config_value:
+            expected.insert(expected.index(config_value["next"]), config_value["value"])
+        elif isinstance(config_value, dict):
+            expected.insert(config_value["position"], config_value["value"])
+        elif config_value not in expected:
+            expected.append(config_value)
+
+    _update_list_setting(original, configuration)
+
+    assert [_ast_get_constant_value(item) for item in original] == expected
+
+
+def test_ast_dict_key_index():
+    """Dict keys lookup is kept in sync with the changes to the ast Dict object."""
+    dict_object = ast.parse("{'a': 1, **other, 'b': 2, 'a': 3}").body[0].value
+
+    assert _ast_dict_key_index(dict_object, "a") == 0
+    assert _ast_dict_key_index(dict_object, "b") == 2
+    assert _ast_dict_key_index(dict_object, "c") is None
+    assert _ast_dict_key_index(dict_object, ["unhashable"]) is None
+
+    _ast_dict_set(dict_object, "c", {"nested": True})
+    _ast_dict_set(dict_object, "b", 4)
+    assert _ast_dict_key_index(dict_object, "c") == 4
+    assert ast.literal_eval(dict_object.values[2]) == 4
+
+    # keys added without _ast_dict_set are detected as well
+    dict_object.keys.append(_ast_get_object_from_value("d"))
+    dict_object.values.append(_ast_get_object_from_value(5))
+    assert _ast_dict_key_index(dict_object, "d") == 5
+
+
+@pytest.mark.parametrize(
+    "value",
+    (
+        None,
+        True,
+        -3,
+        1.5,
+        "string",
+        b"bytes",
+        ["a", 1, None],
+        ("a", ("b",)),
+        {"default": {"BACKEND": "locmem", "OPTIONS": {"MAX_ENTRIES": 10, "CULL": [1.0, False]}}},
+        {1, 2},
+        1j,
+    ),
+)
+def test_ast_get_object_from_value(value):
+    """Values are converted to the equivalent AST node."""
+    node = _ast_get_object_from_value(value)
+    assert ast.literal_eval(node) == value
+    assert ast.literal_eval(astor.to_source(ast.Expression(body=node)).strip()) == value
+    # parsed values are not shared across calls
+    assert _ast_get_object_from_value(value) is not node
+
+
+def test_ast_get_urlpattern():
+    """Urlpattern node matches the parsed python source."""
+    node = _ast_get_urlpattern("blog/", "djangocms_blog.urls")
+    assert ast.dump(node) == ast.dump(ast.parse("path('blog/', include('djangocms_blog.urls'))").body[0].value)
+
+
+def test_update_setting_preserve_source(pytester, project_dir):
+    """Patched file keeps the original encoding, newlines and comments."""
+    settings_file = project_dir / "test_project" / "settings.py"
+    settings_file.write_bytes('# -*- coding: latin-1 -*-\r\nNAME = "città"  # comment\r\n'.encode("latin-1"))
+
+    update_setting(settings_file, {"settings": {"OTHER": "è"}})
+
+    assert (
+        settings_file.read_bytes()
+        == '# -*- coding: latin-1 -*-\r\nNAME = "città"  # comment\r\n\r\nOTHER = "è"\r\n'.encode("latin-1")
+    )
+
+
+def test_write_file_status(pytester, project_dir, addon_config_minimal):
+    """Files are only written when their content changes."""
+    settings_file = project_dir / "test_project" / "settings.py"
+    settings_file.chmod(0o640)
+    os.utime(settings_file, (0, 0))
+
+    assert update_setting(settings_file, {}) == FILE_UNCHANGED
+    assert settings_file.stat().st_mtime == 0
+
+    assert update_setting(settings_file, addon_config_minimal) == FILE_MODIFIED
+    assert settings_file.stat().st_mtime != 0
+    assert settings_file.stat().st_mode & 0o777 == 0o640
+    assert update_setting(settings_file, addon_config_minimal) == FILE_UNCHANGED
+    assert [path.name for path in settings_file.parent.iterdir() if path.name.endswith(".tmp")] == []
+
+    new_file = project_dir / "test_project" / "new_settings.py"
+    assert write_file(new_file, parse_file(settings_file)) == FILE_CREATED
+    assert new_file.read_text() == settings_file.read_text()
+
+
+@pytest.mark.parametrize(
+    "source,environ,expected",
+    (
+        ('os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project.settings")', {}, "project.settings"),
+        (
+            'def main():\n    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "project.settings")',
+            {"DJANGO_SETTINGS_MODULE": "other.settings"},
+            "other.settings",
+        ),
+        (
+            'os.environ["DJANGO_SETTINGS_MODULE"] = "project.settings"',
+            {"DJANGO_SETTINGS_MODULE": "other.settings"},
+            "project.settings",
+        ),
+        ('os.environ.setdefault("DJANGO_SETTINGS_MODULE", get_settings())', {}, None),
+    ),
+)
+def test_get_settings_module(source, environ, expected):
+    """Settings module is extracted from manage.py source."""
+    with patch.dict(os.environ, environ):
+        if not environ:
+            os.environ.pop("DJANGO_SETTINGS_MODULE", None)
+        assert get_settings_module(ast.parse(source)) == expected
+
+
+def test_plan_update_set(tmp_path):
+    """Plan records the operations applied to the module and the resulting diff."""
+    settings_file = tmp_path / "settings.py"
+    source = (
+        'INSTALLED_APPS = ["a", "b"]\n'
+        'CACHES = {"default": {"BACKEND": "dummy"}, "other": 1}\n'
+        "DEBUG = True\n"
+        "TIMEOUT = 10\n"
+    )
+    settings_file.write_text(source)
+    config = {
+        "installed-apps": ["b", {"value": "z", "next": "b"}, "c"],
+        "settings": {"CACHES": {"other": 1, "new": 2}, "DEBUG": False, "TIMEOUT": 10, "NEW": [1]},
+    }
+
+    plan = plan_update_set(str(settings_file), patch_setting, [config])
+
+    assert settings_file.read_text() == source
+    assert plan["file"] == str(settings_file)
+    assert plan["operations"] == [
+        {"operation": PLAN_LIST_INSERT, "setting": "INSTALLED_APPS", "position": 1, "value": "z"},
+        {"operation": PLAN_LIST_INSERT, "setting": "INSTALLED_APPS", "position": 3, "value": "c"},
+        {"operation": PLAN_DICT_SET, "setting": "CACHES", "key": "new", "value": 2},
+        {"operation": PLAN_SETTING_CHANGE, "setting": "DEBUG", "value": False},
+        {"operation": PLAN_SETTING_ADD, "setting": "NEW", "value": [1]},
+    ]
+    assert "\n-DEBUG = True\n" in plan["diff"]
+    assert "\n+DEBUG = False\n" in plan["diff"]
+    assert '+INSTALLED_APPS = ["a", "z", "b", "c"]\n' in plan["diff"]
+
+
+def test_plan_update_set_final_positions(tmp_path):
+    """List insertions are recorded with the final positions of the items, after any later insertion."""
+    settings_file = tmp_path / "settings.py"
+    settings_file.write_text('INSTALLED_APPS = ["a", "b"]\nMIDDLEWARE = ["m"]\n')
+    config_set = [
+        {"installed-apps": [{"value": "x", "position": 1}, {"value": "y", "position": 0}]},
+        {
+            "installed-apps": [{"value": "z", "position": 1}, "w"],
+            "settings": {"MIDDLEWARE": [{"value": "n", "position": 0}]},
+        },
+    ]
+
+    plan = plan_update_set(str(settings_file), patch_setting, config_set)
+
+    assert '+INSTALLED_APPS = ["y", "z", "a", "x", "b", "w"]\n' in plan["diff"]
+    assert plan["operations"] == [
+        {"operation": PLAN_LIST_INSERT, "setting": "INSTALLED_APPS", "position": 3, "value": "x"},
+        {"operation": PLAN_LIST_INSERT, "setting": "INSTALLED_APPS", "position": 0, "value": "y"},
+        {"operation": PLAN_LIST_INSERT, "setting": "INSTALLED_APPS", "position": 1, "value": "z"},
+        {"operation": PLAN_LIST_INSERT, "setting": "INSTALLED_APPS", "position": 5, "value": "w"},
+        {"operation": PLAN_LIST_INSERT, "setting": "MIDDLEWARE", "position": 0, "value": "n"},
+    ]
+
+
+def test_plan_update_set_urlconf(project_dir):
+    """Urlconf plan records the imported names and the added url patterns."""
+    urlconf_file = project_dir / "test_project" / "urls.py"
+    config = {"urls": [["", "djangocms_blog.taggit_urls"]]}
+
+    plan = plan_update_set(str(urlconf_file), patch_urlconf, [config, config])
+
+    assert plan["operations"] == [
+        {"operation": PLAN_IMPORT_ADD, "module": "django.urls", "name": "include"},
+        {"operation": PLAN_URLPATTERN_ADD, "pattern": "", "urlconf": "djangocms_blog.taggit_urls"},
+    ]
+    assert "djangocms_blog.taggit_urls" in plan["diff"]
@@ -0,0 +1,109 @@
+import threading
+from subprocess import CalledProcessError
+from unittest.mock import MagicMock, patch
+
+import pytest
+from click.testing import CliRunner
+
+from app_enabler.cli import cli
+from app_enabler.errors import ConfigurationError, messages
+from app_enabler.manifest import ApplyManifest
+from app_enabler.pipeline import install_and_enable
+
+
+def test_install_and_enable():
+    """Packages are installed one by one and their configurations applied in a single batch in the given order."""
+    next_install_started = threading.Event()
+    installed = []
+
+    def install_packages(packages, **kwargs):
+        installed.append(packages[0])
+        if packages[0] == "second":
+            next_install_started.set()
+        if packages[0] == "broken":
+            raise CalledProcessError(returncode=1, cmd="pip", output="ERROR\n")
+
+    def load_addon(application):
+        if application == "first_app":
+            # loading the first addon configuration overlaps with the installation of the next package
+            assert next_install_started.wait(5)
+        return {"package-name": application}
+
+    with (
+        patch("app_enabler.pipeline.install_packages", side_effect=install_packages),
+        patch("app_enabler.pipeline.get_application_from_package", side_effect=lambda p: f"{p}_app" * (p != "none")),
+        patch("app_enabler.pipeline.load_addon", side_effect=load_addon),
+        patch("app_enabler.pipeline.setup_django") as setup_mock,
+        patch("app_enabler.pipeline.apply_configurations") as apply_mock,
+    ):
+        errors = install_and_enable(["first", "broken", "second", "none"], static_verify=True, queue_size=1)
+
+    assert installed == ["first", "broken", "second", "none"]
+    setup_mock.assert_not_called()
+    apply_mock.assert_called_once()
+    assert apply_mock.call_args[0][0] == [{"package-name": "first_app"}, {"package-name": "second_app"}]
+    assert errors == [
+        messages["install_error_output"].format(
+            message=messages["install_error"].format(package="broken"), output="ERROR\n"
+        ),
+        messages["enable_error"].format(package="none"),
+    ]
+
+
+def test_install_and_enable_worker_error():
+    """Unexpected installation errors are raised by the caller and stop the installation."""
+    with (
+        patch("app_enabler.pipeline.install_packages", side_effect=OSError("pip not found")) as install_mock,
+        patch("app_enabler.pipeline.apply_configurations") as apply_mock,
+    ):
+        with pytest.raises(OSError, match="pip not found"):
+            install_and_enable(["first", "second"], static_verify=True, queue_size=1)
+
+    assert install_mock.call_count == 1
+    apply_mock.assert_not_called()
+
+
+def test_install_and_enable_consumer_error():
+    """Errors while enabling the installed packages stop the worker before being raised."""
+    with (
+        patch("app_enabler.pipeline.install_packages") as install_mock,
+        patch("app_enabler.pipeline.get_application_from_package", side_effect=lambda p: f"{p}_app"),
+        patch("app_enabler.pipeline.load_addon", side_effect=ConfigurationError(["addon.json: invalid"])),
+        patch("app_enabler.pipeline.apply_configurations") as apply_mock,
+    ):
+        threads = threading.active_count()
+        with pytest.raises(ConfigurationError):
+            install_and_enable(["first", "second", "third", "fourth"], static_verify=True, queue_size=1)
+        # the worker has been joined: no installation is running anymore
+        assert threading.active_count() == threads
+
+    assert install_mock.call_count < 4
+    apply_mock.assert_not_called()
+
+
+def test_install_and_enable_manifest():
+    """Configurations are recorded in the manifest, and skipped if already applied."""
+    manifest = MagicMock(spec=ApplyManifest)
+    with (
+        patch("app_enabler.pipeline.install_packages"),
+        patch("app_enabler.pipeline.get_application_from_package", side_effect=lambda p: f"{p}_app"),
+        patch("app_enabler.pipeline.load_addon", side_effect=lambda a: {"package-name": a}),
+        patch("app_enabler.pipeline._skip_applied", side_effect=[False, True]) as skip_mock,
+        patch("app_enabler.pipeline.apply_configurations") as apply_mock,
+    ):
+        install_and_enable(["first"], static_verify=True, manifest=manifest)
+        install_and_enable(["first"], static_verify=True, manifest=manifest)
+
+    assert skip_mock.call_args[0][:2] == ([{"package-name": "first_app"}], manifest)
+    apply_mock.assert_called_once()
+    assert apply_mock.call_args[1]["manifest"] is manifest
+
+
+def test_cli_install_pipeline_manifest():
+    """Manifest option is passed to the pipelined installation."""
+    with patch("app_enabler.pipeline.install_and_enable", return_value=[]) as install_mock:
+        runner = CliRunner()
+        result = runner.invoke(cli, ["--manifest", "install", "--pipeline", "first"])
+
+    assert result.exit_code == 0
+    assert install_mock.call_args[1]["manifest"] is True
@@ -0,0 +1,76 @@
+import json
+import pstats
+
+from click.testing import CliRunner
+
+from app_enabler import profiling
+from app_enabler.cli import cli
+from tests.utils import working_directory
+
+
+def test_phase_disabled():
+    """Nothing is recorded if profiling is not enabled."""
+    with profiling.phase("parse"):
+        pass
+
+    assert profiling.get_timings() == {}
+
+
+def test_phase_timings():
+    """Calls, wall and CPU time are recorded by phase, in the order phases are first entered."""
+    profiling.enable_profiling()
+    try:
+        for __ in range(3):
+            with profiling.phase("parse"):
+                sum(range(10000))
+        with profiling.phase("write"):
+            pass
+    finally:
+        timings = profiling.disable_profiling()
+
+    assert list(timings) == ["parse", "write"]
+    assert timings["parse"]["calls"] == 3
+    assert timings["write"]["calls"] == 1
+    assert timings["parse"]["wall"] > 0
+    assert timings["parse"]["cpu"] >= 0
+    assert profiling.get_timings() == {}
+
+
+def test_format_timings():
+    """Timings are formatted as a table with a line per phase, or as JSON."""
+    timings = {"parse": {"calls": 2, "wall": 0.5, "cpu": 0.25}, "django.setup": {"calls": 1, "wall": 1.0, "cpu": 0.75}}
+
+    assert profiling.format_timings(timings).splitlines() == [
+        "phase          calls       wall        cpu",
+        "parse              2     0.500s     0.250s",
+        "django.setup       1     1.000s     0.750s",
+    ]
+    assert json.loads(profiling.format_timings(timings, json_output=True)) == timings
+
+
+def test_cli_profile(project_dir, addon_config_minimal, tmp_path):
+    """Phases timings are printed after the command output and cProfile stats are dumped."""
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps(addon_config_minimal))
+    stats_file = tmp_path / "apply.prof"
+    with working_directory(project_dir):
+        runner = CliRunner()
+        result = runner.invoke(
+            cli,
+            [
+                "--static-resolve",
+                "--static-verify",
+                "--profile",
+                "--cprofile",
+                str(stats_file),
+                "apply",
+                str(config_file),
+            ],
+        )
+
+    assert result.exit_code == 0
+    lines = result.output.splitlines()
+    table = lines[lines.index(next(line for line in lines if line.startswith("phase "))) :]
+    assert [line.split()[0] for line in table[1:]] == ["command", "parse", "patch", "generate", "write", "verify"]
+    assert pstats.Stats(str(stats_file)).total_calls > 0
+    assert profiling.get_timings() == {}
@@ -0,0 +1,166 @@
+import json
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from app_enabler.cli import cli
+from app_enabler.django import load_addon
+from app_enabler.enable import apply_configuration_set, load_configuration_set
+from app_enabler.errors import ConfigurationError, messages
+from app_enabler.schema import check_configuration_set, validate_configuration, validate_configuration_set
+from tests.utils import get_project_dir, working_directory
+
+
+def test_validate_valid(addon_config, addon_config_minimal, blog_package):
+    """Documented configurations are valid."""
+    assert validate_configuration(addon_config, addon=True) == []
+    assert validate_configuration(addon_config_minimal, addon=True) == []
+    assert validate_configuration(load_addon("djangocms_blog"), addon=True) == []
+    for config_file in (get_project_dir() / "config").glob("*.json"):
+        config_data = json.loads(config_file.read_text())
+        assert validate_configuration_set(config_data if isinstance(config_data, list) else [config_data]) == []
+
+
+@pytest.mark.parametrize(
+    "config",
+    (
+        {"$schema": "https://example.com/addon.schema.json", "installed-apps": []},
+        {"settings": {"NEW_LIST": [{"NAME": "x"}], "NEW_DICT": {"key": [{"position": "x"}]}}},
+        {"settings": {"MIDDLEWARE": [{"position": 1}]}},
+    ),
+)
+def test_validate_valid_verbatim(config):
+    """Unknown attributes are ignored and settings values are not checked, as new settings are added verbatim."""
+    assert validate_configuration(config) == []
+
+
+@pytest.mark.parametrize(
+    "config,errors",
+    (
+        ([], ["$: expected object, got list"]),
+        ({"installed-apps": "taggit"}, ["$.installed-apps: expected array, got str"]),
+        ({"installed-apps": [{"next": "cms"}]}, ["$.installed-apps[0]: 'value' is required"]),
+        (
+            {"installed-apps": [{"value": "cms", "position": True}]},
+            ["$.installed-apps[0].position: expected integer, got bool"],
+        ),
+        ({"installed-apps": [{"value": "cms", "before": "x"}]}, ["$.installed-apps[0]: unknown attribute 'before'"]),
+        (
+            {"settings": {"MY-SETTING": 1}},
+            ["$.settings.MY-SETTING: 'MY-SETTING' does not match ^[A-Za-z_][A-Za-z0-9_]*$"],
+        ),
+        ({"urls": [["", "blog.urls", "extra"]]}, ["$.urls[0]: expected at most 2 items, got 3"]),
+        ({"urls": [["blog.urls"]]}, ["$.urls[0]: expected at least 2 items, got 1"]),
+        ({"urls": [["", None]]}, ["$.urls[0][1]: expected string, got NoneType"]),
+        ({"message": ["done"]}, ["$.message: expected string, got list"]),
+    ),
+)
+def test_validate_invalid(config, errors):
+    """Configurations not complying with the specifications are reported with the path of the invalid values."""
+    assert validate_configuration(config) == errors
+
+
+def test_validate_addon():
+    """package-name and installed-apps are required in addon.json."""
+    assert validate_configuration({}, addon=True, source="addon.json") == [
+        "addon.json: $: 'package-name' is required",
+        "addon.json: $: 'installed-apps' is required",
+    ]
+    assert validate_configuration({}) == []
+
+
+def test_validate_configuration_set_parallel():
+    """Large sets are validated in parallel, errors are reported in the set order."""
+    config_set = [{"message": "ok"}, {"message": 1}, {"message": "ok"}, {"urls": {}}, {"message": "ok"}]
+    expected = [
+        "config.json[1]: $.message: expected string, got int",
+        "config.json[3]: $.urls: expected array, got dict",
+    ]
+
+    assert validate_configuration_set(config_set, source="config.json") == expected
+    with patch("app_enabler.schema.PARALLEL_THRESHOLD", 2):
+        assert validate_configuration_set(config_set, source="config.json", workers=2) == expected
+    with pytest.raises(ConfigurationError) as exc_info:
+        check_configuration_set(config_set, source="config.json")
+    assert exc_info.value.errors == expected
+
+
+def test_load_configuration_set_invalid(tmp_path):
+    """Invalid configuration files are reported with the file path."""
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps([{"message": "ok"}, {"settings": []}]))
+    with pytest.raises(ConfigurationError) as exc_info:
+        load_configuration_set([config_file])
+    assert exc_info.value.errors == [f"{config_file}[1]: $.settings: expected object, got list"]
+
+    config_file.write_text('{"message": ')
+    with pytest.raises(ConfigurationError) as exc_info:
+        load_configuration_set([config_file])
+    assert exc_info.value.errors[0].startswith(f"{config_file}: Expecting value")
+
+
+def test_load_addon_invalid(tmp_path):
+    """Invalid addon.json is reported instead of being ignored."""
+    package = tmp_path / "invalid_addon"
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    (package / "addon.json").write_text(json.dumps({"package-name": "invalid-addon"}))
+    sys.path.insert(0, str(tmp_path))
+    try:
+        with pytest.raises(ConfigurationError) as exc_info:
+            load_addon("invalid_addon")
+        assert exc_info.value.errors == ["invalid_addon/addon.json: $: 'installed-apps' is required"]
+    finally:
+        sys.path.remove(str(tmp_path))
+        del sys.modules["invalid_addon"]
+
+
+def test_apply_invalid_before_setup(project_dir):
+    """Configurations are validated before initializing django and changing any file."""
+    config_file = project_dir / "config.json"
+    config_file.write_text(json.dumps({"installed-apps": [{"next": "cms"}]}))
+    settings = (project_dir / "test_project" / "settings.py").read_text()
+
+    with working_directory(project_dir), patch("app_enabler.enable.setup_django") as setup_django:
+        with pytest.raises(ConfigurationError):
+            apply_configuration_set([Path(config_file)])
+
+        runner = CliRunner()
+        result = runner.invoke(cli, ["apply", str(config_file)])
+
+    setup_django.assert_not_called()
+    assert (project_dir / "test_project" / "settings.py").read_text() == settings
+    assert result.exit_code == 1
+    assert result.output == messages["invalid_configuration"].format(
+        errors=f"{config_file}[0]: $.installed-apps[0]: 'value' is required"
+    )
+
+
+def test_apply_new_setting_verbatim(project_dir):
+    """Settings not existing in the project are added verbatim, whatever their structure."""
+    config = {"$schema": "addon.schema.json", "settings": {"NEW_LIST": [{"NAME": "x"}, {"value": 1, "next": "x"}]}}
+    config_file = project_dir / "config.json"
+    config_file.write_text(json.dumps(config))
+
+    with working_directory(project_dir):
+        apply_configuration_set([config_file], static_verify=True, static_resolve=True)
+
+    settings = (project_dir / "test_project" / "settings.py").read_text()
+    assert "NEW_LIST = [{'NAME': 'x'}, {'value': 1, 'next': 'x'}]" in settings.replace('"', "'")
+
+
+def test_apply_invalid_list_item(project_dir):
+    """Dict items merged into an existing list setting must have the documented structure."""
+    config_file = project_dir / "config.json"
+    config_file.write_text(json.dumps({"settings": {"MIDDLEWARE": [{"position": 1}, {"value": "x", "before": "y"}]}}))
+    settings = (project_dir / "test_project" / "settings.py").read_text()
+
+    with working_directory(project_dir):
+        with pytest.raises(ConfigurationError) as exc_info:
+            apply_configuration_set([config_file], static_verify=True, static_resolve=True)
+
+    assert exc_info.value.errors == ["$.settings.MIDDLEWARE[0]: 'value' is required"]
+    assert (project_dir / "test_project" / "settings.py").read_text() == settings
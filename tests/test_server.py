@@ -0,0 +1,165 @@
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import tokenize
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from app_enabler.cache import MemoryCache
+from app_enabler.cli import cli
+from app_enabler.server import EnablerServer, send_request
+from tests.utils import working_directory
+
+
+@pytest.fixture
+def socket_path():
+    """Socket path short enough for AF_UNIX limits."""
+    directory = tempfile.mkdtemp()
+    yield os.path.join(directory, "enabler.sock")
+    shutil.rmtree(directory)
+
+
+@pytest.fixture
+def server(project_dir, socket_path):
+    """Run a server for the sample project in a background thread."""
+    with working_directory(project_dir):
+        server = EnablerServer(socket_path, static_verify=True, static_resolve=True)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def test_memory_cache(tmp_path):
+    """Cached values are copies, invalidated when the source file changes."""
+    source = tmp_path / "settings.py"
+    source.write_text("DEBUG = True\n")
+    cache = MemoryCache(tmp_path)
+    value = {"items": [1]}
+    cache.set("test", source, value)
+    value["items"].append(2)
+
+    cached = cache.get("test", source)
+    assert cached == {"items": [1]}
+    cached["items"].append(3)
+    assert cache.get("test", source) == {"items": [1]}
+    assert not (tmp_path / ".app_enabler_cache").exists()
+
+    source.write_text("DEBUG = False\n")
+    assert cache.get("test", source) is None
+
+
+def test_server_apply(server, project_dir, addon_config_minimal, socket_path):
+    """Configurations are applied and parsed files are reused until they change."""
+    settings_file = project_dir / "test_project" / "settings.py"
+    original_settings = settings_file.read_text()
+    addon_config_minimal["message"] = "applied"
+    config_file = project_dir / "config.json"
+    config_file.write_text(json.dumps(addon_config_minimal))
+
+    response = send_request(socket_path, {"command": "plan", "config_set": [str(config_file)]})
+    assert response["status"] == "ok"
+    assert '+    "djangocms_blog",\n' in response["plan"]["settings"]["diff"]
+    assert settings_file.read_text() == original_settings
+
+    response = send_request(socket_path, {"command": "apply", "configurations": [addon_config_minimal]})
+    assert response == {"status": "ok", "output": "applied"}
+    assert '"djangocms_blog"' in settings_file.read_text()
+
+    # written files are parsed again by the next request, and then read only on cache misses
+    response = send_request(socket_path, {"command": "plan", "configurations": [addon_config_minimal]})
+    assert response["plan"]["settings"]["diff"] == ""
+    with patch("app_enabler.patcher.tokenize.detect_encoding", wraps=tokenize.detect_encoding) as detect_encoding:
+        response = send_request(socket_path, {"command": "plan", "configurations": [addon_config_minimal]})
+        assert response["plan"]["settings"]["diff"] == ""
+        detect_encoding.assert_not_called()
+
+    # external changes are picked up
+    settings_file.write_text(original_settings)
+    with patch("app_enabler.server.load_addon", return_value=addon_config_minimal):
+        response = send_request(socket_path, {"command": "enable", "application": "djangocms_blog"})
+    assert response == {"status": "ok", "output": "applied"}
+    assert '"djangocms_blog"' in settings_file.read_text()
+
+
+def test_server_errors(server, socket_path):
+    """Invalid requests are reported and do not stop the server."""
+    assert send_request(socket_path, {"command": "unknown"}) == {
+        "status": "error",
+        "error": "Unknown command: unknown",
+    }
+    assert send_request(socket_path, {"command": "enable"}) == {"status": "error", "error": "Missing application"}
+    response = send_request(socket_path, {"command": "enable", "application": "not_existing"})
+    assert response == {"status": "error", "error": "ValueError: Application not_existing has no addon configuration"}
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        with client.makefile("rwb") as stream:
+            stream.write(b"not json\n")
+            stream.write(json.dumps({"command": "plan"}).encode("utf-8") + b"\n")
+            stream.flush()
+            assert json.loads(stream.readline())["error"].startswith("Invalid request: ")
+            assert json.loads(stream.readline())["plan"]["urlconf"]["diff"] == ""
+
+
+def test_server_stale_socket(project_dir, socket_path):
+    """Socket file left by a stopped server is replaced and removed when the server is closed."""
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(socket_path)
+    stale.close()
+
+    with working_directory(project_dir):
+        with EnablerServer(socket_path, static_verify=True, static_resolve=True):
+            assert os.path.exists(socket_path)
+    assert not os.path.exists(socket_path)
+
+
+def test_server_unchanged_files(server, project_dir, socket_path):
+    """Files are not written if the configurations are already applied."""
+    settings_file = project_dir / "test_project" / "settings.py"
+    mtime = settings_file.stat().st_mtime_ns
+
+    response = send_request(
+        socket_path, {"command": "apply", "configurations": [{"installed-apps": ["django.contrib.admin"]}]}
+    )
+
+    assert response == {"status": "ok", "output": ""}
+    assert settings_file.stat().st_mtime_ns == mtime
+
+
+def test_server_reload_settings(project_dir, socket_path, teardown_django):
+    """Settings changed by a request are used by the next ones."""
+    project_urls = project_dir / "test_project" / "urls.py"
+    new_urls = project_dir / "test_project" / "new_urls.py"
+    shutil.copy(project_urls, new_urls)
+
+    with working_directory(project_dir), EnablerServer(socket_path) as server:
+        response = server.process(
+            {"command": "apply", "configurations": [{"settings": {"ROOT_URLCONF": "test_project.new_urls"}}]}
+        )
+        assert response == {"status": "ok", "output": ""}
+
+        response = server.process(
+            {"command": "apply", "configurations": [{"urls": [["accounts/", "django.contrib.auth.urls"]]}]}
+        )
+        assert response == {"status": "ok", "output": ""}
+    assert "django.contrib.auth.urls" in new_urls.read_text()
+    assert "django.contrib.auth.urls" not in project_urls.read_text()
+
+
+def test_cli_serve_options(project_dir, socket_path):
+    """Options not supported by the server are rejected."""
+    runner = CliRunner()
+    with working_directory(project_dir), patch("app_enabler.server.EnablerServer") as server_mock:
+        for option in ("--cache", "--manifest"):
+            result = runner.invoke(cli, [option, "serve", "--socket", socket_path])
+            assert result.exit_code == 2
+            assert "serve can't be used with --cache or --manifest" in result.output
+    server_mock.assert_not_called()
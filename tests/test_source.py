@@ -0,0 +1,133 @@
+import ast
+import difflib
+
+import pytest
+
+from app_enabler.patcher import _ast_get_object_from_value, patch_setting, patch_urlconf
+from app_enabler.source import render_node, splice_source
+
+
+def _splice(source, config, patcher=patch_setting):
+    """Patch the source and check that the spliced source matches the patched module."""
+    parsed = ast.parse(source)
+    patcher(parsed, config)
+    spliced = splice_source(source, parsed)
+    assert ast.dump(ast.parse(spliced)) == ast.dump(parsed)
+    return spliced
+
+
+def test_splice_unchanged(project_dir):
+    """Source is not changed if the module is not patched."""
+    source = (project_dir / "test_project" / "settings.py").read_text()
+
+    assert _splice(source, {}) == source
+
+
+def test_splice_minimal_diff(project_dir, addon_config):
+    """Only the patched lines of the project settings are changed."""
+    source = (project_dir / "test_project" / "settings.py").read_text()
+
+    spliced = _splice(source, addon_config)
+
+    diff = [
+        line
+        for line in difflib.unified_diff(source.splitlines(), spliced.splitlines(), lineterm="", n=0)
+        if line.startswith(("-", "+")) and not line.startswith(("---", "+++"))
+    ]
+    # comments are preserved
+    assert [line for line in source.splitlines() if line.startswith("#")] == [
+        line for line in spliced.splitlines() if line.startswith("#")
+    ]
+    assert "-USE_I18N = True" in diff
+    assert "+USE_I18N = False" in diff
+    assert '+    "django.middleware.gzip.GZipMiddleware",' in diff
+    assert '+META_SITE_PROTOCOL = "https"' in diff
+    assert not [line for line in diff if "INSTALLED_APPS" in line or "django.contrib.admin" in line]
+
+
+@pytest.mark.parametrize(
+    "source,config,expected",
+    (
+        (
+            'INSTALLED_APPS = [\n    "a",  # first\n    "b",  # second\n]\n',
+            {"installed-apps": ["c", {"value": "z", "next": "b"}]},
+            'INSTALLED_APPS = [\n    "a",  # first\n    "z",\n    "b",  # second\n    "c",\n]\n',
+        ),
+        (
+            'INSTALLED_APPS = [\n    "a",\n    "b"\n]\n',
+            {"installed-apps": ["c"]},
+            'INSTALLED_APPS = [\n    "a",\n    "b",\n    "c"\n]\n',
+        ),
+        (
+            'INSTALLED_APPS = ["a", "b"]  # apps\n',
+            {"installed-apps": ["c", {"value": "z", "position": 0}]},
+            'INSTALLED_APPS = ["z", "a", "b", "c"]  # apps\n',
+        ),
+        (
+            "ALLOWED_HOSTS = []\n",
+            {"settings": {"ALLOWED_HOSTS": ["example.com"]}},
+            'ALLOWED_HOSTS = ["example.com"]\n',
+        ),
+        (
+            'CACHES = {\n    "default": {\n        "BACKEND": "dummy",\n    },  # default\n}\n',
+            {"settings": {"CACHES": {"default": {"BACKEND": "locmem"}, "other": {"BACKEND": "dummy"}}}},
+            'CACHES = {\n    "default": {"BACKEND": "locmem"},  # default\n    "other": {"BACKEND": "dummy"},\n}\n',
+        ),
+        (
+            "SETTING = {'a': 1, **OTHER}\nDEBUG = True",
+            {"settings": {"SETTING": {"b": 2}, "DEBUG": False, "NEW": "value"}},
+            "SETTING = {'a': 1, **OTHER, 'b': 2}\nDEBUG = False\n\nNEW = 'value'\n",
+        ),
+        (
+            '# -*- coding: utf-8 -*-\r\nNAME = "città"  # commento\r\n',
+            {"settings": {"NAME": "è", "OTHER": "ò"}},
+            '# -*- coding: utf-8 -*-\r\nNAME = "è"  # commento\r\n\r\nOTHER = "ò"\r\n',
+        ),
+    ),
+)
+def test_splice_settings(source, config, expected):
+    """Settings patches are spliced into the original source retaining its layout."""
+    assert _splice(source, config) == expected
+
+
+@pytest.mark.parametrize(
+    "source,expected",
+    (
+        (
+            "from django.urls import path\n\nurlpatterns = [\n    path('admin/', admin.site.urls),\n]\n",
+            "from django.urls import path, include\n\nurlpatterns = [\n    path('admin/', admin.site.urls),\n"
+            "    path('', include('blog.urls')),\n]\n",
+        ),
+        (
+            "from django.urls import (\n    path,\n)\n\nurlpatterns = []\n",
+            "from django.urls import (\n    path,\n    include,\n)\n\n"
+            'urlpatterns = [path("", include("blog.urls"))]\n',
+        ),
+    ),
+)
+def test_splice_urlconf(source, expected):
+    """Urlconf patches are spliced into the original source retaining its layout."""
+    assert _splice(source, {"urls": [["", "blog.urls"]]}, patch_urlconf) == expected
+
+
+def test_splice_fallback():
+    """Module is rendered from the AST if statements have been removed."""
+    source = "A = 1  # comment\nB = 2\n"
+    parsed = ast.parse(source)
+    del parsed.body[0]
+
+    assert splice_source(source, parsed) == "B = 2\n"
+
+
+def test_render_node_multiline():
+    """Long literal values are split on multiple lines."""
+    value = {"version": 1, "handlers": {"console": {"class": "logging.StreamHandler", "level": "DEBUG"}}}
+
+    assert render_node(_ast_get_object_from_value(value), indent="") == (
+        "{\n"
+        '    "version": 1,\n'
+        '    "handlers": {"console": {"class": "logging.StreamHandler", "level": "DEBUG"}},\n'
+        "}"
+    )
+    assert render_node(_ast_get_object_from_value(["it's"]), quote='"') == '["it\'s"]'
+    assert render_node(_ast_get_object_from_value(['say "hi"']), quote='"') == "['say \"hi\"']"
@@ -0,0 +1,158 @@
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from app_enabler.cli import cli
+from app_enabler.errors import ConfigurationError, LockTimeoutError, messages
+from app_enabler.watch import ConfigurationWatcher, InotifyWatcher, PollingWatcher, get_watcher
+from tests.utils import working_directory
+
+
+class FakeWatcher:
+    """Watcher returning the given results, then stopping the watch loop."""
+
+    def __init__(self, results, on_wait=None):
+        self.results = list(results)
+        self.on_wait = on_wait
+        self.closed = False
+
+    def wait(self, timeout=None):
+        if self.on_wait:
+            self.on_wait(timeout)
+        return self.results.pop(0) if self.results else False
+
+    def close(self):
+        self.closed = True
+
+
+def test_polling_watcher(tmp_path):
+    """Changes of the files are detected by their size and modification time."""
+    config_file = tmp_path / "config.json"
+    config_file.write_text("{}")
+    watcher = PollingWatcher([config_file], interval=0.01)
+
+    assert not watcher.wait(0.05)
+    config_file.write_text('{"settings": {}}')
+    assert watcher.wait(0.05)
+    config_file.unlink()
+    assert watcher.wait(0.05)
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is only available on linux")
+def test_inotify_watcher(tmp_path):
+    """Written and replaced files are detected, other files in the directory are ignored."""
+    config_file = tmp_path / "config.json"
+    config_file.write_text("{}")
+    watcher = InotifyWatcher([config_file])
+    try:
+        assert not watcher.wait(0.05)
+        (tmp_path / "other.json").write_text("{}")
+        assert not watcher.wait(0.05)
+        config_file.write_text('{"settings": {}}')
+        assert watcher.wait(0.05)
+        (tmp_path / "new.json").write_text("{}")
+        os.replace(tmp_path / "new.json", config_file)
+        assert watcher.wait(0.05)
+    finally:
+        watcher.close()
+
+
+def test_get_watcher_fallback(tmp_path):
+    """Polling watcher is used if inotify is not available."""
+    with patch("app_enabler.watch._get_libc", side_effect=AttributeError):
+        assert isinstance(get_watcher([tmp_path / "config.json"]), PollingWatcher)
+
+
+def test_apply_changes(capsys, project_dir, addon_config_minimal):
+    """Only the configurations changed since the previous application are applied."""
+    config_file = project_dir / "config.json"
+    other_config = {"installed-apps": ["other_app"]}
+    config_file.write_text(json.dumps([addon_config_minimal, other_config]))
+    settings_file = project_dir / "test_project" / "settings.py"
+
+    with working_directory(project_dir):
+        watcher = ConfigurationWatcher([config_file], verbose=True, static_verify=True, static_resolve=True)
+        assert watcher.apply_changes() == [addon_config_minimal, other_config]
+        assert '"other_app"' in settings_file.read_text()
+        assert watcher.apply_changes() == []
+
+        other_config["installed-apps"].append("another_app")
+        config_file.write_text(json.dumps([addon_config_minimal, other_config]))
+        assert watcher.apply_changes() == [other_config]
+        assert '"another_app"' in settings_file.read_text()
+
+        config_file.write_text(json.dumps([addon_config_minimal])[:-5])
+        assert watcher.apply_changes() == []
+
+    captured = capsys.readouterr()
+    assert messages["watch_applied"].format(changed=1, total=2) in captured.out
+    assert messages["watch_applied"].format(changed=0, total=2) in captured.out
+    assert captured.err.startswith("Invalid configuration, waiting for the next change: ")
+
+
+@pytest.mark.parametrize(
+    "error",
+    (
+        ConfigurationError(["$.settings.MIDDLEWARE[0]: 'value' is required"]),
+        LockTimeoutError("Project locked"),
+        PermissionError("settings.py: permission denied"),
+    ),
+)
+def test_apply_changes_error(capsys, project_dir, addon_config_minimal, error):
+    """Errors while applying the configurations are reported and the configurations are applied on the next change."""
+    config_file = project_dir / "config.json"
+    config_file.write_text(json.dumps(addon_config_minimal))
+
+    with working_directory(project_dir):
+        watcher = ConfigurationWatcher([config_file], static_verify=True, static_resolve=True)
+        with patch("app_enabler.watch.apply_configurations", side_effect=error):
+            assert watcher.apply_changes() == []
+        assert watcher.apply_changes() == [addon_config_minimal]
+
+    assert capsys.readouterr().err == messages["watch_apply_error"].format(error=error)
+
+
+def test_watch_run(project_dir, addon_config_minimal):
+    """Configurations are applied at start and once after each burst of changes."""
+    config_file = project_dir / "config.json"
+    config_file.write_text(json.dumps(addon_config_minimal))
+    timeouts = []
+    watcher = FakeWatcher([True, True, True, False, True, False], on_wait=timeouts.append)
+
+    with working_directory(project_dir):
+        configuration_watcher = ConfigurationWatcher([config_file], static_verify=True, static_resolve=True)
+        with patch.object(configuration_watcher, "apply_changes") as apply_changes:
+            configuration_watcher.run(debounce=0.1, watcher=watcher)
+
+    assert apply_changes.call_count == 3
+    assert timeouts == [None, 0.1, 0.1, 0.1, None, 0.1, None]
+    assert watcher.closed
+
+
+def test_cli_apply_watch(project_dir):
+    """Watch mode runs the configuration watcher until interrupted."""
+    with (
+        working_directory(project_dir),
+        patch("app_enabler.watch.ConfigurationWatcher.run", side_effect=KeyboardInterrupt) as run,
+    ):
+        runner = CliRunner()
+        result = runner.invoke(cli, ["apply", "--watch", "--debounce", "1", "config.json"])
+        assert result.exit_code == 0
+        run.assert_called_once_with(debounce=1.0)
+
+        result = runner.invoke(cli, ["apply", "--watch", "--dry-run", "config.json"])
+        assert result.exit_code == 2
+        assert "--watch can't be used with --dry-run" in result.output
+
+        result = runner.invoke(cli, ["apply", "--watch", "-"])
+        assert result.exit_code == 2
+        assert "--watch can't be used with the standard input" in result.output
+
+        for option in ("--cache", "--manifest"):
+            result = runner.invoke(cli, [option, "apply", "--watch", "config.json"])
+            assert result.exit_code == 2
+            assert "--watch can't be used with --cache or --manifest" in result.output